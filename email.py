@@ -4,10 +4,22 @@ from email.generator import BytesGenerator
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
+from email.mime.image import MIMEImage
 from email import encoders
 from datetime import datetime, timezone, timedelta
+from io import BytesIO
+from collections import OrderedDict
 import email.utils
+import hashlib
+import glob
+import time
 import os
+import re
+
+try:
+    from PIL import Image  # optional: only needed when recompress_images_over is set
+except ImportError:
+    Image = None
 
 # === CONFIGURATION ===
 # Paths relative to your Obsidian vault, or absolute paths
@@ -15,91 +27,268 @@ input_path = "attachments/original.eml"     # EML to load
 output_path = "attachments/cleaned.eml"     # Final output EML
 pdf_path = "attachments/extra-doc.pdf"      # PDF to attach
 
-# === LOAD ORIGINAL EMAIL ===
-with open(input_path, 'rb') as f:
-    msg = BytesParser(policy=policy.default).parse(f)
+# Batch mode: clean every .eml in batch_input_dir into batch_output_dir instead
+batch_input_dir = None                      # e.g. "attachments/inbox"
+batch_output_dir = "attachments/cleaned"
 
-# === SET CUSTOM DATE ===
-ist = timezone(timedelta(hours=5, minutes=30))
-custom_date = datetime(2025, 7, 11, 13, 35, 0, tzinfo=ist)
-formatted = email.utils.format_datetime(custom_date)
-if 'Date' in msg:
-    msg.replace_header('Date', formatted)
-else:
-    msg['Date'] = formatted
-print(f"✓ Date set to: {formatted}")
-
-# === STRIP INTERNAL HEADERS ===
-internal_headers = [
-    k for k in msg.keys()
-    if k.lower().startswith('received')
-    or k.lower().startswith('arc')
-    or (k.lower().startswith('x-') and not k.startswith("X-Gm"))
-]
-for k in internal_headers:
-    del msg[k]
-print(f"✓ Removed {len(internal_headers)} internal headers")
-
-# === EXTRACT BODY + INLINE IMAGES ===
-plain_body = None
-html_body = None
-inline_images = []
-
-for part in msg.walk():
-    content_type = part.get_content_type()
-    disposition = part.get_content_disposition()
-    content_id = part.get('Content-ID')
-    charset = part.get_content_charset() or 'utf-8'
-
-    if disposition == 'attachment':
-        continue  # remove all true attachments
-    elif content_type == 'text/plain':
-        plain_body = part.get_payload(decode=True).decode(charset, errors='replace')
-    elif content_type == 'text/html':
-        html_body = part.get_payload(decode=True).decode(charset, errors='replace')
-    elif disposition == 'inline' and content_id:
-        inline_images.append(part)
-
-# === BUILD CLEAN EMAIL STRUCTURE ===
-clean_msg = MIMEMultipart()
-for k, v in msg.items():
-    clean_msg[k] = v
-
-# Build nested MIME: alternative inside related
-related = MIMEMultipart("related")
-alt = MIMEMultipart("alternative")
-
-if plain_body:
-    alt.attach(MIMEText(plain_body, "plain", _charset="utf-8"))
-if html_body:
-    alt.attach(MIMEText(html_body, "html", _charset="utf-8"))
-related.attach(alt)
-
-# Attach inline images
-for img in inline_images:
-    related.attach(img)
-    print(f"✓ Preserved inline image: {img.get_filename()}")
-
-clean_msg.attach(related)
-print("✓ Attached body and inline images")
-
-# === ADD NEW PDF ATTACHMENT ===
-if os.path.exists(pdf_path):
-    with open(pdf_path, 'rb') as f:
-        part = MIMEBase('application', 'pdf')
-        part.set_payload(f.read())
-        encoders.encode_base64(part)
-        part.add_header(
-            'Content-Disposition',
-            f'attachment; filename="{os.path.basename(pdf_path)}"'
-        )
-        clean_msg.attach(part)
-    print(f"✓ Attached new PDF: {os.path.basename(pdf_path)}")
+# Sidecar index (Message-ID, Date, From/To, Subject, part byte offsets) for later
+# lookups and partial extraction: python eml_index.py <index_path> find --from ...
+index_path = None                           # e.g. "attachments/cleaned-index.sqlite"
+
+# Inline images (signature logos, tracking pixels, pasted screenshots)
+dedupe_inline_images = False    # True: keep one copy of identical images, rewrite cid: references
+recompress_images_over = None   # bytes, e.g. 200_000: downscale/recompress larger JPEG/PNG (needs Pillow)
+max_image_side = 1600           # px, longest side after recompression
+jpeg_quality = 85
+reuse_cache_bytes = 64_000_000  # recompressed images kept for reuse across the batch (LRU)
+
+# === INLINE IMAGE DEDUPE / RECOMPRESSION ===
+# Identical images are found by content hash. Within a message the duplicates are
+# dropped and their cid: references point at the copy that is kept. Across a batch
+# recompressed images are kept in an LRU of at most reuse_cache_bytes, so an image
+# seen again (a signature logo) isn't recompressed again. Images that recompression
+# doesn't shrink are remembered by digest only.
+image_stats = {"images": 0, "duplicates": 0, "recompressed": 0, "reused": 0,
+               "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+processed_images = OrderedDict()  # sha256 of the received bytes -> smaller bytes, or None if none
+processed_bytes = 0
+
+def remember_recompressed(digest, smaller):
+    global processed_bytes
+    processed_images[digest] = smaller
+    processed_bytes += len(smaller or b"") + 100  # ~ key and entry overhead
+    while processed_bytes > reuse_cache_bytes and len(processed_images) > 1:
+        _, dropped = processed_images.popitem(last=False)
+        processed_bytes -= len(dropped or b"") + 100
+
+def bare_cid(content_id):
+    return content_id.strip().strip("<>")
+
+def recompress(data, subtype):
+    """Smaller JPEG/PNG for an oversized image, or the original bytes if that doesn't help."""
+    if Image is None or subtype not in ("jpeg", "png"):
+        return data
+    out = BytesIO()
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img.thumbnail((max_image_side, max_image_side))  # only ever shrinks
+            if subtype == "jpeg":
+                img.convert("RGB").save(out, "JPEG", quality=jpeg_quality, optimize=True)
+            else:
+                img.save(out, "PNG", optimize=True)
+    except (OSError, Image.DecompressionBombError):  # unreadable image: keep it as received
+        return data
+    return out.getvalue() if out.tell() < len(data) else data
+
+def optimize_inline_images(images, html):
+    """-> (image parts to keep, html with cid: references to dropped duplicates rewritten)."""
+    t0 = time.perf_counter()
+    kept, cid_for_hash = [], {}
+    for part in images:
+        data = part.get_payload(decode=True) or b""
+        digest = hashlib.sha256(data).hexdigest()
+        cid = bare_cid(part["Content-ID"])
+        image_stats["images"] += 1
+        image_stats["bytes_in"] += len(data)
+
+        if dedupe_inline_images and digest in cid_for_hash:
+            image_stats["duplicates"] += 1
+            if html:
+                html = re.sub(rf"cid:{re.escape(cid)}(?=[\"'\s)>]|$)", f"cid:{cid_for_hash[digest]}", html)
+            continue
+        cid_for_hash[digest] = cid
+
+        subtype = part.get_content_subtype()
+        if recompress_images_over and len(data) > recompress_images_over:
+            if digest in processed_images:
+                processed_images.move_to_end(digest)
+                smaller = processed_images[digest]
+                image_stats["reused"] += smaller is not None  # only a reuse if it saved bytes
+            else:
+                smaller = recompress(data, subtype)
+                smaller = smaller if len(smaller) < len(data) else None
+                remember_recompressed(digest, smaller)
+            if smaller is not None:
+                image_stats["recompressed"] += 1
+                new = MIMEImage(smaller, _subtype=subtype)
+                new["Content-ID"] = part["Content-ID"]
+                new.add_header("Content-Disposition", "inline", filename=part.get_filename() or f"{cid}.{subtype}")
+                part, data = new, smaller
+        image_stats["bytes_out"] += len(data)
+        kept.append(part)
+    image_stats["seconds"] += time.perf_counter() - t0
+    return kept, html
+
+# === SIDECAR INDEX ===
+def leaf_offsets(part, raw, start, end):
+    """[(leaf part, body_start, body_end)] for `part`, which was serialized as raw[start:end]."""
+    header_end = raw.find(b"\n\n", start, end)
+    body_start = header_end + 2 if header_end != -1 else end
+    if not part.is_multipart():
+        return [(part, body_start, end)]
+    delimiter = b"--" + part.get_boundary().encode()
+    pos = raw.find(delimiter, body_start, end)  # skip the preamble
+    leaves = []
+    for child in part.get_payload():
+        child_start = raw.find(b"\n", pos, end) + 1  # after the delimiter line
+        pos = raw.find(b"\n" + delimiter, child_start, end)  # that newline belongs to the delimiter
+        leaves += leaf_offsets(child, raw, child_start, pos)
+        pos += 1
+    return leaves
+
+def index_email(db, path, msg, raw):
+    date = msg.get('Date')
+    try:
+        date = email.utils.parsedate_to_datetime(date).astimezone(timezone.utc).isoformat() if date else None
+    except (TypeError, ValueError):
+        pass  # unparseable: keep it as written
+    sender = email.utils.getaddresses([msg.get('From', '')])
+    recipients = email.utils.getaddresses(msg.get_all('To', []) + msg.get_all('Cc', []))
+    headers = {
+        "message_id": msg.get('Message-ID'),
+        "date": date,
+        "sender": sender[0][1].lower() if sender else None,
+        "recipients": ",".join(addr.lower() for _, addr in recipients if addr),
+        "subject": str(msg.get('Subject', '')),
+    }
+    parts = [{
+        "content_type": part.get_content_type(),
+        "disposition": part.get_content_disposition(),
+        "filename": part.get_filename(),
+        "content_id": part.get('Content-ID'),
+        "charset": part.get_content_charset(),
+        "encoding": part.get('Content-Transfer-Encoding', '7bit'),
+        "body_start": body_start,
+        "body_end": body_end,
+    } for part, body_start, body_end in leaf_offsets(msg, raw, 0, len(raw))]
+    eml_index.record(db, path, headers, parts)
+
+def clean_email(input_path, output_path, index_db=None):
+    # === LOAD ORIGINAL EMAIL ===
+    with open(input_path, 'rb') as f:
+        msg = BytesParser(policy=policy.default).parse(f)
+
+    # === SET CUSTOM DATE ===
+    ist = timezone(timedelta(hours=5, minutes=30))
+    custom_date = datetime(2025, 7, 11, 13, 35, 0, tzinfo=ist)
+    formatted = email.utils.format_datetime(custom_date)
+    if 'Date' in msg:
+        msg.replace_header('Date', formatted)
+    else:
+        msg['Date'] = formatted
+    print(f"✓ Date set to: {formatted}")
+
+    # === STRIP INTERNAL HEADERS ===
+    internal_headers = [
+        k for k in msg.keys()
+        if k.lower().startswith('received')
+        or k.lower().startswith('arc')
+        or (k.lower().startswith('x-') and not k.startswith("X-Gm"))
+    ]
+    for k in internal_headers:
+        del msg[k]
+    print(f"✓ Removed {len(internal_headers)} internal headers")
+
+    # === EXTRACT BODY + INLINE IMAGES ===
+    plain_body = None
+    html_body = None
+    inline_images = []
+
+    for part in msg.walk():
+        content_type = part.get_content_type()
+        disposition = part.get_content_disposition()
+        content_id = part.get('Content-ID')
+        charset = part.get_content_charset() or 'utf-8'
+
+        if disposition == 'attachment':
+            continue  # remove all true attachments
+        elif content_type == 'text/plain':
+            plain_body = part.get_payload(decode=True).decode(charset, errors='replace')
+        elif content_type == 'text/html':
+            html_body = part.get_payload(decode=True).decode(charset, errors='replace')
+        elif disposition == 'inline' and content_id:
+            inline_images.append(part)
+
+    if dedupe_inline_images or recompress_images_over:
+        received = len(inline_images)
+        inline_images, html_body = optimize_inline_images(inline_images, html_body)
+        if len(inline_images) < received:
+            print(f"✓ Dropped {received - len(inline_images)} duplicate inline images")
+
+    # === BUILD CLEAN EMAIL STRUCTURE ===
+    clean_msg = MIMEMultipart()
+    for k, v in msg.items():
+        clean_msg[k] = v
+
+    # Build nested MIME: alternative inside related
+    related = MIMEMultipart("related")
+    alt = MIMEMultipart("alternative")
+
+    if plain_body:
+        alt.attach(MIMEText(plain_body, "plain", _charset="utf-8"))
+    if html_body:
+        alt.attach(MIMEText(html_body, "html", _charset="utf-8"))
+    related.attach(alt)
+
+    # Attach inline images
+    for img in inline_images:
+        related.attach(img)
+        print(f"✓ Preserved inline image: {img.get_filename()}")
+
+    clean_msg.attach(related)
+    print("✓ Attached body and inline images")
+
+    # === ADD NEW PDF ATTACHMENT ===
+    if os.path.exists(pdf_path):
+        with open(pdf_path, 'rb') as f:
+            part = MIMEBase('application', 'pdf')
+            part.set_payload(f.read())
+            encoders.encode_base64(part)
+            part.add_header(
+                'Content-Disposition',
+                f'attachment; filename="{os.path.basename(pdf_path)}"'
+            )
+            clean_msg.attach(part)
+        print(f"✓ Attached new PDF: {os.path.basename(pdf_path)}")
+    else:
+        print("✗ PDF not found, skipping attachment")
+
+    # === SAVE FINAL EMAIL ===
+    buf = BytesIO()
+    BytesGenerator(buf, policy=policy.default).flatten(clean_msg)
+    raw = buf.getvalue()
+    with open(output_path, 'wb') as f:
+        f.write(raw)
+
+    print(f"✓ Final email saved to: {output_path}")
+
+    if index_db is not None:
+        index_email(index_db, output_path, clean_msg, raw)
+        print(f"✓ Indexed in: {index_path}")
+
+# === RUN ===
+if recompress_images_over and Image is None:
+    print("✗ Pillow not installed, inline images won't be recompressed")
+
+if batch_input_dir:
+    os.makedirs(batch_output_dir, exist_ok=True)
+    jobs = [(p, os.path.join(batch_output_dir, os.path.basename(p)))
+            for p in sorted(glob.glob(os.path.join(batch_input_dir, "*.eml")))]
 else:
-    print("✗ PDF not found, skipping attachment")
+    jobs = [(input_path, output_path)]
+
+index_db = None
+if index_path:
+    import eml_index  # sibling module; it doesn't import the email package
+    index_db = eml_index.connect(index_path)
 
-# === SAVE FINAL EMAIL ===
-with open(output_path, 'wb') as f:
-    BytesGenerator(f, policy=policy.default).flatten(clean_msg)
+for src, dst in jobs:
+    clean_email(src, dst, index_db)
 
-print(f"✓ Final email saved to: {output_path}")
\ No newline at end of file
+if image_stats["images"]:
+    s = image_stats
+    saved = s["bytes_in"] - s["bytes_out"]
+    print(f"✓ Inline images: {s['images']} in {len(jobs)} emails, {s['duplicates']} duplicates dropped, "
+          f"{s['recompressed']} recompressed ({s['reused']} reused across the batch)")
+    print(f"✓ Image bytes {s['bytes_in']:,} -> {s['bytes_out']:,} "
+          f"(saved {saved:,}, {saved / max(s['bytes_in'], 1):.0%}) in {s['seconds']:.2f}s")
@@ -0,0 +1,157 @@
+# Sidecar index for the .eml files written by email.py.
+#
+# email.py records one row per cleaned message (Message-ID, Date, From, To, Subject)
+# and one row per MIME leaf part, with the byte range of the part's encoded body in
+# the file. Lookups are SQL queries, and extraction seeks straight to the bytes of a
+# single part, without a MIME parse of the whole message.
+#
+#   python eml_index.py attachments/cleaned-index.sqlite find --from alice@ --since 2025-07-01
+#   python eml_index.py attachments/cleaned-index.sqlite parts attachments/cleaned.eml
+#   python eml_index.py attachments/cleaned-index.sqlite extract attachments/cleaned.eml text/html > body.html
+#
+# This module does not import the `email` package, so it can sit next to email.py.
+
+import os
+import sys
+import time
+import base64
+import quopri
+import sqlite3
+import argparse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    message_id TEXT,
+    date TEXT,              -- ISO 8601, UTC
+    sender TEXT,            -- address only, lower case
+    recipients TEXT,        -- comma-separated addresses, lower case
+    subject TEXT,
+    size INTEGER,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS messages_date ON messages (date);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages (sender);
+CREATE INDEX IF NOT EXISTS messages_message_id ON messages (message_id);
+CREATE TABLE IF NOT EXISTS parts (
+    message INTEGER NOT NULL REFERENCES messages (id) ON DELETE CASCADE,
+    part_no INTEGER NOT NULL,
+    content_type TEXT,
+    disposition TEXT,
+    filename TEXT,
+    content_id TEXT,
+    charset TEXT,
+    encoding TEXT,          -- Content-Transfer-Encoding of the stored bytes
+    body_start INTEGER,     -- byte offsets of the encoded body in the .eml
+    body_end INTEGER,
+    PRIMARY KEY (message, part_no)
+);
+"""
+
+def connect(index_path):
+    db = sqlite3.connect(index_path)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA foreign_keys = ON")
+    db.executescript(SCHEMA)
+    return db
+
+def record(db, path, headers, parts):
+    """Replace the index rows for `path`. headers: dict of messages columns; parts: list of parts-column dicts."""
+    path = os.path.abspath(path)
+    with db:
+        db.execute("DELETE FROM messages WHERE path = ?", (path,))
+        cur = db.execute(
+            "INSERT INTO messages (path, message_id, date, sender, recipients, subject, size, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, headers.get("message_id"), headers.get("date"), headers.get("sender"),
+             headers.get("recipients"), headers.get("subject"), os.path.getsize(path), time.time()),
+        )
+        db.executemany(
+            "INSERT INTO parts VALUES (:message, :part_no, :content_type, :disposition, :filename, "
+            ":content_id, :charset, :encoding, :body_start, :body_end)",
+            [{**p, "message": cur.lastrowid, "part_no": i} for i, p in enumerate(parts)],
+        )
+
+# === LOOKUPS ===
+def find(db, sender=None, recipient=None, since=None, until=None, subject=None, message_id=None):
+    """Messages matching every given filter, newest first. sender/recipient/subject match substrings."""
+    where, args = [], []
+    for column, value in (("sender", sender), ("recipients", recipient), ("subject", subject)):
+        if value:
+            where.append(f"{column} LIKE ?")
+            args.append(f"%{value}%")  # LIKE ignores ASCII case
+    if since:
+        where.append("date >= ?")
+        args.append(since)
+    if until:
+        where.append("date < ?")
+        args.append(until)
+    if message_id:
+        where.append("message_id = ?")
+        args.append(message_id)
+    sql = "SELECT * FROM messages" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY date DESC"
+    return db.execute(sql, args).fetchall()
+
+def parts(db, path):
+    return db.execute(
+        "SELECT parts.* FROM parts JOIN messages ON parts.message = messages.id "
+        "WHERE messages.path = ? ORDER BY part_no", (os.path.abspath(path),)
+    ).fetchall()
+
+def read_part(db, path, content_type="text/html", part_no=None):
+    """Decoded body of one part (str for text/*, bytes otherwise), read straight from its byte range."""
+    rows = [p for p in parts(db, path) if (p["part_no"] == part_no if part_no is not None else p["content_type"] == content_type)]
+    if not rows:
+        raise LookupError(f"{path}: no {content_type if part_no is None else f'part {part_no}'} in the index")
+    p = rows[0]
+    with open(path, "rb") as f:
+        f.seek(p["body_start"])
+        raw = f.read(p["body_end"] - p["body_start"])
+    encoding = (p["encoding"] or "7bit").lower()
+    if encoding == "base64":
+        raw = base64.b64decode(raw)
+    elif encoding == "quoted-printable":
+        raw = quopri.decodestring(raw)
+    if p["content_type"].startswith("text/"):
+        return raw.decode(p["charset"] or "utf-8", errors="replace")
+    return raw
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the sidecar index written by email.py.")
+    parser.add_argument("index", help="SQLite index file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    f = sub.add_parser("find", help="list messages")
+    f.add_argument("--from", dest="sender")
+    f.add_argument("--to", dest="recipient")
+    f.add_argument("--since", help="ISO date, e.g. 2025-07-01")
+    f.add_argument("--until")
+    f.add_argument("--subject")
+    f.add_argument("--message-id")
+    p = sub.add_parser("parts", help="list the parts of one message")
+    p.add_argument("path")
+    x = sub.add_parser("extract", help="write one part's decoded body to stdout")
+    x.add_argument("path")
+    x.add_argument("content_type", nargs="?", default="text/html")
+    x.add_argument("--part", type=int, help="part number instead of content type")
+    args = parser.parse_args(argv)
+
+    db = connect(args.index)
+    if args.command == "find":
+        for m in find(db, args.sender, args.recipient, args.since, args.until, args.subject, args.message_id):
+            print(f"{m['date'] or '-':25}  {m['sender'] or '-':30}  {m['subject'] or ''}  [{m['path']}]")
+    elif args.command == "parts":
+        for p in parts(db, args.path):
+            size = p["body_end"] - p["body_start"]
+            print(f"{p['part_no']:3}  {p['content_type']:28} {p['disposition'] or '-':10} {size:>10,} B  "
+                  f"{p['filename'] or p['content_id'] or ''}")
+    else:
+        body = read_part(db, args.path, args.content_type, args.part)
+        if isinstance(body, str):
+            sys.stdout.write(body)
+        else:
+            sys.stdout.buffer.write(body)
+
+if __name__ == "__main__":
+    sys.exit(main())
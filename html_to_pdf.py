@@ -8,17 +8,32 @@ Uses playwright for headless browser rendering with proper styling.
 
 Requirements:
 pip install playwright weasyprint
+pip install pypdf               # only for --sections
 playwright install chromium
 
 Usage:
 python html_to_pdf.py
+python html_to_pdf.py --sections    # one render per chart section, merged
+
+Sectioned mode renders each chart section as its own document, PDF_SECTION_WORKERS
+(default 4) at a time on a pool of browser pages, so a slow chart holds up only its
+own section and the browser only ever holds that many sections in memory. The
+section PDFs are then merged into one file, and the footer page numbers are
+stamped on afterwards so they count across the whole report. The merge reads one
+section PDF at a time, but pypdf keeps the merged pages in memory until it writes
+the file, so merging needs memory on the order of the finished PDF.
 """
 
 import asyncio
+from html.parser import HTMLParser
 from playwright.async_api import async_playwright
 import os
+import sys
+import tempfile
 from pathlib import Path
 
+SECTION_WORKERS = int(os.environ.get("PDF_SECTION_WORKERS", "4"))
+
 # Your HTML content (copy the full HTML from the artifact)
 HTML_CONTENT = '''
 <!DOCTYPE html>
@@ -419,6 +434,19 @@ HTML_CONTENT = '''
 </html>
 '''
 
+PDF_OPTIONS = dict(
+    format='A4',
+    print_background=True,
+    margin={
+        'top': '0.5in',
+        'bottom': '0.7in',
+        'left': '0.5in',
+        'right': '0.5in'
+    },
+    prefer_css_page_size=True,
+)
+FOOTER_TEMPLATE = '<div style="font-size:10px; margin:auto; color:#718096;"><span class="pageNumber"></span> / <span class="totalPages"></span></div>'
+
 async def create_pdf_with_playwright():
     """Create PDF using Playwright (recommended for complex layouts)"""
     
@@ -441,18 +469,10 @@ async def create_pdf_with_playwright():
         pdf_path = "AI_Customer_Service_Architecture.pdf"
         await page.pdf(
             path=pdf_path,
-            format='A4',
-            print_background=True,
-            margin={
-                'top': '0.5in',
-                'bottom': '0.7in',
-                'left': '0.5in',
-                'right': '0.5in'
-            },
-            prefer_css_page_size=True,
+            **PDF_OPTIONS,
             display_header_footer=True,
             header_template='<div></div>',  # Empty header
-            footer_template='<div style="font-size:10px; margin:auto; color:#718096;"><span class="pageNumber"></span> / <span class="totalPages"></span></div>'
+            footer_template=FOOTER_TEMPLATE
         )
         
         await browser.close()
@@ -463,6 +483,178 @@ async def create_pdf_with_playwright():
         print(f"✅ PDF successfully created: {pdf_path}")
         return pdf_path
 
+# ----------------- sectioned rendering -----------------
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# The chart script looks up every canvas by id; in a section document the other
+# sections' charts draw into detached canvases instead of failing on null.
+SECTION_PRELUDE = """<script>
+    const byId = document.getElementById.bind(document);
+    document.getElementById = id => byId(id) || document.createElement('canvas');
+</script>
+"""
+
+class _Blocks(HTMLParser):
+    """Offsets of the direct children of the first `.container` element, and whether each holds a <canvas>."""
+
+    def __init__(self, html):
+        super().__init__()
+        self.html = html
+        self.line_starts = [0]
+        for line in html.split("\n"):
+            self.line_starts.append(self.line_starts[-1] + len(line) + 1)
+        self.inner = None   # [start, end] of the container's content
+        self.blocks = []    # [start, end, has_canvas] per child element
+        self.depth = 0      # open elements inside the container
+        self.feed(html)
+        self.close()
+
+    def position(self):
+        line, col = self.getpos()
+        return self.line_starts[line - 1] + col
+
+    def handle_starttag(self, tag, attrs):
+        self.element(tag, attrs, tag in VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):  # <br/>, <div/>: nothing to close later
+        self.element(tag, attrs, True)
+
+    def element(self, tag, attrs, void):
+        if self.inner is None:
+            if "container" in (dict(attrs).get("class") or "").split():
+                self.inner = [self.position() + len(self.get_starttag_text()), None]
+            return
+        if self.inner[1] is not None:
+            return
+        if self.depth == 0:
+            self.blocks.append([self.position(), None, False])
+        if tag == "canvas":
+            self.blocks[-1][2] = True
+        if not void:
+            self.depth += 1
+        elif self.depth == 0:
+            self.blocks[-1][1] = self.position() + len(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if self.inner is None or self.inner[1] is not None or tag in VOID_TAGS:
+            return
+        if self.depth == 0:  # the container itself closes
+            self.inner[1] = self.position()
+            return
+        self.depth -= 1
+        if self.depth == 0:
+            self.blocks[-1][1] = self.html.index(">", self.position()) + 1
+
+def chart_sections(html):
+    """Split `html` into standalone documents, one per chart section.
+
+    A section is a child of `.container` that holds a <canvas>, plus the chart-less
+    children just before it (the last section also takes those after it). Each
+    document is the whole page with the container holding only that section.
+    """
+    blocks = _Blocks(html)
+    if blocks.inner is None or blocks.inner[1] is None or not blocks.blocks:
+        return [html]
+    groups, pending = [], []
+    for start, end, has_canvas in blocks.blocks:
+        pending.append(html[start:end])
+        if has_canvas:
+            groups.append(pending)
+            pending = []
+    if groups:
+        groups[-1] += pending
+    else:
+        groups = [pending]
+    head_end = html.find("</head>")
+    before = html[:head_end] + SECTION_PRELUDE + html[head_end:blocks.inner[0]] if head_end != -1 else html[:blocks.inner[0]]
+    after = html[blocks.inner[1]:]
+    return [before + "\n" + "\n\n".join(group) + "\n" + after for group in groups]
+
+def footer_document(n_pages):
+    """n_pages empty pages: printed with FOOTER_TEMPLATE, they carry the page numbers of the merged report."""
+    pages = ['<div style="height:1px; break-after:page"></div>'] * (n_pages - 1) + ['<div style="height:1px"></div>']
+    return '<html><body style="margin:0">' + ''.join(pages) + '</body></html>'
+
+async def render_sections(documents, out_dir, workers=SECTION_WORKERS):
+    """Render each document to its own PDF in out_dir, `workers` at a time -> (section paths, footer path)."""
+    from pypdf import PdfReader
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        pages = asyncio.Queue()
+        for _ in range(max(1, min(workers, len(documents)))):
+            pages.put_nowait(await browser.new_page())
+
+        async def render(i, document):
+            page = await pages.get()
+            try:
+                await page.set_content(document, wait_until='networkidle')
+                path = out_dir / f"section-{i:04d}.pdf"
+                await page.pdf(path=str(path), **PDF_OPTIONS)
+                await page.goto('about:blank')  # let go of this section's DOM and charts
+                print(f"   section {i + 1}/{len(documents)} rendered")
+                return path
+            finally:
+                pages.put_nowait(page)
+
+        paths = await asyncio.gather(*(render(i, d) for i, d in enumerate(documents)))
+
+        # Page numbers: one blank, transparent page per report page, printed with the footer
+        total_pages = 0
+        for path in paths:
+            with PdfReader(path) as section:
+                total_pages += len(section.pages)
+        page = await pages.get()
+        await page.set_content(footer_document(total_pages))
+        footer_path = out_dir / "footer.pdf"
+        await page.pdf(
+            path=str(footer_path),
+            **{**PDF_OPTIONS, 'print_background': False},
+            display_header_footer=True,
+            header_template='<div></div>',
+            footer_template=FOOTER_TEMPLATE
+        )
+        await browser.close()
+    return paths, footer_path
+
+def merge_sections(section_paths, footer_path, pdf_path):
+    """Concatenate the section PDFs into pdf_path, stamping footer page n onto report page n.
+
+    Only one section PDF is open at a time; the writer holds the merged pages
+    (about the size of the output) until pdf_path is written.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    n_pages = 0
+    with PdfReader(footer_path) as footer_pdf:
+        footers = footer_pdf.pages
+        for path in section_paths:
+            with PdfReader(path) as section:  # add_page copies the page into the writer
+                for page in section.pages:
+                    if n_pages < len(footers):
+                        page.merge_page(footers[n_pages])
+                    writer.add_page(page)
+                    n_pages += 1
+        if len(footers) != n_pages:
+            raise RuntimeError(f"footer has {len(footers)} pages, the sections {n_pages}")
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+    return n_pages
+
+async def create_sectioned_pdf_with_playwright(workers=SECTION_WORKERS):
+    """Create the PDF one chart section at a time (see the module docstring)"""
+    documents = chart_sections(HTML_CONTENT)
+    print(f"📑 {len(documents)} sections, {min(workers, len(documents))} at a time")
+
+    pdf_path = "AI_Customer_Service_Architecture.pdf"
+    with tempfile.TemporaryDirectory() as tmp:
+        section_paths, footer_path = await render_sections(documents, Path(tmp), workers)
+        n_pages = merge_sections(section_paths, footer_path, pdf_path)
+
+    print(f"✅ PDF successfully created: {pdf_path} ({n_pages} pages)")
+    return pdf_path
+
 def create_pdf_with_weasyprint():
     """Alternative method using WeasyPrint"""
     try:
@@ -518,7 +710,10 @@ if __name__ == "__main__":
     
     # Method 1: Playwright (recommended)
     try:
-        pdf_path = asyncio.run(create_pdf_with_playwright())
+        if "--sections" in sys.argv:
+            pdf_path = asyncio.run(create_sectioned_pdf_with_playwright())
+        else:
+            pdf_path = asyncio.run(create_pdf_with_playwright())
         print(f"📄 High-quality PDF created: {pdf_path}")
     except Exception as e:
         print(f"❌ Playwright method failed: {e}")
@@ -1,5 +1,8 @@
+import sys
+from contextlib import nullcontext
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from llm_clients import get_chat_model  # shared, pooled ChatOpenAI
+from llm_cache import skip_cache, cache_stats
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
@@ -8,12 +11,17 @@ load_dotenv()
 # Simple one-line prompt
 prompt = PromptTemplate.from_template("{question}")
 
-model = ChatOpenAI()
+model = get_chat_model(temperature=0)  # deterministic, so repeat runs are answered from the response cache
 parser = StrOutputParser()
 
 # Chain: prompt → model → parser
 chain = prompt | model | parser
 
 # Run it
-result = chain.invoke({"question": "What is the capital of Greenland?"})
-print(result)
+# python 1_simple_llm_call.py              cached after the first run
+# python 1_simple_llm_call.py --no-cache   always asks the API
+if __name__ == "__main__":
+    with skip_cache() if "--no-cache" in sys.argv else nullcontext():
+        result = chain.invoke({"question": "What is the capital of Greenland?"})
+    print(result)
+    print(cache_stats())
@@ -1,8 +1,11 @@
-from langchain_openai import ChatOpenAI
+from llm_clients import get_chat_model  # shared, pooled ChatOpenAI
 from dotenv import load_dotenv
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 import os
+import sys
+
+from streaming_chain import WINDOW_PROMPT, stream_windowed, print_token
 
 load_dotenv()
 
@@ -18,13 +21,19 @@ prompt2 = PromptTemplate(
     input_variables=['text']
 )
 
-model1 = ChatOpenAI(model='gpt-4o-mini', temperature=0.7)
-model2 = ChatOpenAI(model='gpt-4o', temperature=0.5)
+model1 = get_chat_model('gpt-4o-mini', temperature=0.7)
+model2 = get_chat_model('gpt-4o', temperature=0.5)
 
 parser = StrOutputParser()
 
 chain = prompt1 | model1 | parser | prompt2 | model2 | parser
 
+# Streaming mode: report tokens are shown as they arrive and summarized window by
+# window while stage 1 is still writing (see streaming_chain.py)
+report_chain = prompt1 | model1 | parser
+summary_chain = prompt2 | model2 | parser  # also condenses the window bullets to 5 points
+window_chain = WINDOW_PROMPT | model2 | parser
+
 config = {
     'run_name': 'Sequential Chain',
     'tags' : ['report', 'summary'],
@@ -35,6 +44,18 @@ config = {
     }
 }
 
-result = chain.invoke({'topic': 'Observability and LangSmith'}, config=config)
-
-print(result)
+# python 2_sequential_chain.py            one chain, result printed at the end
+# python 2_sequential_chain.py --stream   streamed report, windowed summary (+ --merge for 5 points)
+if __name__ == '__main__':
+    if '--stream' in sys.argv:
+        result = stream_windowed(
+            report_chain, window_chain, {'topic': 'Observability and LangSmith'},
+            merge_chain=summary_chain if '--merge' in sys.argv else None,
+            on_token=print_token, config=config,
+        )
+        print('\n\n=== Summary ===\n' + result['summary'])
+        print({k: round(v, 2) for k, v in result['timings'].items()})
+    else:
+        result = chain.invoke({'topic': 'Observability and LangSmith'}, config=config)
+
+        print(result)
@@ -4,11 +4,12 @@ import os
 from dotenv import load_dotenv
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from llm_clients import get_chat_model, get_embeddings  # shared, pooled ChatOpenAI; LLM_BACKEND=fake for offline runs
 from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
+from streaming_chain import stream_answer, format_timings
 
 load_dotenv()  # expects OPENAI_API_KEY in .env
 
@@ -25,7 +26,7 @@ splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
 splits = splitter.split_documents(docs)
 
 # 3) Embed + index
-emb = OpenAIEmbeddings(model="text-embedding-3-small")
+emb = get_embeddings("text-embedding-3-small")
 vs = FAISS.from_documents(splits, emb)
 retriever = vs.as_retriever(search_type="similarity", search_kwargs={"k": 4})
 
@@ -36,7 +37,7 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 # 5) Chain
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = get_chat_model("gpt-4o-mini", temperature=0)
 def format_docs(docs): return "\n\n".join(d.page_content for d in docs)
 
 parallel = RunnableParallel({
@@ -49,5 +50,6 @@ chain = parallel | prompt | llm | StrOutputParser()
 # 6) Ask questions
 print("PDF RAG ready. Ask a question (or Ctrl+C to exit).")
 q = input("\nQ: ")
-ans = chain.invoke(q.strip(), config={'run_name': 'RAG v1', 'tags': ['rag', 'pdf'], 'metadata': {'source': 'langchain', 'model': 'gpt-4o-mini'}})
-print("\nA:", ans)
+print("\nA: ", end="", flush=True)  # tokens are printed as they arrive
+result = stream_answer(chain, q.strip(), config={'run_name': 'RAG v1', 'tags': ['rag', 'pdf'], 'metadata': {'source': 'langchain', 'model': 'gpt-4o-mini'}})
+print("\n\n" + format_timings(result["timings"]))
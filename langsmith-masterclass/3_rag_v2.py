@@ -3,15 +3,16 @@
 import os
 from dotenv import load_dotenv
 
-from langsmith import traceable  # <-- key import
+from tracing import traceable  # <-- key import (sampled drop-in for langsmith.traceable)
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from llm_clients import get_chat_model, get_embeddings  # shared, pooled ChatOpenAI; LLM_BACKEND=fake for offline runs
 from langchain_community.vectorstores import FAISS
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
+from streaming_chain import stream_answer, format_timings
 
 # --- LangSmith env (make sure these are set) ---
 # LANGCHAIN_TRACING_V2=true
@@ -37,7 +38,7 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=150):
 
 @traceable(name="build_vectorstore")
 def build_vectorstore(splits):
-    emb = OpenAIEmbeddings(model="text-embedding-3-small")
+    emb = get_embeddings("text-embedding-3-small")
     # FAISS.from_documents internally calls the embedding model:
     vs = FAISS.from_documents(splits, emb)
     return vs
@@ -51,7 +52,7 @@ def setup_pipeline(pdf_path: str):
     return vs
 
 # ---------- pipeline ----------
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+llm = get_chat_model("gpt-4o-mini", temperature=0)
 
 prompt = ChatPromptTemplate.from_messages([
     ("system", "Answer ONLY from the provided context. If not found, say you don't know."),
@@ -81,5 +82,6 @@ config = {
     "run_name": "pdf_rag_query"
 }
 
-ans = chain.invoke(q, config=config)
-print("\nA:", ans)
+print("\nA: ", end="", flush=True)  # tokens are printed as they arrive
+result = stream_answer(chain, q, config=config)
+print("\n\n" + format_timings(result["timings"]))
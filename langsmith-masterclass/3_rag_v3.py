@@ -1,17 +1,14 @@
 # pip install -U langchain langchain-openai langchain-community faiss-cpu pypdf python-dotenv langsmith
 
 import os
+import time
+from functools import lru_cache
 from dotenv import load_dotenv
 
-from langsmith import traceable
+from tracing import traceable  # sampled drop-in for langsmith.traceable
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import FAISS
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
-from langchain_core.output_parsers import StrOutputParser
+# Heavy modules are imported inside the functions that use them so the CLI
+# prompt appears without waiting on pypdf / FAISS / langchain_openai.
 
 load_dotenv()
 
@@ -20,11 +17,13 @@ PDF_PATH = "islr.pdf"  # <- change to your file
 # ----------------- helpers (not traced individually) -----------------
 @traceable(name="load_pdf")
 def load_pdf(path: str):
+    from langchain_community.document_loaders import PyPDFLoader
     loader = PyPDFLoader(path)
     return loader.load()  # list[Document]
 
 @traceable(name="split_documents")
 def split_documents(docs, chunk_size=1000, chunk_overlap=150):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
@@ -32,7 +31,9 @@ def split_documents(docs, chunk_size=1000, chunk_overlap=150):
 
 @traceable(name="build_vectorstore")
 def build_vectorstore(splits):
-    emb = OpenAIEmbeddings(model="text-embedding-3-small")
+    from llm_clients import get_embeddings
+    from langchain_community.vectorstores import FAISS
+    emb = get_embeddings("text-embedding-3-small")
     return FAISS.from_documents(splits, emb)
 
 # ----------------- parent setup function (traced) -----------------
@@ -45,20 +46,27 @@ def setup_pipeline(pdf_path: str, chunk_size=1000, chunk_overlap=150):
     return vs
 
 # ----------------- model, prompt, and run -----------------
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-
-prompt = ChatPromptTemplate.from_messages([
-    ("system", "Answer ONLY from the provided context. If not found, say you don't know."),
-    ("human", "Question: {question}\n\nContext:\n{context}")
-])
+@lru_cache(maxsize=None)
+def get_llm():
+    from llm_clients import get_chat_model  # shared, pooled ChatOpenAI
+    return get_chat_model("gpt-4o-mini", temperature=0)
+
+@lru_cache(maxsize=None)
+def get_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ("system", "Answer ONLY from the provided context. If not found, say you don't know."),
+        ("human", "Question: {question}\n\nContext:\n{context}")
+    ])
 
 def format_docs(docs):
     return "\n\n".join(d.page_content for d in docs)
 
-# ----------------- one top-level (root) run -----------------
-@traceable(name="pdf_rag_full_run")
-def setup_pipeline_and_query(pdf_path: str, question: str):
-    # Parent setup run (child of root)
+def build_pipeline_chain(pdf_path: str):
+    from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
+    from langchain_core.output_parsers import StrOutputParser
+
+    # Parent setup run (child of the root run that calls this)
     vectorstore = setup_pipeline(pdf_path, chunk_size=1000, chunk_overlap=150)
 
     retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 4})
@@ -68,15 +76,31 @@ def setup_pipeline_and_query(pdf_path: str, question: str):
         "question": RunnablePassthrough(),
     })
 
-    chain = parallel | prompt | llm | StrOutputParser()
+    return parallel | get_prompt() | get_llm() | StrOutputParser()
 
+# ----------------- one top-level (root) run -----------------
+@traceable(name="pdf_rag_full_run")
+def setup_pipeline_and_query(pdf_path: str, question: str):
+    chain = build_pipeline_chain(pdf_path)
     # This LangChain run stays under the same root (since we're inside this traced function)
     lc_config = {"run_name": "pdf_rag_query"}
     return chain.invoke(question, config=lc_config)
 
+@traceable(name="pdf_rag_full_run")
+def setup_pipeline_and_stream(pdf_path: str, question: str, on_token=None) -> dict:
+    """setup_pipeline_and_query, streaming the answer to on_token -> {"answer", "timings"}."""
+    from streaming_chain import stream_answer
+
+    started = time.perf_counter()  # timings include the index load and retrieval
+    chain = build_pipeline_chain(pdf_path)
+    return stream_answer(chain, question, config={"run_name": "pdf_rag_query"}, on_token=on_token, started=started)
+
 # ----------------- CLI -----------------
 if __name__ == "__main__":
+    from streaming_chain import print_token, format_timings
+
     print("PDF RAG ready. Ask a question (or Ctrl+C to exit).")
     q = input("\nQ: ").strip()
-    ans = setup_pipeline_and_query(PDF_PATH, q)
-    print("\nA:", ans)
+    print("\nA: ", end="", flush=True)  # tokens are printed as they arrive
+    result = setup_pipeline_and_stream(PDF_PATH, q, on_token=print_token)
+    print("\n\n" + format_timings(result["timings"]))
@@ -1,42 +1,58 @@
 # pip install -U langchain langchain-openai langchain-community faiss-cpu pypdf python-dotenv langsmith
 
 import os
+import sys
 import json
+import time
+import heapq
 import hashlib
+import threading
+from functools import lru_cache
+from itertools import chain as iter_chain
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
-from langsmith import traceable
+from tracing import traceable  # sampled drop-in for langsmith.traceable
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import FAISS
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
-from langchain_core.output_parsers import StrOutputParser
+import index_store
+import rag_metrics
+
+# Heavy modules (pypdf, FAISS, langchain_openai, ...) are imported inside the
+# functions that need them: a cache-hit startup never loads pypdf or the text
+# splitter, and nothing touches FAISS until an index is actually loaded.
+# `python bench_startup.py` tracks the import cost against a budget.
 
 load_dotenv()
 
 PDF_PATH = "islr.pdf"  # change to your file
 INDEX_ROOT = Path(".indices")
 INDEX_ROOT.mkdir(exist_ok=True)
+CORPUS_REGISTRY = INDEX_ROOT / "registry.json"  # document -> index map (corpus shards + warm-start snapshot)
+INDEX_FORMAT = "v2"  # chunk_store.FORMAT; not imported here because chunk_store loads FAISS
 
 # ----------------- helpers (traced) -----------------
 @traceable(name="load_pdf")
+@rag_metrics.instrument("load_pdf", count=lambda docs: {"pages": len(docs)})
 def load_pdf(path: str):
+    from langchain_community.document_loaders import PyPDFLoader
     return PyPDFLoader(path).load()  # list[Document]
 
 @traceable(name="split_documents")
+@rag_metrics.instrument("split_documents", count=lambda splits: {"chunks": len(splits)})
 def split_documents(docs, chunk_size=1000, chunk_overlap=150):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
     return splitter.split_documents(docs)
 
 @traceable(name="build_vectorstore")
+@rag_metrics.instrument("build_vectorstore", count=lambda vs: {"vectors": vs.index.ntotal})
 def build_vectorstore(splits, embed_model_name: str):
-    emb = OpenAIEmbeddings(model=embed_model_name)
+    from llm_clients import get_embeddings
+    from langchain_community.vectorstores import FAISS
+    emb = get_embeddings(embed_model_name)
     return FAISS.from_documents(splits, emb)
 
 # ----------------- cache key / fingerprint -----------------
@@ -48,42 +64,65 @@ def _file_fingerprint(path: str) -> dict:
             h.update(chunk)
     return {"sha256": h.hexdigest(), "size": p.stat().st_size, "mtime": int(p.stat().st_mtime)}
 
+def _embedding_id(embed_model_name: str) -> str:
+    from llm_clients import embedding_id  # LLM_BACKEND=fake vectors get their own keys
+    return embedding_id(embed_model_name)
+
 def _index_key(pdf_path: str, chunk_size: int, chunk_overlap: int, embed_model_name: str) -> str:
     meta = {
         "pdf_fingerprint": _file_fingerprint(pdf_path),
         "chunk_size": chunk_size,
         "chunk_overlap": chunk_overlap,
-        "embedding_model": embed_model_name,
-        "format": "v1",
+        "embedding_model": _embedding_id(embed_model_name),
+        "format": INDEX_FORMAT,
     }
     return hashlib.sha256(json.dumps(meta, sort_keys=True).encode("utf-8")).hexdigest()
 
 # ----------------- explicitly traced load/build runs -----------------
 @traceable(name="load_index", tags=["index"])
+@rag_metrics.instrument("load_index_run", count=lambda vs: {"vectors": vs.index.ntotal})
 def load_index_run(index_dir: Path, embed_model_name: str):
-    emb = OpenAIEmbeddings(model=embed_model_name)
-    return FAISS.load_local(
-        str(index_dir),
-        emb,
-        allow_dangerous_deserialization=True
-    )
+    import chunk_store
+    from llm_clients import get_embeddings
+    emb = get_embeddings(embed_model_name)
+    vs = chunk_store.load(index_dir, emb)  # no pickle; chunk text is decoded per search hit
+    index_store.touch(index_dir)    # LRU bookkeeping in meta.json
+    index_store.acquire(index_dir)  # never evicted while this process uses it
+    return vs
 
-@traceable(name="build_index", tags=["index"])
-def build_index_run(pdf_path: str, index_dir: Path, chunk_size: int, chunk_overlap: int, embed_model_name: str):
+def write_index(pdf_path: str, out_dir: Path, chunk_size: int = 1000, chunk_overlap: int = 150, embed_model_name: str = "text-embedding-3-small"):
+    """Load, split, embed and save one PDF's index into out_dir (also run by background builds)."""
     docs = load_pdf(pdf_path)  # child
     splits = split_documents(docs, chunk_size=chunk_size, chunk_overlap=chunk_overlap)  # child
     vs = build_vectorstore(splits, embed_model_name)  # child
-    index_dir.mkdir(parents=True, exist_ok=True)
-    vs.save_local(str(index_dir))
-    (index_dir / "meta.json").write_text(json.dumps({
+    import chunk_store
+    chunk_store.save(vs, out_dir)
+    (out_dir / "meta.json").write_text(json.dumps({
         "pdf_path": os.path.abspath(pdf_path),
         "chunk_size": chunk_size,
         "chunk_overlap": chunk_overlap,
-        "embedding_model": embed_model_name,
+        "embedding_model": _embedding_id(embed_model_name),
+        "format": INDEX_FORMAT,
     }, indent=2))
     return vs
 
+@traceable(name="build_index", tags=["index"])
+def build_index_run(pdf_path: str, index_dir: Path, chunk_size: int, chunk_overlap: int, embed_model_name: str):
+    staging = index_store.staging_dir(index_dir.parent, index_dir.name)  # never a half-written index_dir
+    try:
+        vs = write_index(pdf_path, staging, chunk_size, chunk_overlap, embed_model_name)
+        index_store.publish(staging, index_dir)
+    except BaseException:
+        import shutil
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    index_store.record_build(index_dir)
+    index_store.acquire(index_dir)
+    return vs
+
 # ----------------- dispatcher (not traced) -----------------
+_registry_lock = threading.Lock()  # registry.json is also written from background build callbacks
+
 def load_or_build_index(
     pdf_path: str,
     chunk_size: int = 1000,
@@ -91,25 +130,261 @@ def load_or_build_index(
     embed_model_name: str = "text-embedding-3-small",
     force_rebuild: bool = False,
 ):
-    key = _index_key(pdf_path, chunk_size, chunk_overlap, embed_model_name)
+    pdf_path = os.path.abspath(pdf_path)
+    with _registry_lock:
+        registry = _load_registry()
+    key = _cached_index_key(registry, pdf_path, chunk_size, chunk_overlap, embed_model_name)
     index_dir = INDEX_ROOT / key
     cache_hit = index_dir.exists() and not force_rebuild
     if cache_hit:
-        return load_index_run(index_dir, embed_model_name)
+        vs = load_index_run(index_dir, embed_model_name)
     else:
-        return build_index_run(pdf_path, index_dir, chunk_size, chunk_overlap, embed_model_name)
+        vs = build_index_run(pdf_path, index_dir, chunk_size, chunk_overlap, embed_model_name)
+    with _registry_lock:
+        registry = _load_registry()  # re-read: a background build may have recorded a shard meanwhile
+        _remember_shard(registry, pdf_path, key, chunk_size, chunk_overlap, embed_model_name, vs.index.ntotal)
+        _save_registry(registry)
+    index_store.enforce_budget(INDEX_ROOT, protect=[index_dir])
+    return vs
+
+# ----------------- background builds + live swap -----------------
+# For the long-lived --watch loop. serve_index() doesn't make queries wait for a
+# rebuild of a changed PDF when an earlier index of it exists: the new one is built
+# in a worker process (index_builder.py) and swapped into the LiveIndex when
+# published. A PDF with no index, or force_rebuild, is built in the foreground.
+# One-shot callers (setup_pipeline, setup_pipeline_and_query) always build in the
+# foreground, so they never answer from a stale index.
+_indexer = None
+
+def background_indexer():
+    global _indexer
+    if _indexer is None:
+        from index_builder import BackgroundIndexer
+        _indexer = BackgroundIndexer(script="3_rag_v4.py")
+    return _indexer
+
+class LiveIndex:
+    """The vectorstore queries read; swapped whole when a background build is published."""
+
+    def __init__(self, vs, index_dir: Path):
+        self.vs = vs
+        self.index_dir = index_dir
+        self.swaps = 0
+        self._lock = threading.Lock()
+
+    def swap(self, vs, index_dir: Path):
+        with self._lock:
+            old_dir, self.vs, self.index_dir = self.index_dir, vs, index_dir
+            self.swaps += 1
+        if old_dir != index_dir:
+            index_store.release(old_dir)  # evictable again
+
+    def as_retriever(self, k: int = 4):
+        from langchain_core.retrievers import BaseRetriever
+
+        live = self
+
+        class LiveRetriever(BaseRetriever):
+            def _get_relevant_documents(self, query, *, run_manager=None):
+                return live.vs.similarity_search(query, k=k)  # whichever index is current
+
+        return LiveRetriever()
+
+def _previous_index(registry: dict, pdf_path: str, chunk_size: int, chunk_overlap: int, embed_model_name: str):
+    """Index of an earlier version of this PDF with the same settings, if still on disk."""
+    entry = registry.get("shards", {}).get(pdf_path, {})
+    same_settings = (
+        entry.get("chunk_size") == chunk_size
+        and entry.get("chunk_overlap") == chunk_overlap
+        and entry.get("embedding_model") == _embedding_id(embed_model_name)
+        and entry.get("format") == INDEX_FORMAT
+    )
+    index_dir = INDEX_ROOT / entry.get("key", "")
+    return index_dir if same_settings and entry.get("key") and index_dir.is_dir() else None
+
+@traceable(name="serve_index", tags=["setup"])
+def serve_index(
+    pdf_path: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    embed_model_name: str = "text-embedding-3-small",
+    force_rebuild: bool = False,
+    watch: bool = False,
+) -> LiveIndex:
+    """A LiveIndex for pdf_path; rebuilds for a changed PDF (stale, or on file change with watch=True) run in the background."""
+    pdf_path = os.path.abspath(pdf_path)
+    opts = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "embed_model_name": embed_model_name}
+    with _registry_lock:
+        registry = _load_registry()
+    key = _cached_index_key(registry, pdf_path, chunk_size, chunk_overlap, embed_model_name)
+    current = INDEX_ROOT / key if (INDEX_ROOT / key).is_dir() else _previous_index(registry, pdf_path, **opts)
+    if current is None or force_rebuild:  # nothing to answer from yet, or asked for a fresh index
+        live = LiveIndex(load_or_build_index(pdf_path, **opts, force_rebuild=force_rebuild), INDEX_ROOT / key)
+    else:
+        live = LiveIndex(load_index_run(current, embed_model_name), current)
+
+    def ready(index_dir: Path):
+        vs = load_index_run(index_dir, embed_model_name)
+        live.swap(vs, index_dir)
+        with _registry_lock:
+            registry = _load_registry()
+            _remember_shard(registry, pdf_path, index_dir.name, chunk_size, chunk_overlap, embed_model_name, vs.index.ntotal)
+            _save_registry(registry)
+        index_store.enforce_budget(INDEX_ROOT, protect=[index_dir])
+
+    def rebuild(path: str, force: bool = False, key: str = None):
+        key = key or _index_key(path, chunk_size, chunk_overlap, embed_model_name)  # content changed: re-hash
+        if force or not (INDEX_ROOT / key).is_dir():
+            background_indexer().submit(path, INDEX_ROOT / key, opts, on_ready=ready)
+        elif live.index_dir.name != key:
+            ready(INDEX_ROOT / key)  # e.g. the file was reverted to a version we already have
+
+    if live.index_dir.name != key:
+        rebuild(pdf_path, key=key)
+    if watch:
+        background_indexer().watch([pdf_path], on_change=rebuild)
+    return live
+
+# ----------------- registry: document -> index snapshot -----------------
+# Doubles as the warm-start snapshot for single-PDF mode: on a restart with an
+# unchanged PDF the key comes from here instead of re-hashing the whole file.
+def _load_registry() -> dict:
+    if CORPUS_REGISTRY.exists():
+        return json.loads(CORPUS_REGISTRY.read_text())
+    return {"shards": {}}
+
+def _save_registry(registry: dict):
+    # write-then-rename so a crash never leaves a truncated registry behind
+    tmp = CORPUS_REGISTRY.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(registry, indent=2, sort_keys=True))
+    os.replace(tmp, CORPUS_REGISTRY)
+
+def _registry_entry_is_fresh(entry: dict, pdf_path: str, chunk_size: int, chunk_overlap: int, embed_model_name: str) -> bool:
+    # size + mtime + config match -> trust the stored key without re-hashing the PDF
+    st = Path(pdf_path).stat()
+    return (
+        entry.get("size") == st.st_size
+        and entry.get("mtime") == int(st.st_mtime)
+        and entry.get("chunk_size") == chunk_size
+        and entry.get("chunk_overlap") == chunk_overlap
+        and entry.get("embedding_model") == _embedding_id(embed_model_name)
+        and entry.get("format") == INDEX_FORMAT
+        and (INDEX_ROOT / entry.get("key", "")).is_dir()
+    )
+
+def _cached_index_key(registry: dict, pdf_path: str, chunk_size: int, chunk_overlap: int, embed_model_name: str) -> str:
+    entry = registry.get("shards", {}).get(pdf_path, {})
+    if _registry_entry_is_fresh(entry, pdf_path, chunk_size, chunk_overlap, embed_model_name):
+        return entry["key"]
+    return _index_key(pdf_path, chunk_size, chunk_overlap, embed_model_name)
+
+def _remember_shard(registry: dict, pdf_path: str, key: str, chunk_size: int, chunk_overlap: int, embed_model_name: str, n_vectors: int):
+    st = Path(pdf_path).stat()
+    registry.setdefault("shards", {})[pdf_path] = {
+        "key": key,
+        "size": st.st_size,
+        "mtime": int(st.st_mtime),
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedding_model": _embedding_id(embed_model_name),
+        "n_vectors": n_vectors,
+        "format": INDEX_FORMAT,
+    }
+
+# ----------------- corpus mode: one shard per document -----------------
+def list_corpus_pdfs(corpus_dir: str) -> list:
+    return sorted(str(p.resolve()) for p in Path(corpus_dir).rglob("*.pdf"))
+
+@traceable(name="load_or_build_corpus", tags=["index", "corpus"])
+def load_or_build_corpus(
+    pdf_paths: list,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    embed_model_name: str = "text-embedding-3-small",
+    max_workers: int = 4,
+    corpus_dir: str = None,
+):
+    """Return one vectorstore per PDF, building only the shards that are missing or stale.
+
+    PDFs with identical content share a key and get the same vectorstore. With
+    corpus_dir, registry entries under it for PDFs no longer in pdf_paths are dropped.
+    """
+    with _registry_lock:
+        registry = _load_registry()
+
+    keys = {p: _cached_index_key(registry, p, chunk_size, chunk_overlap, embed_model_name) for p in pdf_paths}
+    sources = {}  # key -> one PDF to build it from; duplicates share the store
+    for pdf_path, key in keys.items():
+        sources.setdefault(key, pdf_path)
+    to_load = [key for key in sources if (INDEX_ROOT / key).is_dir()]
+    to_build = [key for key in sources if key not in to_load]
+
+    def _build(key):
+        return build_index_run(sources[key], INDEX_ROOT / key, chunk_size, chunk_overlap, embed_model_name)
+
+    def _load(key):
+        return load_index_run(INDEX_ROOT / key, embed_model_name)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        stores = dict(zip(to_build, pool.map(_build, to_build)))
+        stores.update(zip(to_load, pool.map(_load, to_load)))
+
+    with _registry_lock:
+        registry = _load_registry()
+        for pdf_path, key in keys.items():
+            _remember_shard(registry, pdf_path, key, chunk_size, chunk_overlap, embed_model_name, stores[key].index.ntotal)
+        if corpus_dir is not None:
+            root = Path(corpus_dir).resolve()
+            shards = registry.get("shards", {})
+            for gone in [p for p in shards if Path(p).is_relative_to(root) and p not in keys]:
+                del shards[gone]  # deleted or renamed since the last run
+        _save_registry(registry)
+    index_store.enforce_budget(INDEX_ROOT, protect=sources.keys())
+
+    return [stores[keys[p]] for p in pdf_paths]
+
+@traceable(name="search_corpus", tags=["retrieval", "corpus"])
+@rag_metrics.instrument("retrieval", count=lambda docs: {"documents": len(docs)})
+def search_corpus(shards: list, question: str, k: int = 4, max_workers: int = 8):
+    """Embed the question once, search every shard concurrently and merge the global top-k."""
+    shards = list({id(vs): vs for vs in shards}.values())  # identical PDFs share a store
+    if not shards:
+        return []
+    query_vec = shards[0].embeddings.embed_query(question)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        per_shard = pool.map(lambda vs: vs.similarity_search_with_score_by_vector(query_vec, k=k), shards)
+        # FAISS returns L2 distances: smaller is closer
+        top = heapq.nsmallest(k, iter_chain.from_iterable(per_shard), key=lambda pair: pair[1])
+    return [doc for doc, _ in top]
 
 # ----------------- model, prompt, and pipeline -----------------
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# Built on first use rather than at import time.
+@lru_cache(maxsize=None)
+def get_llm():
+    from llm_clients import get_chat_model  # shared, pooled ChatOpenAI
+    return get_chat_model("gpt-4o-mini", temperature=0)
 
-prompt = ChatPromptTemplate.from_messages([
-    ("system", "Answer ONLY from the provided context. If not found, say you don't know."),
-    ("human", "Question: {question}\n\nContext:\n{context}")
-])
+@lru_cache(maxsize=None)
+def get_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ("system", "Answer ONLY from the provided context. If not found, say you don't know."),
+        ("human", "Question: {question}\n\nContext:\n{context}")
+    ])
 
 def format_docs(docs):
     return "\n\n".join(d.page_content for d in docs)
 
+def build_qa_chain(retriever):
+    from langchain_core.runnables import RunnableParallel, RunnablePassthrough, RunnableLambda
+    from langchain_core.output_parsers import StrOutputParser
+
+    parallel = RunnableParallel({
+        "context": retriever | RunnableLambda(format_docs),
+        "question": RunnablePassthrough(),
+    })
+    return parallel | get_prompt() | get_llm() | StrOutputParser()
+
 @traceable(name="setup_pipeline", tags=["setup"])
 def setup_pipeline(pdf_path: str, chunk_size=1000, chunk_overlap=150, embed_model_name="text-embedding-3-small", force_rebuild=False):
     return load_or_build_index(
@@ -120,32 +395,111 @@ def setup_pipeline(pdf_path: str, chunk_size=1000, chunk_overlap=150, embed_mode
         force_rebuild=force_rebuild,
     )
 
-@traceable(name="pdf_rag_full_run")
-def setup_pipeline_and_query(
+def build_pipeline_chain(
     pdf_path: str,
-    question: str,
     chunk_size: int = 1000,
     chunk_overlap: int = 150,
     embed_model_name: str = "text-embedding-3-small",
     force_rebuild: bool = False,
+    watch: bool = False,
 ):
-    vectorstore = setup_pipeline(pdf_path, chunk_size, chunk_overlap, embed_model_name, force_rebuild)
-    retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 4})
+    """QA chain over one PDF's index -> (chain, run config).
 
-    parallel = RunnableParallel({
-        "context": retriever | RunnableLambda(format_docs),
-        "question": RunnablePassthrough(),
-    })
-    chain = parallel | prompt | llm | StrOutputParser()
+    The index is built (or loaded) before this returns. With watch=True it is served
+    by serve_index instead: changes to the PDF are rebuilt in the background and the
+    chain reads the new index once it is ready.
+    """
+    if watch:
+        live = serve_index(pdf_path, chunk_size, chunk_overlap, embed_model_name, force_rebuild, watch=True)
+        retriever = live.as_retriever(k=4)
+    else:
+        vectorstore = setup_pipeline(pdf_path, chunk_size, chunk_overlap, embed_model_name, force_rebuild)
+        retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 4})
+    return build_qa_chain(retriever), {
+        "run_name": "pdf_rag_query", "tags": ["qa"], "metadata": {"k": 4},
+        "callbacks": [rag_metrics.callback_handler()],  # retrieval + LLM stage metrics
+    }
 
-    return chain.invoke(
-        question,
-        config={"run_name": "pdf_rag_query", "tags": ["qa"], "metadata": {"k": 4}}
+def build_corpus_chain(
+    corpus_dir: str,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 150,
+    embed_model_name: str = "text-embedding-3-small",
+    k: int = 4,
+    max_workers: int = 4,
+):
+    """QA chain over every shard under corpus_dir -> (chain, run config)."""
+    shards = load_or_build_corpus(
+        list_corpus_pdfs(corpus_dir), chunk_size, chunk_overlap, embed_model_name, max_workers, corpus_dir
     )
+    from langchain_core.runnables import RunnableLambda
+
+    retriever = RunnableLambda(lambda q: search_corpus(shards, q, k=k))
+    return build_qa_chain(retriever), {
+        "run_name": "corpus_rag_query", "tags": ["qa", "corpus"], "metadata": {"k": k, "shards": len({id(vs) for vs in shards})},
+        "callbacks": [rag_metrics.callback_handler()],
+    }
+
+@traceable(name="pdf_rag_full_run")
+def setup_pipeline_and_query(pdf_path: str, question: str, **kwargs):
+    """Answer `question` from one PDF (kwargs: build_pipeline_chain options)."""
+    chain, config = build_pipeline_chain(pdf_path, **kwargs)
+    return chain.invoke(question, config=config)
+
+@traceable(name="corpus_rag_full_run")
+def setup_corpus_and_query(corpus_dir: str, question: str, **kwargs):
+    """Answer `question` from a corpus directory (kwargs: build_corpus_chain options)."""
+    chain, config = build_corpus_chain(corpus_dir, **kwargs)
+    return chain.invoke(question, config=config)
+
+# Streaming variants for interactive use: tokens go to on_token as they arrive.
+# Timings start before the index is loaded, so first_token_s is what the user waits.
+@traceable(name="pdf_rag_full_run")
+def setup_pipeline_and_stream(pdf_path: str, question: str, on_token=None, **kwargs) -> dict:
+    """setup_pipeline_and_query, streamed -> {"answer", "timings": {"first_token_s", "total_s"}}."""
+    from streaming_chain import stream_answer
+
+    started = time.perf_counter()
+    chain, config = build_pipeline_chain(pdf_path, **kwargs)
+    return stream_answer(chain, question, config=config, on_token=on_token, started=started)
+
+@traceable(name="corpus_rag_full_run")
+def setup_corpus_and_stream(corpus_dir: str, question: str, on_token=None, **kwargs) -> dict:
+    """setup_corpus_and_query, streamed -> {"answer", "timings"}."""
+    from streaming_chain import stream_answer
+
+    started = time.perf_counter()
+    chain, config = build_corpus_chain(corpus_dir, **kwargs)
+    return stream_answer(chain, question, config=config, on_token=on_token, started=started)
 
 # ----------------- CLI -----------------
+# python 3_rag_v4.py              -> single PDF_PATH
+# python 3_rag_v4.py ./papers/    -> corpus mode, one shard per PDF under ./papers/
+# python 3_rag_v4.py --watch      -> keep asking; edits to PDF_PATH are re-indexed in the background
 if __name__ == "__main__":
+    from streaming_chain import print_token, format_timings
+
+    args = [a for a in sys.argv[1:] if a != "--watch"]
+    corpus_dir = args[0] if args else None
     print("PDF RAG ready. Ask a question (or Ctrl+C to exit).")
-    q = input("\nQ: ").strip()
-    ans = setup_pipeline_and_query(PDF_PATH, q)
-    print("\nA:", ans)
+    if "--watch" in sys.argv and not corpus_dir:
+        from streaming_chain import stream_answer
+
+        chain, config = build_pipeline_chain(PDF_PATH, watch=True)
+        try:
+            while q := input("\nQ: ").strip():
+                print("\nA: ", end="", flush=True)
+                result = stream_answer(chain, q, config=config)
+                print("\n\n" + format_timings(result["timings"]))
+        except (EOFError, KeyboardInterrupt):
+            pass
+        background_indexer().shutdown(wait=False)
+    else:
+        q = input("\nQ: ").strip()
+        print("\nA: ", end="", flush=True)  # tokens are printed as they arrive
+        if corpus_dir:
+            result = setup_corpus_and_stream(corpus_dir, q, on_token=print_token)
+        else:
+            result = setup_pipeline_and_stream(PDF_PATH, q, on_token=print_token)
+        print("\n\n" + format_timings(result["timings"]))
+    rag_metrics.dump_from_env()  # RAG_PROFILE_JSONL / RAG_METRICS_PROM
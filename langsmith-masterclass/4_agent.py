@@ -1,30 +1,22 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.tools import tool
-import requests
-from langchain_community.tools import DuckDuckGoSearchRun
+import sys
+import asyncio
+
+from llm_clients import get_chat_model  # shared, pooled ChatOpenAI
 from langchain.agents import create_react_agent, AgentExecutor
-from langchain import hub
 from dotenv import load_dotenv
 
-load_dotenv()
-
-search_tool = DuckDuckGoSearchRun()
-
-@tool
-def get_weather_data(city: str) -> str:
-  """
-  This function fetches the current weather data for a given city
-  """
-  url = f'https://api.weatherstack.com/current?access_key=f07d9636974c4120025fadf60678771b&query={city}'
-
-  response = requests.get(url)
+load_dotenv()  # before agent_tools, which reads WEATHERSTACK_* at import
 
-  return response.json()
+# pooled HTTP (keep-alive, timeouts, retries) and async versions of the tools
+from agent_tools import search_tool, get_weather_data, build_tool_calling_executor, aclose_http_clients
+from tool_cache import tool_cache_stats  # results cached per tool with a TTL
+from prompt_registry import get_prompt  # bundled/cached hub prompts, no network at startup
+from agent_budget import Budget, run_with_budget, arun_with_budget, jsonl_logger
 
-llm = ChatOpenAI()
+llm = get_chat_model(stream_usage=True)  # the executor streams; usage feeds the token budget
 
-# Step 2: Pull the ReAct prompt from LangChain Hub
-prompt = hub.pull("hwchase17/react")  # pulls the standard ReAct agent prompt
+# Step 2: Load the ReAct prompt from LangChain Hub (local copy, refreshed in the background)
+prompt = get_prompt("hwchase17/react")  # the standard ReAct agent prompt
 
 # Step 3: Create the ReAct agent manually with the pulled prompt
 agent = create_react_agent(
@@ -37,16 +29,37 @@ agent = create_react_agent(
 agent_executor = AgentExecutor(
     agent=agent,
     tools=[search_tool, get_weather_data],
-    verbose=True,
-    max_iterations=5
+    max_iterations=5  # per-step costs are logged by run_with_budget instead of verbose=True
 )
 
+# Stop early on runaway runs: token / wall-time / tool-call limits, and no identical tool call twice
+budget = Budget(max_tokens=8000, max_seconds=60, max_tool_calls=8)
+step_log = jsonl_logger(sys.stderr)  # one JSON record per planned action, tool result and finish
+
 # What is the release date of Dhadak 2?
 # What is the current temp of gurgaon
 # Identify the birthplace city of Kalpana Chawla (search) and give its current temperature.
 
 # Step 5: Invoke
-response = agent_executor.invoke({"input": "What is the current temp of gurgaon"})
-print(response)
+# python 4_agent.py              ReAct agent, one tool call per step
+# python 4_agent.py --parallel   tool-calling agent; independent calls in a step run concurrently
+if "--parallel" in sys.argv:
+    parallel_executor = build_tool_calling_executor(llm, [search_tool, get_weather_data])
+
+    async def run_parallel():
+        try:
+            return await arun_with_budget(
+                parallel_executor, {"input": "What is the current temp of gurgaon, mumbai and chennai?"}, budget, log=step_log
+            )
+        finally:
+            await aclose_http_clients()  # before asyncio.run closes the loop
+
+    response = asyncio.run(run_parallel())
+else:
+    response = run_with_budget(agent_executor, {"input": "What is the current temp of gurgaon"}, budget, log=step_log)
+print({k: response[k] for k in ("output", "stopped", "tokens", "tool_calls", "elapsed_s")})
+
+print(response['output'])
 
-print(response['output'])
\ No newline at end of file
+for name, c in tool_cache_stats().items():
+    print(f"tool cache {name}: {c['avoided']} calls avoided, {c['misses']} made")
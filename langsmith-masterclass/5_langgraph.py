@@ -1,18 +1,26 @@
 # pip install -U langgraph langchain-openai pydantic python-dotenv langsmith
 
+import os
+import sys
+import json
+import time
+import hashlib
 import operator
-from typing import TypedDict, Annotated, List
+import threading
+from typing import TypedDict, Annotated, Dict, List
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
-from langsmith import traceable
-from langchain_openai import ChatOpenAI
+from tracing import traceable  # sampled drop-in for langsmith.traceable
+from llm_clients import Slots, get_chat_model  # shared, pooled ChatOpenAI
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import CachePolicy
+from langgraph.cache.base import BaseCache
 
 # ---------- Setup ----------
 load_dotenv()
-model = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+model = get_chat_model("gpt-4o-mini", temperature=0)
 
 # ---------- Structured schema & model ----------
 class EvaluationSchema(BaseModel):
@@ -21,6 +29,21 @@ class EvaluationSchema(BaseModel):
 
 structured_model = model.with_structured_output(EvaluationSchema)
 
+# Single-call mode: all three dimensions (and optionally the summary) in one request
+class CombinedEvaluationSchema(BaseModel):
+    language_feedback: str = Field(description="Detailed feedback on the language quality of the essay")
+    language_score: int = Field(description="Language score out of 10", ge=0, le=10)
+    analysis_feedback: str = Field(description="Detailed feedback on the depth of analysis of the essay")
+    analysis_score: int = Field(description="Depth of analysis score out of 10", ge=0, le=10)
+    clarity_feedback: str = Field(description="Detailed feedback on the clarity of thought of the essay")
+    clarity_score: int = Field(description="Clarity of thought score out of 10", ge=0, le=10)
+
+class CombinedEvaluationWithSummarySchema(CombinedEvaluationSchema):
+    overall_feedback: str = Field(description="Summarized overall feedback across the three dimensions")
+
+combined_model = model.with_structured_output(CombinedEvaluationSchema)
+combined_summary_model = model.with_structured_output(CombinedEvaluationWithSummarySchema)
+
 # ---------- Sample essay ----------
 essay2 = """India and AI Time
 
@@ -49,87 +72,391 @@ class UPSCState(TypedDict, total=False):
     clarity_feedback: str
     overall_feedback: str
     individual_scores: Annotated[List[int], operator.add]  # merges parallel lists
+    dimension_scores: Annotated[Dict[str, int], operator.or_]  # dimension -> score, whatever order branches finish in
     avg_score: float
 
+DIMENSIONS = ("language", "analysis", "clarity")
+
+# ---------- Prompts ----------
+LANGUAGE_PROMPT = (
+    "Evaluate the language quality of the following essay and provide feedback "
+    "and assign a score out of 10.\n\n{essay}"
+)
+ANALYSIS_PROMPT = (
+    "Evaluate the depth of analysis of the following essay and provide feedback "
+    "and assign a score out of 10.\n\n{essay}"
+)
+THOUGHT_PROMPT = (
+    "Evaluate the clarity of thought of the following essay and provide feedback "
+    "and assign a score out of 10.\n\n{essay}"
+)
+FINAL_PROMPT = (
+    "Based on the following feedback, create a summarized overall feedback.\n\n"
+    "Language feedback: {language_feedback}\n"
+    "Depth of analysis feedback: {analysis_feedback}\n"
+    "Clarity of thought feedback: {clarity_feedback}\n"
+)
+
+COMBINED_PROMPT = (
+    "Evaluate the following essay on three dimensions: language quality, depth of "
+    "analysis and clarity of thought. For each dimension provide feedback and assign "
+    "a score out of 10.\n\n{essay}"
+)
+COMBINED_SUMMARY_PROMPT = (
+    "Evaluate the following essay on three dimensions: language quality, depth of "
+    "analysis and clarity of thought. For each dimension provide feedback and assign "
+    "a score out of 10, then write a summarized overall feedback.\n\n{essay}"
+)
+
+def _final_prompt(state: UPSCState) -> str:
+    return FINAL_PROMPT.format(
+        language_feedback=state.get("language_feedback", ""),
+        analysis_feedback=state.get("analysis_feedback", ""),
+        clarity_feedback=state.get("clarity_feedback", ""),
+    )
+
+def _average(state: UPSCState) -> float:
+    scores = state.get("individual_scores", []) or []
+    return (sum(scores) / len(scores)) if scores else 0.0
+
 # ---------- Traced node functions ----------
 @traceable(name="evaluate_language_fn", tags=["dimension:language"], metadata={"dimension": "language"})
 def evaluate_language(state: UPSCState):
-    prompt = (
-        "Evaluate the language quality of the following essay and provide feedback "
-        "and assign a score out of 10.\n\n" + state["essay"]
-    )
-    out = structured_model.invoke(prompt)
-    return {"language_feedback": out.feedback, "individual_scores": [out.score]}
+    out = structured_model.invoke(LANGUAGE_PROMPT.format(essay=state["essay"]))
+    return {"language_feedback": out.feedback, "individual_scores": [out.score], "dimension_scores": {"language": out.score}}
 
 @traceable(name="evaluate_analysis_fn", tags=["dimension:analysis"], metadata={"dimension": "analysis"})
 def evaluate_analysis(state: UPSCState):
-    prompt = (
-        "Evaluate the depth of analysis of the following essay and provide feedback "
-        "and assign a score out of 10.\n\n" + state["essay"]
-    )
-    out = structured_model.invoke(prompt)
-    return {"analysis_feedback": out.feedback, "individual_scores": [out.score]}
+    out = structured_model.invoke(ANALYSIS_PROMPT.format(essay=state["essay"]))
+    return {"analysis_feedback": out.feedback, "individual_scores": [out.score], "dimension_scores": {"analysis": out.score}}
 
 @traceable(name="evaluate_thought_fn", tags=["dimension:clarity"], metadata={"dimension": "clarity_of_thought"})
 def evaluate_thought(state: UPSCState):
-    prompt = (
-        "Evaluate the clarity of thought of the following essay and provide feedback "
-        "and assign a score out of 10.\n\n" + state["essay"]
-    )
-    out = structured_model.invoke(prompt)
-    return {"clarity_feedback": out.feedback, "individual_scores": [out.score]}
+    out = structured_model.invoke(THOUGHT_PROMPT.format(essay=state["essay"]))
+    return {"clarity_feedback": out.feedback, "individual_scores": [out.score], "dimension_scores": {"clarity": out.score}}
 
 @traceable(name="final_evaluation_fn", tags=["aggregate"])
 def final_evaluation(state: UPSCState):
-    prompt = (
-        "Based on the following feedback, create a summarized overall feedback.\n\n"
-        f"Language feedback: {state.get('language_feedback','')}\n"
-        f"Depth of analysis feedback: {state.get('analysis_feedback','')}\n"
-        f"Clarity of thought feedback: {state.get('clarity_feedback','')}\n"
-    )
-    overall = model.invoke(prompt).content
-    scores = state.get("individual_scores", []) or []
-    avg = (sum(scores) / len(scores)) if scores else 0.0
-    return {"overall_feedback": overall, "avg_score": avg}
+    overall = model.invoke(_final_prompt(state)).content
+    return {"overall_feedback": overall, "avg_score": _average(state)}
+
+# ---------- Single-call node functions ----------
+def _combined_update(out: CombinedEvaluationSchema) -> dict:
+    # same UPSCState fields the fan-out graph produces
+    scores = [out.language_score, out.analysis_score, out.clarity_score]
+    return {
+        "language_feedback": out.language_feedback,
+        "analysis_feedback": out.analysis_feedback,
+        "clarity_feedback": out.clarity_feedback,
+        "individual_scores": scores,
+        "dimension_scores": dict(zip(DIMENSIONS, scores)),
+        "avg_score": sum(scores) / len(scores),
+    }
+
+@traceable(name="evaluate_all_fn", tags=["dimension:all", "aggregate"])
+def evaluate_all(state: UPSCState):
+    """1 LLM call per essay: dimensions and summary together."""
+    out = combined_summary_model.invoke(COMBINED_SUMMARY_PROMPT.format(essay=state["essay"]))
+    return {**_combined_update(out), "overall_feedback": out.overall_feedback}
+
+@traceable(name="evaluate_dimensions_fn", tags=["dimension:all"])
+def evaluate_dimensions(state: UPSCState):
+    """Dimensions only; pair with final_evaluation for 2 LLM calls per essay."""
+    out = combined_model.invoke(COMBINED_PROMPT.format(essay=state["essay"]))
+    return _combined_update(out)
+
+# ---------- Async node functions ----------
+# Same prompts, but awaiting `ainvoke` so one event loop can keep hundreds of
+# essays in flight. Every model call takes a slot from a process-wide budget of
+# MAX_CONCURRENT_LLM_CALLS for essay grading (an llm_clients.Slots, shared across
+# threads and event loops like LLM_MAX_CONCURRENCY, which still applies on top).
+MAX_CONCURRENT_LLM_CALLS = int(os.environ.get("ESSAY_MAX_CONCURRENT_LLM_CALLS", "32"))
+
+_llm_slots = None
+_llm_slots_lock = threading.Lock()
+
+def _llm_slot() -> Slots:
+    global _llm_slots
+    with _llm_slots_lock:
+        if _llm_slots is None:  # on first use, so callers can still set MAX_CONCURRENT_LLM_CALLS
+            _llm_slots = Slots(MAX_CONCURRENT_LLM_CALLS)
+        return _llm_slots
+
+@traceable(name="evaluate_language_fn", tags=["dimension:language"], metadata={"dimension": "language"})
+async def aevaluate_language(state: UPSCState):
+    async with _llm_slot():
+        out = await structured_model.ainvoke(LANGUAGE_PROMPT.format(essay=state["essay"]))
+    return {"language_feedback": out.feedback, "individual_scores": [out.score], "dimension_scores": {"language": out.score}}
+
+@traceable(name="evaluate_analysis_fn", tags=["dimension:analysis"], metadata={"dimension": "analysis"})
+async def aevaluate_analysis(state: UPSCState):
+    async with _llm_slot():
+        out = await structured_model.ainvoke(ANALYSIS_PROMPT.format(essay=state["essay"]))
+    return {"analysis_feedback": out.feedback, "individual_scores": [out.score], "dimension_scores": {"analysis": out.score}}
+
+@traceable(name="evaluate_thought_fn", tags=["dimension:clarity"], metadata={"dimension": "clarity_of_thought"})
+async def aevaluate_thought(state: UPSCState):
+    async with _llm_slot():
+        out = await structured_model.ainvoke(THOUGHT_PROMPT.format(essay=state["essay"]))
+    return {"clarity_feedback": out.feedback, "individual_scores": [out.score], "dimension_scores": {"clarity": out.score}}
+
+@traceable(name="final_evaluation_fn", tags=["aggregate"])
+async def afinal_evaluation(state: UPSCState):
+    async with _llm_slot():
+        overall = (await model.ainvoke(_final_prompt(state))).content
+    return {"overall_feedback": overall, "avg_score": _average(state)}
+
+# ---------- Node cache ----------
+# Each node's output is cached under (node, prompt template, model, temperature,
+# essay) in a SQLite file, so re-grading an essay only calls the model for nodes
+# whose inputs changed. The dimension nodes key on the essay text; final_evaluation
+# keys on the three feedbacks and scores it summarises. Editing a prompt constant
+# invalidates just that node (and final_evaluation, if its feedback changes).
+# ESSAY_NODE_CACHE="" turns the cache off.
+NODE_CACHE_PATH = os.environ.get("ESSAY_NODE_CACHE", ".essay_node_cache.sqlite")
+NODE_CACHE_VERSION = 2  # bump when node outputs change shape (2: dimension_scores)
+
+_node_cache = None
+_cache_lock = threading.Lock()
+_cache_counts = {}  # node -> {"hits": n, "misses": n}, counted by LazyNodeCache
+
+def _count(keys, field: str):
+    # LangGraph namespaces node writes as (CACHE_NS_WRITES, function id, node name)
+    with _cache_lock:
+        for namespace, _ in keys:
+            counts = _cache_counts.setdefault(namespace[-1], {"hits": 0, "misses": 0})
+            counts[field] += 1
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _cache_key(template: str, inputs) -> str:
+    return json.dumps({
+        "version": NODE_CACHE_VERSION,
+        "template": _sha(template),
+        "model": getattr(model, "model_name", None),
+        "temperature": getattr(model, "temperature", None),
+        "inputs": _sha(json.dumps(inputs, ensure_ascii=False)),
+    }, sort_keys=True)
+
+def essay_cache_policy(template: str) -> CachePolicy:
+    """Cache policy for a node that formats `template` with the essay (LangGraph namespaces keys per node)."""
+    return CachePolicy(key_func=lambda state: _cache_key(template, state["essay"]))
+
+def final_cache_policy() -> CachePolicy:
+    """Cache policy for final_evaluation: keyed on the feedback it summarises."""
+    def key(state):
+        inputs = [state.get(f"{d}_feedback", "") for d in ("language", "analysis", "clarity")]
+        return _cache_key(FINAL_PROMPT, [inputs, sorted(state.get("individual_scores", []) or [])])
+    return CachePolicy(key_func=key)
+
+class LazyNodeCache(BaseCache):
+    """Opens the SQLite cache on the first graph run, so importing this module creates no file.
+
+    Also counts per node: a key returned by get is a hit, a key written by set is a
+    miss (the node ran). Re-queried keys and resumed tasks don't skew the counts.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._cache = None
+
+    def _open(self):
+        with _cache_lock:
+            if self._cache is None:
+                from langgraph.cache.sqlite import SqliteCache
+                self._cache = SqliteCache(path=self.path)
+        return self._cache
+
+    def get(self, keys):
+        found = self._open().get(keys)
+        _count(found, "hits")
+        return found
+
+    async def aget(self, keys):
+        found = await self._open().aget(keys)
+        _count(found, "hits")
+        return found
+
+    def set(self, pairs):
+        self._open().set(pairs)
+        _count(pairs, "misses")
+
+    async def aset(self, pairs):
+        await self._open().aset(pairs)
+        _count(pairs, "misses")
+
+    def clear(self, namespaces=None):
+        self._open().clear(namespaces)
+
+    async def aclear(self, namespaces=None):
+        await self._open().aclear(namespaces)
+
+def node_cache():
+    """The shared node cache (opened on first use), or None when ESSAY_NODE_CACHE is empty."""
+    global _node_cache
+    if not NODE_CACHE_PATH:
+        return None
+    if _node_cache is None:
+        _node_cache = LazyNodeCache(NODE_CACHE_PATH)
+    return _node_cache
+
+def cache_stats() -> dict:
+    """Per-node lookups, hits, misses and hit rate since start-up ({} when the cache is off)."""
+    if not NODE_CACHE_PATH:
+        return {}
+    with _cache_lock:
+        stats = {}
+        for node, c in _cache_counts.items():
+            lookups = c["hits"] + c["misses"]
+            stats[node] = {**c, "lookups": lookups, "hit_rate": c["hits"] / lookups if lookups else 0.0}
+        return stats
 
 # ---------- Build graph ----------
-graph = StateGraph(UPSCState)
+def build_graph(language, analysis, thought, final):
+    graph = StateGraph(UPSCState)
+
+    graph.add_node("evaluate_language", language,
+                   cache_policy=essay_cache_policy(LANGUAGE_PROMPT))
+    graph.add_node("evaluate_analysis", analysis,
+                   cache_policy=essay_cache_policy(ANALYSIS_PROMPT))
+    graph.add_node("evaluate_thought", thought,
+                   cache_policy=essay_cache_policy(THOUGHT_PROMPT))
+    graph.add_node("final_evaluation", final,
+                   cache_policy=final_cache_policy())
+
+    # Fan-out → join
+    graph.add_edge(START, "evaluate_language")
+    graph.add_edge(START, "evaluate_analysis")
+    graph.add_edge(START, "evaluate_thought")
+    graph.add_edge("evaluate_language", "final_evaluation")
+    graph.add_edge("evaluate_analysis", "final_evaluation")
+    graph.add_edge("evaluate_thought", "final_evaluation")
+    graph.add_edge("final_evaluation", END)
+    return graph
+
+def build_single_call_graph(evaluate, template, final=None):
+    graph = StateGraph(UPSCState)
+    graph.add_node("evaluate_all", evaluate,
+                   cache_policy=essay_cache_policy(template))
+    graph.add_edge(START, "evaluate_all")
+    if final is None:
+        graph.add_edge("evaluate_all", END)
+    else:
+        graph.add_node("final_evaluation", final,
+                       cache_policy=final_cache_policy())
+        graph.add_edge("evaluate_all", "final_evaluation")
+        graph.add_edge("final_evaluation", END)
+    return graph
+
+workflow = build_graph(evaluate_language, evaluate_analysis, evaluate_thought, final_evaluation).compile(cache=node_cache())
+async_workflow = build_graph(
+    aevaluate_language, aevaluate_analysis, aevaluate_thought, afinal_evaluation
+).compile(cache=node_cache())
+
+# LLM calls per essay: fanout 4, single+summary 2, single 1
+WORKFLOWS = {
+    "fanout": workflow,
+    "single+summary": build_single_call_graph(evaluate_dimensions, COMBINED_PROMPT, final_evaluation).compile(cache=node_cache()),
+    "single": build_single_call_graph(evaluate_all, COMBINED_SUMMARY_PROMPT).compile(cache=node_cache()),
+}
 
-graph.add_node("evaluate_language", evaluate_language)
-graph.add_node("evaluate_analysis", evaluate_analysis)
-graph.add_node("evaluate_thought", evaluate_thought)
-graph.add_node("final_evaluation", final_evaluation)
+async def agrade_essays(essays: List[str], max_concurrency: int = 100, config: dict = None):
+    """Grade many essays on one event loop.
 
-# Fan-out → join
-graph.add_edge(START, "evaluate_language")
-graph.add_edge(START, "evaluate_analysis")
-graph.add_edge(START, "evaluate_thought")
-graph.add_edge("evaluate_language", "final_evaluation")
-graph.add_edge("evaluate_analysis", "final_evaluation")
-graph.add_edge("evaluate_thought", "final_evaluation")
-graph.add_edge("final_evaluation", END)
+    `max_concurrency` caps graph runs in flight; MAX_CONCURRENT_LLM_CALLS caps
+    model requests across all of them.
+    """
+    config = {**(config or {}), "max_concurrency": max_concurrency}
+    return await async_workflow.abatch([{"essay": e} for e in essays], config=config)
 
-workflow = graph.compile()
+# ---------- Streaming ----------
+# Events, in arrival order:
+#   {"type": "dimension", "dimension": "language", "feedback": ..., "score": ..., "cached": bool}
+#   {"type": "token", "text": ...}        # overall_feedback as the model writes it
+#   {"type": "final", "overall_feedback": ..., "individual_scores": [...], "dimension_scores": {...}, "avg_score": ...}
+# Dimensions arrive as each branch finishes, so the first one shows up after the
+# fastest branch rather than after the whole graph. A cached final_evaluation
+# produces no token events; its text is in the "final" event either way.
+STREAM_MODES = ["updates", "messages"]
+
+def _stream_events(mode: str, chunk, final: dict):
+    if mode == "messages":
+        message, meta = chunk
+        if meta.get("langgraph_node") == "final_evaluation" and message.content:
+            yield {"type": "token", "text": message.content}
+        return
+    cached = bool(chunk.get("__metadata__", {}).get("cached"))
+    for node, update in chunk.items():
+        if node == "__metadata__" or not update:
+            continue
+        final.update({k: v for k, v in update.items() if k not in ("individual_scores", "dimension_scores")})
+        final["individual_scores"] += update.get("individual_scores", [])
+        final["dimension_scores"].update(update.get("dimension_scores", {}))
+        for dim, score in update.get("dimension_scores", {}).items():
+            yield {"type": "dimension", "dimension": dim, "feedback": update[f"{dim}_feedback"],
+                   "score": score, "cached": cached}
+
+def _final_event(final: dict) -> dict:
+    return {"type": "final", "overall_feedback": final.get("overall_feedback", ""),
+            "individual_scores": final["individual_scores"], "dimension_scores": final["dimension_scores"],
+            "avg_score": final.get("avg_score", 0.0)}
+
+def stream_evaluation(essay: str, config: dict = None, graph=None):
+    """Grade one essay, yielding dimension results and summary tokens as they arrive."""
+    final = {"individual_scores": [], "dimension_scores": {}}
+    for mode, chunk in (graph or workflow).stream({"essay": essay}, config=config, stream_mode=STREAM_MODES):
+        yield from _stream_events(mode, chunk, final)
+    yield _final_event(final)
+
+async def astream_evaluation(essay: str, config: dict = None, graph=None):
+    """Async `stream_evaluation` on the async graph."""
+    final = {"individual_scores": [], "dimension_scores": {}}
+    async for mode, chunk in (graph or async_workflow).astream({"essay": essay}, config=config, stream_mode=STREAM_MODES):
+        for event in _stream_events(mode, chunk, final):
+            yield event
+    yield _final_event(final)
 
 # ---------- Direct invoke without wrapper ----------
+# python 5_langgraph.py [fanout|single+summary|single] [--stream]
 if __name__ == "__main__":
-    result = workflow.invoke(
-        {"essay": essay2},
-        config={
-            "run_name": "evaluate_upsc_essay",  # becomes root run name
-            "tags": ["essay", "langgraph", "evaluation"],
-            "metadata": {
-                "essay_length": len(essay2),
-                "model": "gpt-4o-mini",
-                "dimensions": ["language", "analysis", "clarity"],
-            },
+    args = [a for a in sys.argv[1:] if a != "--stream"]
+    mode = args[0] if args else "fanout"
+    config = {
+        "run_name": "evaluate_upsc_essay",  # becomes root run name
+        "tags": ["essay", "langgraph", "evaluation"],
+        "metadata": {
+            "essay_length": len(essay2),
+            "model": "gpt-4o-mini",
+            "dimensions": ["language", "analysis", "clarity"],
+            "mode": mode,
         },
-    )
+    }
+
+    if "--stream" in sys.argv:
+        t0, streamed = time.perf_counter(), False
+        for event in stream_evaluation(essay2, config=config, graph=WORKFLOWS[mode]):
+            elapsed = time.perf_counter() - t0
+            if event["type"] == "dimension":
+                print(f"[{elapsed:5.2f}s] {event['dimension']} {event['score']}/10: {event['feedback']}\n", flush=True)
+            elif event["type"] == "token":
+                streamed = True
+                print(event["text"], end="", flush=True)
+            else:
+                if not streamed:  # cached or single-call summary: no tokens were streamed
+                    print(event["overall_feedback"], end="")
+                print(f"\n\n[{elapsed:5.2f}s] scores {event['individual_scores']}, average {event['avg_score']:.2f}")
+    else:
+        result = WORKFLOWS[mode].invoke({"essay": essay2}, config=config)
+
+        print("\n=== Evaluation Results ===")
+        print("Language feedback:\n", result.get("language_feedback", ""), "\n")
+        print("Analysis feedback:\n", result.get("analysis_feedback", ""), "\n")
+        print("Clarity feedback:\n", result.get("clarity_feedback", ""), "\n")
+        print("Overall feedback:\n", result.get("overall_feedback", ""), "\n")
+        print("Individual scores:", result.get("individual_scores", []))
+        print("Average score:", result.get("avg_score", 0.0))
 
-    print("\n=== Evaluation Results ===")
-    print("Language feedback:\n", result.get("language_feedback", ""), "\n")
-    print("Analysis feedback:\n", result.get("analysis_feedback", ""), "\n")
-    print("Clarity feedback:\n", result.get("clarity_feedback", ""), "\n")
-    print("Overall feedback:\n", result.get("overall_feedback", ""), "\n")
-    print("Individual scores:", result.get("individual_scores", []))
-    print("Average score:", result.get("avg_score", 0.0))
+    for node, c in cache_stats().items():
+        print(f"cache {node}: {c['hits']}/{c['lookups']} hits ({c['hit_rate']:.0%})")
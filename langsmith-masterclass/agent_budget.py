@@ -0,0 +1,160 @@
+# Budgets and early exit for AgentExecutor runs, with a structured per-step cost log.
+#
+#   from agent_budget import Budget, run_with_budget, jsonl_logger
+#   result = run_with_budget(agent_executor, {"input": "..."},
+#                            Budget(max_tokens=8000, max_seconds=60), log=jsonl_logger(sys.stderr))
+#   result["output"], result["stopped"], result["tokens"], result["steps"]
+#
+# The run goes through executor.stream(), which yields every planned action before
+# its tool runs and every observation after. The controller checks the budget at
+# both points, so it can stop before a tool call that would be wasted:
+#   max_tokens           LLM tokens for the run (from usage metadata; ChatOpenAI
+#                        reports it when streaming only with stream_usage=True)
+#   max_seconds          wall time for the run
+#   max_tool_calls       tool calls for the run
+#   max_identical_calls  times the same tool may run with the same input (default 1)
+# A stopped run returns "Agent stopped early (<reason>)." as its output, plus the
+# last observation, instead of raising.
+#
+# Log records (one dict per event, also kept in result["steps"]):
+#   {"event": "plan", "step": 1, "tool": ..., "input": ..., "plan_s": ..., "tokens": ...}
+#   {"event": "tool", "step": 1, "tool": ..., "tool_s": ..., "observation_chars": ..., "elapsed_s": ...}
+#   {"event": "finish" | "stopped", "reason": ..., "tokens": ..., "tool_calls": ..., "elapsed_s": ...}
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+
+from tool_cache import default_key
+
+@dataclass
+class Budget:
+    max_tokens: Optional[int] = None
+    max_seconds: Optional[float] = None
+    max_tool_calls: Optional[int] = None
+    max_identical_calls: int = 1
+
+def jsonl_logger(stream) -> Callable[[dict], None]:
+    """Log callback writing one JSON object per line to an open text stream."""
+    def log(record: dict):
+        stream.write(json.dumps(record, default=str) + "\n")
+        stream.flush()
+    return log
+
+def _call_key(action) -> str:
+    args = action.tool_input if isinstance(action.tool_input, dict) else {"input": action.tool_input}
+    return default_key(action.tool, args)
+
+class BudgetController:
+    """Per-run accounting; `observe` returns a stop reason once the budget is exceeded."""
+
+    def __init__(self, budget: Budget, log: Callable[[dict], None] = None):
+        self.budget = budget
+        self.log = log
+        self.usage = UsageMetadataCallbackHandler()
+        self.started = time.perf_counter()
+        self.mark = self.started         # end of the previous event
+        self.step = 0
+        self.tool_calls = 0
+        self.calls_seen = {}             # tool call key -> times run
+        self.pending = {}                # tool call key -> time its action was planned
+        self.last_observation = None
+        self.steps = []
+        self._planning = True            # next action event starts a new step
+
+    def config(self, config: dict = None) -> dict:
+        config = dict(config or {})
+        config["callbacks"] = [*(config.get("callbacks") or []), self.usage]
+        return config
+
+    @property
+    def tokens(self) -> int:
+        return sum(u.get("total_tokens", 0) for u in self.usage.usage_metadata.values())
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def _emit(self, record: dict):
+        record["elapsed_s"] = round(self._elapsed(), 3)
+        self.steps.append(record)
+        if self.log is not None:
+            self.log(record)
+
+    def _over_budget(self) -> Optional[str]:
+        b = self.budget
+        if b.max_tokens is not None and self.tokens >= b.max_tokens:
+            return f"token budget {b.max_tokens} reached"
+        if b.max_seconds is not None and self._elapsed() >= b.max_seconds:
+            return f"time budget {b.max_seconds:g}s reached"
+        return None
+
+    def observe(self, event: dict) -> Optional[str]:
+        now = time.perf_counter()
+        for action in event.get("actions", []):
+            if self._planning:
+                self.step += 1
+                self._planning = False
+            key = _call_key(action)
+            self._emit({"event": "plan", "step": self.step, "tool": action.tool, "input": action.tool_input,
+                        "plan_s": round(now - self.mark, 3), "tokens": self.tokens})
+            self.calls_seen[key] = self.calls_seen.get(key, 0) + 1
+            if self.calls_seen[key] > self.budget.max_identical_calls:
+                return f"repeated call {action.tool}({action.tool_input!r})"
+            self.tool_calls += 1
+            if self.budget.max_tool_calls is not None and self.tool_calls > self.budget.max_tool_calls:
+                return f"tool call budget {self.budget.max_tool_calls} reached"
+            self.pending[key] = now
+        for step in event.get("steps", []):
+            started = self.pending.pop(_call_key(step.action), self.mark)
+            self.last_observation = step.observation
+            self._emit({"event": "tool", "step": self.step, "tool": step.action.tool,
+                        "tool_s": round(now - started, 3), "observation_chars": len(str(step.observation))})
+            self._planning = True
+        self.mark = now
+        return self._over_budget()
+
+    def finish(self, output, reason: str = None) -> dict:
+        self._emit({"event": "stopped" if reason else "finish", "reason": reason, "step": self.step,
+                    "tokens": self.tokens, "tool_calls": self.tool_calls})
+        return {
+            "output": f"Agent stopped early ({reason})." if reason else output,
+            "stopped": reason,
+            "last_observation": self.last_observation,
+            "tokens": self.tokens,
+            "tool_calls": self.tool_calls,
+            "elapsed_s": self._elapsed(),
+            "steps": self.steps,
+        }
+
+def run_with_budget(executor, inputs: dict, budget: Budget, config: dict = None, log=None) -> dict:
+    """executor.invoke with budget enforcement and a per-step cost log."""
+    ctl = BudgetController(budget, log)
+    stream = executor.stream(inputs, config=ctl.config(config))
+    try:
+        for event in stream:
+            if "output" in event:
+                return ctl.finish(event["output"])
+            reason = ctl.observe(event)
+            if reason:
+                return ctl.finish(None, reason)
+    finally:
+        stream.close()  # stops the executor before any further tool call
+    return ctl.finish(None, "no output")
+
+async def arun_with_budget(executor, inputs: dict, budget: Budget, config: dict = None, log=None) -> dict:
+    """Async run_with_budget (tool calls planned in one step run concurrently)."""
+    ctl = BudgetController(budget, log)
+    stream = executor.astream(inputs, config=ctl.config(config))
+    try:
+        async for event in stream:
+            if "output" in event:
+                return ctl.finish(event["output"])
+            reason = ctl.observe(event)
+            if reason:
+                return ctl.finish(None, reason)
+    finally:
+        await stream.aclose()
+    return ctl.finish(None, "no output")
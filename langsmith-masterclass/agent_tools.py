@@ -0,0 +1,150 @@
+# Pooled, sync + async versions of the tools used by the agent in 4_agent.py.
+#
+#   from agent_tools import search_tool, get_weather_data, build_tool_calling_executor
+#
+# Every weather lookup goes through one shared HTTP client instead of a bare
+# `requests.get`, so connections are kept alive between calls, every request has
+# a timeout, and transient failures (connection errors, 429, 5xx) are retried
+# with backoff. Each tool has a coroutine too. Under `AgentExecutor.ainvoke`, the
+# tool calls a model makes in one step run concurrently instead of one after another.
+# Results are cached per tool (tool_cache.py): repeated cities and queries within
+# the TTL, across steps and users, don't reach the network.
+#
+#   WEATHERSTACK_URL      endpoint (point it at a local stub for benchmarks)
+#   WEATHERSTACK_KEY      access key
+#   AGENT_HTTP_TIMEOUT    seconds per request (default 10)
+#   AGENT_HTTP_RETRIES    retries per request (default 3)
+#   AGENT_HTTP_POOL       max pooled connections per host (default 20)
+#   TOOL_CACHE_TTL_WEATHER / TOOL_CACHE_TTL_SEARCH
+#                         result cache TTL in seconds (default 600 / 3600, 0 = off)
+#   TOOL_CACHE_SIZE       entries per tool cache (default 1024)
+#
+# Async entry points await aclose_http_clients() before their event loop ends, so
+# the loop's keep-alive connections are closed rather than dropped.
+#
+# `python bench_agent_tools.py` compares the agent on a local stub weather server.
+
+import os
+import asyncio
+import weakref
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import StructuredTool
+from langchain_community.tools import DuckDuckGoSearchRun
+
+from tool_cache import cached_tool
+
+WEATHERSTACK_URL = os.environ.get("WEATHERSTACK_URL", "https://api.weatherstack.com/current")
+WEATHERSTACK_KEY = os.environ.get("WEATHERSTACK_KEY", "f07d9636974c4120025fadf60678771b")
+HTTP_TIMEOUT = float(os.environ.get("AGENT_HTTP_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.environ.get("AGENT_HTTP_RETRIES", "3"))
+HTTP_POOL = int(os.environ.get("AGENT_HTTP_POOL", "20"))
+WEATHER_TTL = float(os.environ.get("TOOL_CACHE_TTL_WEATHER", "600"))  # conditions change within minutes
+SEARCH_TTL = float(os.environ.get("TOOL_CACHE_TTL_SEARCH", "3600"))
+CACHE_SIZE = int(os.environ.get("TOOL_CACHE_SIZE", "1024"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF = 0.3  # seconds, doubled on every retry
+
+# ----------------- shared HTTP clients -----------------
+_session = None
+_session_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+def http_session() -> requests.Session:
+    """Process-wide keep-alive session with retries (requests sessions are thread-safe for GETs)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=HTTP_RETRIES, backoff_factor=BACKOFF, status_forcelist=RETRY_STATUSES,
+                          allowed_methods=frozenset({"GET"}), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL, pool_maxsize=HTTP_POOL, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def async_http_client() -> httpx.AsyncClient:
+    """Keep-alive httpx client for the running event loop (clients can't cross loops)."""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=HTTP_POOL, max_keepalive_connections=HTTP_POOL),
+            transport=httpx.AsyncHTTPTransport(retries=HTTP_RETRIES),  # connect errors only
+        )
+    return _async_clients[loop]
+
+async def aclose_http_clients():
+    """Close the running loop's httpx client; await it before the loop ends (asyncio.run entry points)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def get_json(url: str, params: dict = None) -> dict:
+    response = http_session().get(url, params=params, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+async def aget_json(url: str, params: dict = None) -> dict:
+    client = async_http_client()
+    for attempt in range(HTTP_RETRIES + 1):
+        response = await client.get(url, params=params)
+        if response.status_code not in RETRY_STATUSES or attempt == HTTP_RETRIES:
+            break
+        await asyncio.sleep(BACKOFF * 2 ** attempt)
+    response.raise_for_status()
+    return response.json()
+
+# ----------------- tools -----------------
+def _weather_params(city: str) -> dict:
+    return {"access_key": WEATHERSTACK_KEY, "query": city}
+
+def _get_weather_data(city: str) -> dict:
+    return get_json(WEATHERSTACK_URL, _weather_params(city))
+
+async def _aget_weather_data(city: str) -> dict:
+    return await aget_json(WEATHERSTACK_URL, _weather_params(city))
+
+weather_tool = StructuredTool.from_function(  # uncached
+    func=_get_weather_data,
+    coroutine=_aget_weather_data,
+    name="get_weather_data",
+    description="This function fetches the current weather data for a given city",
+)
+
+get_weather_data = cached_tool(ttl=WEATHER_TTL, maxsize=CACHE_SIZE)(weather_tool)
+
+# no native async: ainvoke runs the search on a worker thread
+search_tool = cached_tool(ttl=SEARCH_TTL, maxsize=CACHE_SIZE)(DuckDuckGoSearchRun())
+
+TOOLS = [search_tool, get_weather_data]
+
+# ----------------- executors -----------------
+TOOL_CALLING_SYSTEM = (
+    "You are a helpful assistant. Use the tools to look up anything you don't know. "
+    "When several lookups don't depend on each other, request them all in the same step."
+)
+
+def build_tool_calling_executor(llm, tools=None, **executor_kwargs):
+    """AgentExecutor over a tool-calling agent.
+
+    The ReAct text format allows one action per step. Native tool calling lets the
+    model ask for several at once, and `ainvoke` runs those calls concurrently.
+    """
+    tools = TOOLS if tools is None else tools
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", TOOL_CALLING_SYSTEM),
+        ("human", "{input}"),
+        ("placeholder", "{agent_scratchpad}"),
+    ])
+    agent = create_tool_calling_agent(llm, tools, prompt)
+    executor_kwargs.setdefault("max_iterations", 5)
+    return AgentExecutor(agent=agent, tools=tools, **executor_kwargs)
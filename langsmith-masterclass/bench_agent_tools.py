@@ -0,0 +1,175 @@
+# Pooled and concurrent agent tools (agent_tools.py) against a local stub weather server.
+#
+# The stub answers weatherstack-style requests after --server-latency seconds, and
+# it sleeps --handshake seconds on every new connection to stand in for the TCP +
+# TLS setup a remote API costs. The model is FakeToolCallingModel. It asks for the
+# weather in --cities cities in one step, then answers. Compared:
+#
+#   bare requests.get   the original 4_agent.py tool: new connection per call, run in order
+#   pooled, invoke      shared keep-alive session, AgentExecutor.invoke (still in order)
+#   pooled, ainvoke     httpx.AsyncClient, AgentExecutor.ainvoke (calls in a step run together)
+#   cached, ainvoke     the same plus the tool result cache (tool_cache.py), warm after run 1
+#
+# Finally --users identical questions arrive at once against a cold cache, to show
+# concurrent misses coalescing into one upstream call per city.
+#
+#   python bench_agent_tools.py
+#   python bench_agent_tools.py --cities 6 --server-latency 0.3 --runs 5
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from langchain_core.tools import tool
+
+from fake_llm import FakeToolCallingModel
+from tool_cache import clear_tool_caches, tool_cache_stats
+
+CITIES = ["Delhi", "Mumbai", "Chennai", "Kolkata", "Bengaluru", "Hyderabad", "Pune", "Jaipur"]
+
+# ----------------- stub weather server -----------------
+def start_stub_server(latency: float, handshake: float):
+    stats = {"connections": 0, "requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def setup(self):
+            super().setup()
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # no Nagle stall on keep-alive
+            with lock:
+                stats["connections"] += 1
+            time.sleep(handshake)
+
+        def do_GET(self):
+            city = parse_qs(urlparse(self.path).query).get("query", ["?"])[0]
+            time.sleep(latency)
+            body = json.dumps({
+                "request": {"type": "City", "query": city},
+                "current": {"temperature": 20 + len(city) % 15, "weather_descriptions": ["Haze"]},
+            }).encode()
+            with lock:
+                stats["requests"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+# ----------------- runs -----------------
+def bare_weather_tool(url: str):
+    @tool
+    def get_weather_data(city: str) -> str:
+        """This function fetches the current weather data for a given city"""
+        return requests.get(f"{url}?access_key=x&query={city}").json()
+    return get_weather_data
+
+def timed(fn, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agent tool latency: bare vs pooled vs concurrent.")
+    parser.add_argument("--cities", type=int, default=4, help="weather lookups the model asks for in one step")
+    parser.add_argument("--server-latency", type=float, default=0.2, help="seconds per stub response")
+    parser.add_argument("--handshake", type=float, default=0.05, help="simulated seconds per new connection")
+    parser.add_argument("--model-latency", type=float, default=0.1, help="seconds per fake model call")
+    parser.add_argument("--requests", type=int, default=20, help="sequential requests in the raw HTTP test")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--users", type=int, default=20, help="concurrent identical questions in the cache test")
+    args = parser.parse_args(argv)
+
+    server, stats = start_stub_server(args.server_latency, args.handshake)
+    url = f"http://127.0.0.1:{server.server_address[1]}/current"
+    os.environ["WEATHERSTACK_URL"] = url  # read by agent_tools at import
+    import agent_tools
+
+    # raw HTTP: a new connection per request vs one kept-alive connection
+    print(f"raw HTTP, {args.requests} sequential requests "
+          f"(server {args.server_latency * 1000:.0f} ms, handshake {args.handshake * 1000:.0f} ms)")
+    for label, get in (("requests.get", requests.get), ("pooled session", agent_tools.http_session().get)):
+        before = stats["connections"]
+        t0 = time.perf_counter()
+        for i in range(args.requests):
+            get(url, params={"query": CITIES[i % len(CITIES)]}, timeout=10).json()
+        per_call = (time.perf_counter() - t0) / args.requests
+        print(f"  {label:16} {per_call * 1000:7.1f} ms/request  {stats['connections'] - before:3d} connections")
+
+    # agent: one step with N independent weather calls, then the answer
+    cities = [CITIES[i % len(CITIES)] for i in range(args.cities)]
+    question = {"input": f"What is the current temperature in {', '.join(cities)}?"}
+    llm = FakeToolCallingModel(
+        latency=args.model_latency,
+        tool_plan=[[{"name": "get_weather_data", "args": {"city": c}} for c in cities]],
+    )
+    bare = agent_tools.build_tool_calling_executor(llm, [bare_weather_tool(url)])
+    pooled = agent_tools.build_tool_calling_executor(llm, [agent_tools.weather_tool])
+    cached = agent_tools.build_tool_calling_executor(llm, [agent_tools.get_weather_data])
+
+    async def concurrent_runs(executor):
+        times = []
+        try:
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                await executor.ainvoke(question)
+                times.append(time.perf_counter() - t0)
+        finally:
+            await agent_tools.aclose_http_clients()
+        return statistics.median(times)
+
+    floor = 2 * args.model_latency + args.server_latency
+    print(f"\nagent, {args.cities} weather lookups in one step, {args.model_latency * 1000:.0f} ms per model call "
+          f"(floor {floor:.2f} s)")
+    results = {
+        "bare requests.get": timed(lambda: bare.invoke(question), args.runs),
+        "pooled, invoke": timed(lambda: pooled.invoke(question), args.runs),
+        "pooled, ainvoke": asyncio.run(concurrent_runs(pooled)),
+        "cached, ainvoke": asyncio.run(concurrent_runs(cached)),  # first run fills the cache
+    }
+    baseline = results["bare requests.get"]
+    for label, seconds in results.items():
+        print(f"  {label:18} {seconds:6.2f} s/question  {baseline / seconds:4.1f}x")
+
+    # a burst of users asking the same question at once, cache cold: one upstream call per city
+    clear_tool_caches()
+    before, counted = stats["requests"], tool_cache_stats()["get_weather_data"]
+
+    async def burst():
+        try:
+            await asyncio.gather(*(cached.ainvoke(question) for _ in range(args.users)))
+        finally:
+            await agent_tools.aclose_http_clients()
+
+    t0 = time.perf_counter()
+    asyncio.run(burst())
+    weather = {k: v - counted[k] for k, v in tool_cache_stats()["get_weather_data"].items()}
+    print(f"\n{args.users} concurrent users, cold cache: {time.perf_counter() - t0:.2f} s, "
+          f"{stats['requests'] - before} upstream requests for {args.users * args.cities} lookups "
+          f"({weather['avoided']} avoided: {weather['hits']} hits, {weather['coalesced']} coalesced)")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+# Index load time: pickle-based FAISS.load_local vs chunk_store format v2 (3_rag_v4.py).
+#
+# Builds synthetic indices of --sizes chunks (random vectors, ~1 KB of text each),
+# saves each in both formats and reports the median load time, and the time to load
+# and run one k=4 search, over --runs cold loads.
+#
+#   python bench_index_load.py
+#   python bench_index_load.py --sizes 1000 100000 --dim 1536
+
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+import chunk_store
+from fake_llm import HashEmbeddings
+
+def build(n: int, dim: int, embeddings) -> FAISS:
+    rng = np.random.default_rng(0)
+    vs = FAISS(embeddings, faiss.IndexFlatL2(dim), InMemoryDocstore(), {})
+    texts = [f"chunk {i} " + "lorem ipsum dolor sit amet " * 37 for i in range(n)]
+    metadatas = [{"source": "synthetic.pdf", "page": i // 3} for i in range(n)]
+    vs.add_embeddings(zip(texts, rng.random((n, dim), dtype=np.float32).tolist()), metadatas)
+    return vs
+
+def timed(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FAISS.load_local vs chunk_store v2 load time.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    embeddings = HashEmbeddings(size=args.dim)
+    query = np.random.default_rng(1).random(args.dim, dtype=np.float32).tolist()
+    print(f"{'chunks':>8} {'format':8} {'load':>10} {'load+search':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            vs = build(n, args.dim, embeddings)
+            pickle_dir, v2_dir = Path(tmp) / f"pickle-{n}", Path(tmp) / f"v2-{n}"
+            vs.save_local(str(pickle_dir))
+            chunk_store.save(vs, v2_dir)
+            loaders = {
+                "pickle": lambda: FAISS.load_local(str(pickle_dir), embeddings, allow_dangerous_deserialization=True),
+                "v2": lambda: chunk_store.load(v2_dir, embeddings),
+            }
+            for name, load in loaders.items():
+                load_ms = timed(load, args.runs)
+                search_ms = timed(lambda: load().similarity_search_by_vector(query, k=4), args.runs)
+                print(f"{n:>8} {name:8} {load_ms:>8.1f}ms {search_ms:>10.1f}ms")
+
+if __name__ == "__main__":
+    sys.exit(main())
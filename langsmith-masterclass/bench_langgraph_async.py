@@ -0,0 +1,82 @@
+# Threaded vs async grading throughput for the UPSC evaluation graph (5_langgraph.py).
+#
+# Both graphs run against FakeChatModel with injected latency, so the numbers show
+# scheduling overhead only: `workflow.batch` (sync nodes on a thread pool) versus
+# `async_workflow.abatch` (ainvoke nodes on one event loop). Peak thread count is
+# reported alongside throughput: the threaded graph needs one blocked thread per
+# in-flight LLM call, the async graph needs none.
+#
+#   python bench_langgraph_async.py
+#   python bench_langgraph_async.py --essays 500 --latency 0.5 --concurrency 200
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+from contextlib import contextmanager
+
+from fake_llm import FakeChatModel
+from script_loader import load_script
+
+@contextmanager
+def peak_threads(result: dict):
+    stop = threading.Event()
+    result["peak"] = threading.active_count()
+
+    def sample():
+        while not stop.wait(0.01):
+            result["peak"] = max(result["peak"], threading.active_count())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield result
+    finally:
+        stop.set()
+        sampler.join()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Threaded vs async LangGraph essay grading.")
+    parser.add_argument("--essays", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--concurrency", type=int, default=100, help="graph runs in flight")
+    parser.add_argument("--llm-slots", type=int, default=None, help="process-wide LLM call cap (default 3 x concurrency)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")  # the lesson builds ChatOpenAI at import
+    os.environ["ESSAY_NODE_CACHE"] = ""  # measure model calls, not node-cache hits
+    os.environ["LLM_CACHE_PATH"] = ""    # ... or response-cache hits
+    lesson = load_script("5_langgraph.py")
+    fake = FakeChatModel(latency=args.latency)
+    lesson.model = fake
+    lesson.structured_model = fake.with_structured_output(lesson.EvaluationSchema)
+    # by default leave room for every branch of every in-flight run, so the cap
+    # doesn't throttle the comparison; pass --llm-slots to see its effect
+    lesson.MAX_CONCURRENT_LLM_CALLS = args.llm_slots or 3 * args.concurrency
+
+    essays = [f"{lesson.essay2}\n\n(variant {i})" for i in range(args.essays)]
+    inputs = [{"essay": e} for e in essays]
+    ideal = 2 * args.latency  # fan-out step + final_evaluation step
+
+    print(f"{args.essays} essays, {args.latency * 1000:.0f} ms per LLM call, "
+          f"concurrency={args.concurrency}, llm slots={lesson.MAX_CONCURRENT_LLM_CALLS}")
+
+    with peak_threads({}) as threads:
+        t0 = time.perf_counter()
+        lesson.workflow.batch(inputs, config={"max_concurrency": args.concurrency})
+        sync_s = time.perf_counter() - t0
+    print(f"threaded batch : {sync_s:6.2f} s  {args.essays / sync_s * 60:8.0f} essays/min  peak threads {threads['peak']}")
+
+    with peak_threads({}) as threads:
+        t0 = time.perf_counter()
+        results = asyncio.run(lesson.agrade_essays(essays, max_concurrency=args.concurrency))
+        async_s = time.perf_counter() - t0
+    print(f"async abatch   : {async_s:6.2f} s  {args.essays / async_s * 60:8.0f} essays/min  peak threads {threads['peak']}")
+
+    assert all("avg_score" in r for r in results)
+    print(f"speed-up {sync_s / async_s:.1f}x (per-essay floor is {ideal:.2f} s)")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Sequential vs streaming-windowed report + summary chain (2_sequential_chain.py).
+#
+# Runs against FakeChatModel with fixed token rates:
+#   report model   --report-tokens at --report-tps    (gpt-4o-mini writing the report)
+#   summary model  --summary-tokens at --summary-tps  (gpt-4o, full 5-point summary or merge)
+#   window model   --window-tokens at --summary-tps   (gpt-4o, a couple of bullets per window)
+# and reports time to first token and end-to-end latency for:
+#   sequential         prompt1 | model1 | parser | prompt2 | model2 | parser, streamed
+#   windowed           report streamed, windows summarized while it is written
+#   windowed + merge   the same plus one call condensing the bullets to five points
+#
+#   python bench_sequential_chain.py
+#   python bench_sequential_chain.py --report-tokens 1200 --window-chars 2000
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+from langchain_core.output_parsers import StrOutputParser
+
+from fake_llm import FakeChatModel
+from script_loader import load_script
+from streaming_chain import WINDOW_PROMPT, astream_windowed
+
+TOPIC = {"topic": "Observability and LangSmith"}
+
+async def sequential(chain) -> dict:
+    t0 = time.perf_counter()
+    first = None
+    async for _ in chain.astream(TOPIC):
+        first = first or time.perf_counter() - t0
+    return {"first_token_s": first, "total_s": time.perf_counter() - t0}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sequential vs streaming-windowed summary chain.")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds to first token, every call")
+    parser.add_argument("--report-tokens", type=int, default=600)
+    parser.add_argument("--report-tps", type=float, default=80)
+    parser.add_argument("--summary-tokens", type=int, default=150)
+    parser.add_argument("--window-tokens", type=int, default=40)
+    parser.add_argument("--summary-tps", type=float, default=40)
+    parser.add_argument("--window-chars", type=int, default=1500)
+    parser.add_argument("--overlap-chars", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")  # the lesson builds ChatOpenAI at import
+    lesson = load_script("2_sequential_chain.py")
+    report_model = FakeChatModel(latency=args.latency, tokens_per_sec=args.report_tps, reply_tokens=args.report_tokens)
+    summary_model = FakeChatModel(latency=args.latency, tokens_per_sec=args.summary_tps, reply_tokens=args.summary_tokens)
+    window_model = FakeChatModel(latency=args.latency, tokens_per_sec=args.summary_tps, reply_tokens=args.window_tokens)
+    str_parser = StrOutputParser()
+
+    chain = lesson.prompt1 | report_model | str_parser | lesson.prompt2 | summary_model | str_parser
+    report_chain = lesson.prompt1 | report_model | str_parser
+    window_chain = WINDOW_PROMPT | window_model | str_parser
+    merge_chain = lesson.prompt2 | summary_model | str_parser
+
+    async def windowed(merge: bool) -> dict:
+        result = await astream_windowed(
+            report_chain, window_chain, TOPIC, window_chars=args.window_chars,
+            overlap_chars=args.overlap_chars, merge_chain=merge_chain if merge else None,
+        )
+        return {**result["timings"], "windows": result["windows"]}
+
+    report_s = args.latency + args.report_tokens / args.report_tps
+    print(f"report {args.report_tokens} tok @ {args.report_tps:g} tok/s (~{report_s:.1f} s), "
+          f"summary {args.summary_tokens} tok / window {args.window_tokens} tok @ {args.summary_tps:g} tok/s")
+    runs = {
+        "sequential": asyncio.run(sequential(chain)),
+        "windowed": asyncio.run(windowed(merge=False)),
+        "windowed + merge": asyncio.run(windowed(merge=True)),
+    }
+    base = runs["sequential"]["total_s"]
+    print(f"{'mode':18} {'first token':>11} {'total':>7} {'vs seq':>7}")
+    for mode, r in runs.items():
+        extra = f"  ({r['windows']} windows)" if "windows" in r else ""
+        print(f"{mode:18} {r['first_token_s']:>10.2f}s {r['total_s']:>6.2f}s {base / r['total_s']:>6.2f}x{extra}")
+
+if __name__ == "__main__":
+    sys.exit(main())
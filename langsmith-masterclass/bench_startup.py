@@ -0,0 +1,84 @@
+# Startup benchmark for the RAG entry points.
+#
+# Imports each script (without running its __main__ block) in a fresh interpreter
+# under `python -X importtime`, sums the per-module self times and compares the
+# total against a budget. Also fails if a module that should load lazily shows
+# up at import time (pypdf / FAISS / langchain_openai belong to the build/query path).
+#
+#   python bench_startup.py
+#   python bench_startup.py --runs 5 --budget-ms 600 3_rag_v4.py
+
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+# import-time budget per entry point, in milliseconds (median of --runs)
+BUDGETS_MS = {
+    "3_rag_v3.py": 700,
+    "3_rag_v4.py": 700,
+}
+
+# top-level packages that must not be imported before they are needed
+LAZY_MODULES = ("pypdf", "faiss", "langchain_openai", "langchain_community", "openai")
+
+_IMPORT_SNIPPET = """
+import importlib.util, sys
+sys.path.insert(0, {here!r})
+spec = importlib.util.spec_from_file_location("startup_probe", {path!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+"""
+
+def measure_import(script: Path):
+    """Return (total self time in ms, set of imported top-level packages) for one cold import."""
+    code = _IMPORT_SNIPPET.format(here=str(HERE), path=str(script))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {script.name} failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        # "import time:       196 |      10278 | langsmith"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        imported.add(name.strip().split(".")[0])
+    return total_us / 1000, imported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track -X importtime totals against a budget.")
+    parser.add_argument("scripts", nargs="*", default=list(BUDGETS_MS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=None, help="override the per-script budget")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.scripts:
+        timings, imported = [], set()
+        for _ in range(args.runs):
+            ms, imported = measure_import(HERE / name)
+            timings.append(ms)
+        median = statistics.median(timings)
+        budget = args.budget_ms or BUDGETS_MS.get(name, 700)
+        eager = sorted(m for m in LAZY_MODULES if m in imported)
+
+        status = "ok"
+        if median > budget or eager:
+            status, failed = "FAIL", True
+        print(f"{status:4}  {name:16} import {median:7.1f} ms (budget {budget:.0f} ms, runs={args.runs})")
+        if eager:
+            print(f"      eagerly imported: {', '.join(eager)}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
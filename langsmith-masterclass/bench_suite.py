@@ -0,0 +1,208 @@
+# End-to-end benchmark suite for the lesson pipelines, on the local fake backend.
+#
+# Runs every scenario against LLM_BACKEND=fake (FakeChatModel + HashEmbeddings, see
+# llm_clients.py), so it needs no API key or network and its numbers only move when
+# our own code does:
+#   simple       1_simple_llm_call.py   prompt | model | parser
+#   sequential   2_sequential_chain.py  report, then summary
+#   rag_build    3_rag_v4.py            setup_pipeline(force_rebuild=True) on a generated PDF
+#   rag_query    3_rag_v4.py            retrieval + answer on the built index
+#   langgraph    5_langgraph.py         fan-out essay evaluation (node cache off)
+#
+# Each scenario runs --runs times with --concurrency calls in flight (rag_build always
+# runs one at a time). Reported: throughput and p50 / p95 / p99 latency. Results are
+# compared with bench_baselines.json. A scenario regresses when its p95 is more than
+# --tolerance above the baseline or its throughput that much below it; any regression
+# exits 1.
+#
+#   python bench_suite.py
+#   python bench_suite.py --only rag_build rag_query --runs 50
+#   python bench_suite.py --update-baseline            # after an intended change
+#
+# Fake model timing: FAKE_LLM_LATENCY (default here 0.05 s), FAKE_LLM_TPS, FAKE_EMBED_LATENCY.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = Path(__file__).resolve().parent
+BASELINES = HERE / "bench_baselines.json"
+
+WORDS = ("statistical learning regression tree forest boosting lasso ridge model data bias "
+         "variance classification clustering validation bootstrap kernel margin").split()
+
+# ----------------- fixture PDF -----------------
+def write_pdf(path: Path, pages: list):
+    """Minimal text-only PDF (Helvetica, one content stream per page) that PyPDFLoader can read."""
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objs.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font_id = 3 + 2 * len(pages)
+    for i, text in enumerate(pages):
+        lines = [text[j:j + 80] for j in range(0, len(text), 80)]
+        stream = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                    f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode())
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+    objs.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out, offsets = b"%PDF-1.4\n", []
+    for n, obj in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{o:010d} 00000 n \n".encode() for o in offsets)
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(out)
+
+def fixture_pages(n_pages: int, words_per_page: int = 400) -> list:
+    rng = random.Random(0)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_page)) for _ in range(n_pages)]
+
+# ----------------- measurement -----------------
+def percentile(samples: list, p: int) -> float:
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+def measure(fn, runs: int, concurrency: int) -> dict:
+    """Call fn(i) for i in range(runs), `concurrency` at a time; latency stats in ms."""
+    def timed(i):
+        t0 = time.perf_counter()
+        fn(i)
+        return (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(runs)))
+    wall = time.perf_counter() - t0
+    return {
+        "runs": runs,
+        "throughput_per_s": round(runs / wall, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+# ----------------- scenarios -----------------
+def scenarios(workdir: Path, pdf_pages: int) -> dict:
+    """name -> (setup() -> fn(i), serial?). Lessons are loaded on first use."""
+    from script_loader import load_script
+
+    def simple():
+        chain = load_script("1_simple_llm_call.py").chain
+        return lambda i: chain.invoke({"question": f"What is the capital of country #{i}?"})
+
+    def sequential():
+        chain = load_script("2_sequential_chain.py").chain
+        return lambda i: chain.invoke({"topic": f"Observability topic #{i}"})
+
+    def rag_lesson():
+        lesson = load_script("3_rag_v4.py")
+        lesson.INDEX_ROOT = workdir / "indices"
+        lesson.INDEX_ROOT.mkdir(exist_ok=True)
+        lesson.CORPUS_REGISTRY = lesson.INDEX_ROOT / "registry.json"
+        pdf = workdir / "fixture.pdf"
+        if not pdf.exists():
+            write_pdf(pdf, fixture_pages(pdf_pages))
+        return lesson, str(pdf)
+
+    def rag_build():
+        lesson, pdf = rag_lesson()
+        return lambda i: lesson.setup_pipeline(pdf, force_rebuild=True)
+
+    def rag_query():
+        lesson, pdf = rag_lesson()
+        retriever = lesson.setup_pipeline(pdf).as_retriever(search_kwargs={"k": 4})
+        chain = lesson.build_qa_chain(retriever)
+        return lambda i: chain.invoke(f"How does {WORDS[i % len(WORDS)]} affect variance?")
+
+    def langgraph():
+        lesson = load_script("5_langgraph.py")
+        essays = [lesson.essay2 + f"\n\n(variant {i})" for i in range(16)]  # distinct prompts
+        return lambda i: lesson.workflow.invoke({"essay": essays[i % len(essays)]})
+
+    return {
+        "simple": (simple, False),
+        "sequential": (sequential, False),
+        "rag_build": (rag_build, True),
+        "rag_query": (rag_query, False),
+        "langgraph": (langgraph, False),
+    }
+
+# ----------------- baselines -----------------
+def compare(name: str, result: dict, baseline: dict, tolerance: float) -> list:
+    problems = []
+    if result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance):
+        problems.append(f"p95 {result['p95_ms']:.1f} ms vs baseline {baseline['p95_ms']:.1f} ms")
+    if result["throughput_per_s"] < baseline["throughput_per_s"] * (1 - tolerance):
+        problems.append(f"throughput {result['throughput_per_s']:.2f}/s vs baseline {baseline['throughput_per_s']:.2f}/s")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end lesson benchmarks on the fake backend.")
+    parser.add_argument("--only", nargs="*", help="scenario names to run (default: all)")
+    parser.add_argument("--runs", type=int, default=40, help="calls per scenario")
+    parser.add_argument("--build-runs", type=int, default=5, help="calls for rag_build")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pdf-pages", type=int, default=30)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 / throughput drift")
+    parser.add_argument("--baseline", type=Path, default=BASELINES)
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    # before any lesson (or llm_clients) is imported
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["ESSAY_NODE_CACHE"] = ""          # measure the graph, not the node cache
+    os.environ["LLM_CACHE_PATH"] = ""            # ... nor replayed responses
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    os.environ.setdefault("FAKE_LLM_LATENCY", "0.05")
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    settings = {"runs": args.runs, "build_runs": args.build_runs, "concurrency": args.concurrency,
+                "pdf_pages": args.pdf_pages, "fake_llm_latency": float(os.environ["FAKE_LLM_LATENCY"])}
+    if stored and stored.get("settings") != settings:
+        print(f"note: baseline was recorded with {stored.get('settings')}, this run uses {settings}")
+
+    results, regressions = {}, {}
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # lessons write .indices/ and friends relative to the cwd
+        try:
+            for name, (setup, serial) in scenarios(Path(tmp), args.pdf_pages).items():
+                if args.only and name not in args.only:
+                    continue
+                fn = setup()
+                fn(0)  # warm-up: imports, index load, first-call overhead
+                runs = args.build_runs if serial else args.runs
+                results[name] = r = measure(fn, runs, 1 if serial else args.concurrency)
+                base = stored.get("scenarios", {}).get(name)
+                problems = compare(name, r, base, args.tolerance) if base else []
+                if problems:
+                    regressions[name] = problems
+                status = "FAIL" if problems else ("ok" if base else "new")
+                print(f"{status:4}  {name:11} {r['throughput_per_s']:8.2f}/s  p50 {r['p50_ms']:8.1f} ms  "
+                      f"p95 {r['p95_ms']:8.1f} ms  p99 {r['p99_ms']:8.1f} ms  (runs={r['runs']})", flush=True)
+                for problem in problems:
+                    print(f"      {problem}")
+        finally:
+            os.chdir(cwd)
+
+    if args.update_baseline:
+        merged = {**stored.get("scenarios", {}), **results}
+        args.baseline.write_text(json.dumps({"settings": settings, "scenarios": merged}, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
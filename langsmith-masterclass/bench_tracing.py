@@ -0,0 +1,93 @@
+# Overhead of tracing.traceable at 0%, 1% and 100% head sampling.
+#
+# Runs a retrieval-shaped function (question in, list of Documents out) against a
+# local stub LangSmith endpoint, so serialization + batched upload are real but
+# nothing leaves the machine. Reports wall and process-CPU time per call, with the
+# undecorated function as the baseline; the final client flush is included so the
+# background export cost is counted.
+#
+#   python bench_tracing.py
+#   python bench_tracing.py --calls 5000 --docs 50 --payload truncate
+
+import os
+import sys
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.documents import Document
+
+class _StubLangSmith(BaseHTTPRequestHandler):
+    received_bytes = 0
+
+    def _ok(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+            _StubLangSmith.received_bytes += length
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = _ok
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubLangSmith)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run(fn, calls: int, question: str, docs: list, flush=None):
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for _ in range(calls):
+        fn(question, docs)
+    if flush:
+        flush()
+    return (time.perf_counter() - wall0) / calls * 1e6, (time.process_time() - cpu0) / calls * 1e6
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--docs", type=int, default=20, help="documents returned per call")
+    parser.add_argument("--doc-chars", type=int, default=1000)
+    parser.add_argument("--payload", default="full", choices=["full", "truncate", "hash"])
+    args = parser.parse_args(argv)
+
+    server = start_stub_server()
+    os.environ["LANGSMITH_TRACING"] = "true"
+    os.environ["LANGSMITH_ENDPOINT"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["LANGSMITH_API_KEY"] = "bench"
+    os.environ["TRACE_PAYLOAD"] = args.payload
+
+    import tracing  # after the env is set: it reads TRACE_* at import time
+
+    docs = [Document(page_content="x" * args.doc_chars, metadata={"page": i}) for i in range(args.docs)]
+    question = "What is the bias-variance trade-off?"
+
+    def retrieve(q, documents):
+        return documents
+
+    client = tracing.get_client()  # created up front so its startup isn't billed to one row
+    base_wall, base_cpu = run(retrieve, args.calls, question, docs)
+    print(f"payload={args.payload} calls={args.calls} docs/call={args.docs}x{args.doc_chars} chars")
+    print(f"{'sampling':>9} {'wall us/call':>13} {'cpu us/call':>12} {'overhead':>10}")
+    print(f"{'none':>9} {base_wall:13.1f} {base_cpu:12.1f} {'-':>10}")
+
+    for rate in (0.0, 0.01, 1.0):
+        traced = tracing.traceable(name="retrieve", run_type="retriever", sample_rate=rate)(retrieve)
+        run(traced, 20, question, docs, flush=client.flush)  # warm-up: langsmith imports lazily on first use
+        wall, cpu = run(traced, args.calls, question, docs, flush=client.flush)
+        print(f"{rate:>8.0%} {wall:13.1f} {cpu:12.1f} {wall - base_wall:+9.1f}us")
+
+    print(f"\nsampled={tracing.stats['sampled']} unsampled={tracing.stats['unsampled']} "
+          f"dropped={tracing.stats['dropped']} uploaded={_StubLangSmith.received_bytes / 1e6:.1f} MB")
+    server.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# On-disk format for the FAISS indices in .indices/ (3_rag_v4.py), without pickle.
+#
+#   chunk_store.save(vs, index_dir)                  # vs: a langchain FAISS vectorstore
+#   vs = chunk_store.load(index_dir, embeddings)     # same retrieval API, nothing unpickled
+#
+# FAISS.save_local / load_local pickle the whole docstore: every chunk's text and
+# metadata is decoded at startup, and loading a shared index runs whatever code the
+# pickle contains. Format v2 keeps no Python objects on disk:
+#   index.faiss    the vectors (faiss.write_index), memory-mapped on load
+#   chunks.bin     one JSON record {"text", "metadata"} per vector, back to back
+#   offsets.npy    uint64 byte offsets into chunks.bin (n + 1 of them), memory-mapped
+# Vector i is chunk i. A search decodes only the records it returns, so load time
+# hardly grows with the number of chunks. `python bench_index_load.py` compares it
+# with load_local.
+
+import json
+import mmap
+from collections.abc import Mapping
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+FORMAT = "v2"
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "offsets.npy"
+
+# map the vectors instead of copying them in (flag missing from older faiss builds)
+_READ_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+class PositionIds(Mapping):
+    """index_to_docstore_id for v2 stores: vector i is chunk str(i), no dict to build."""
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise KeyError(i)
+        return str(i)
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(range(self.n))
+
+class ChunkDocstore(Docstore):
+    """Read-only docstore over chunks.bin; a record is decoded only when it is looked up."""
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        self.offsets = np.load(index_dir / OFFSETS_FILE, mmap_mode="r")
+        with open(index_dir / CHUNKS_FILE, "rb") as f:
+            # mmap of an empty file fails; an index with no chunks never reads it
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def search(self, search: str):
+        try:
+            i = int(search)
+        except ValueError:
+            return f"ID {search} not found."
+        if not 0 <= i < len(self):
+            return f"ID {search} not found."
+        record = json.loads(self.data[int(self.offsets[i]):int(self.offsets[i + 1])])
+        return Document(id=search, page_content=record["text"], metadata=record["metadata"])
+
+def save(vs: FAISS, index_dir: Path):
+    """Write `vs` in format v2 (the docstore in vector order)."""
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    offsets = [0]
+    with open(index_dir / CHUNKS_FILE, "wb") as f:
+        for i in range(vs.index.ntotal):
+            doc = vs.docstore.search(vs.index_to_docstore_id[i])
+            record = json.dumps({"text": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False, default=str)
+            offsets.append(offsets[-1] + f.write(record.encode("utf-8")))
+    np.save(index_dir / OFFSETS_FILE, np.asarray(offsets, dtype=np.uint64))
+    faiss.write_index(vs.index, str(index_dir / INDEX_FILE))
+
+def load(index_dir: Path, embeddings) -> FAISS:
+    """Open a v2 index: vectors and chunk offsets are memory-mapped, no text is decoded."""
+    index_dir = Path(index_dir)
+    index = faiss.read_index(str(index_dir / INDEX_FILE), _READ_FLAGS)
+    docstore = ChunkDocstore(index_dir)
+    if len(docstore) != index.ntotal:
+        raise ValueError(f"{index_dir}: {index.ntotal} vectors but {len(docstore)} chunks")
+    return FAISS(embeddings, index, docstore, PositionIds(index.ntotal))
+
+def is_v2(index_dir: Path) -> bool:
+    return all((Path(index_dir) / name).exists() for name in (INDEX_FILE, CHUNKS_FILE, OFFSETS_FILE))
@@ -0,0 +1,112 @@
+# Compare the fan-out grading graph with the single-call modes in 5_langgraph.py.
+#
+# For each mode, grades the same essays and reports LLM calls, input/output tokens,
+# latency per essay and how closely the scores agree with the fan-out graph
+# (mean absolute difference per dimension, share within ±1, and avg_score drift).
+#
+#   python compare_grading_modes.py                       # essay2 only, real model
+#   python compare_grading_modes.py essays.jsonl --limit 20
+#   python compare_grading_modes.py --fake --latency 0.3  # plumbing check, no API key
+#
+# Essays files use the essay_batch.py format (JSONL/CSV with an `essay` field).
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+
+from script_loader import load_script
+
+MODES = ("fanout", "single+summary", "single")
+DIMENSIONS = ("language", "analysis", "clarity")
+
+def use_fake_model(lesson, latency: float):
+    from fake_llm import FakeChatModel
+
+    fake = FakeChatModel(latency=latency)
+    lesson.model = fake
+    lesson.structured_model = fake.with_structured_output(lesson.EvaluationSchema)
+    lesson.combined_model = fake.with_structured_output(lesson.CombinedEvaluationSchema)
+    lesson.combined_summary_model = fake.with_structured_output(lesson.CombinedEvaluationWithSummarySchema)
+
+class UsageAndCalls(UsageMetadataCallbackHandler):
+    """Token usage per model plus a count of chat model calls."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+def grade(workflow, essays: list) -> dict:
+    usage = UsageAndCalls()
+    results, latencies = [], []
+    for essay in essays:
+        t0 = time.perf_counter()
+        results.append(workflow.invoke({"essay": essay}, config={"callbacks": [usage]}))
+        latencies.append(time.perf_counter() - t0)
+    return {
+        "results": results,
+        "latencies": latencies,
+        "calls": usage.calls,
+        "tokens_in": sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values()),
+        "tokens_out": sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values()),
+    }
+
+def agreement(reference: list, candidate: list) -> dict:
+    """Score agreement of `candidate` with the fan-out `reference`, per dimension."""
+    out = {}
+    for dim in DIMENSIONS:
+        # by name: the fan-out graph's individual_scores come in branch-merge order
+        diffs = [abs(r["dimension_scores"][dim] - c["dimension_scores"][dim]) for r, c in zip(reference, candidate)]
+        out[dim] = (statistics.mean(diffs), sum(d <= 1 for d in diffs) / len(diffs))
+    out["avg_score"] = statistics.mean(abs(r["avg_score"] - c["avg_score"]) for r, c in zip(reference, candidate))
+    return out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tokens, latency and score agreement per grading mode.")
+    parser.add_argument("essays", type=Path, nargs="?", help="JSONL/CSV of essays (default: the sample essay)")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--fake", action="store_true", help="use FakeChatModel instead of OpenAI")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency in seconds")
+    args = parser.parse_args(argv)
+
+    if args.fake:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-fake")  # the lesson builds ChatOpenAI at import
+    os.environ["ESSAY_NODE_CACHE"] = ""  # every mode must actually call the model
+    os.environ["LLM_CACHE_PATH"] = ""
+    lesson = load_script("5_langgraph.py")
+    if args.fake:
+        use_fake_model(lesson, args.latency)
+
+    if args.essays:
+        from essay_batch import read_essays
+        essays = [essay for _, essay in read_essays(args.essays)][: args.limit]
+    else:
+        essays = [lesson.essay2]
+
+    runs = {mode: grade(lesson.WORKFLOWS[mode], essays) for mode in MODES}
+    n = len(essays)
+
+    print(f"{n} essays{' (fake model)' if args.fake else ''}\n")
+    print("per essay:")
+    print(f"{'mode':16} {'calls':>6} {'tok in':>9} {'tok out':>9} {'p50 s':>7} {'mean s':>7}")
+    for mode, run in runs.items():
+        lat = run["latencies"]
+        print(f"{mode:16} {run['calls'] / n:>6.1f} {run['tokens_in'] / n:>9.0f} {run['tokens_out'] / n:>9.0f} "
+              f"{statistics.median(lat):>7.2f} {statistics.mean(lat):>7.2f}")
+
+    print("\nscore agreement with fanout (mean |diff|, share within ±1)")
+    for mode in MODES[1:]:
+        agg = agreement(runs["fanout"]["results"], runs[mode]["results"])
+        dims = "  ".join(f"{d} {agg[d][0]:.2f}/{agg[d][1]:.0%}" for d in DIMENSIONS)
+        print(f"{mode:16} {dims}  avg_score drift {agg['avg_score']:.2f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# Batch grading for the UPSC evaluation graph in 5_langgraph.py.
+#
+#   python essay_batch.py essays.jsonl --out results.jsonl
+#   python essay_batch.py essays.csv --out results.jsonl --parallel 100
+#
+# Input: JSONL with {"id": ..., "essay": ...} per line, or CSV with `id` and `essay`
+# columns. `id` is optional; without it the essay text hash is used, so reruns over
+# the same file line up with earlier results.
+#
+# Essays are streamed in and graded `--parallel` at a time on the async graph. Every
+# graph run is checkpointed per essay (thread_id = essay id) in a SQLite database
+# via langgraph-checkpoint-sqlite, and each finished result is appended to --out
+# straight away. Rerunning the same command resumes a partial run:
+#   - ids already in --out are skipped
+#   - runs that finished but were never written are recovered from the checkpoint
+#   - runs interrupted mid-graph continue from their last checkpoint, so finished
+#     dimensions are not graded again
+# The lesson's node cache (ESSAY_NODE_CACHE) also applies, so an essay already
+# graded under another id, or in another file, costs no model calls.
+
+import csv
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from pathlib import Path
+
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from script_loader import load_script
+
+RESULT_FIELDS = (
+    "language_feedback", "analysis_feedback", "clarity_feedback",
+    "overall_feedback", "individual_scores", "dimension_scores", "avg_score",
+)
+
+# ----------------- input / output -----------------
+def _essay_id(record: dict) -> str:
+    if record.get("id") not in (None, ""):
+        return str(record["id"])
+    return hashlib.sha256(record["essay"].encode("utf-8")).hexdigest()[:16]
+
+def read_essays(path: Path):
+    """Yield (essay_id, essay) without loading the whole file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            yield _essay_id(row), row["essay"]
+
+def finished_ids(out_path: Path) -> set:
+    if not out_path.exists():
+        return set()
+    done = set()
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (json.JSONDecodeError, KeyError):
+                continue  # torn last line from a crash; that essay is regraded/recovered
+    return done
+
+# ----------------- grading -----------------
+async def grade_one(workflow, essay_id: str, essay: str) -> tuple:
+    """Grade one essay, resuming from its checkpoint if there is one. -> (state, source)"""
+    config = {
+        "configurable": {"thread_id": essay_id},
+        "run_name": "evaluate_upsc_essay",
+        "tags": ["essay", "langgraph", "evaluation", "batch"],
+        "metadata": {"essay_id": essay_id, "essay_length": len(essay)},
+    }
+    snapshot = await workflow.aget_state(config)
+    if snapshot.next:
+        return await workflow.ainvoke(None, config=config), "resumed"  # continue mid-graph
+    if "avg_score" in snapshot.values:
+        return snapshot.values, "recovered"  # finished before the crash, never written out
+    return await workflow.ainvoke({"essay": essay}, config=config), "graded"
+
+async def run_batch(
+    in_path: Path,
+    out_path: Path,
+    checkpoint_path: Path,
+    parallel: int = 50,
+    report_every: int = 50,
+):
+    lesson = load_script("5_langgraph.py")
+    skip = finished_ids(out_path)
+    stats = {"graded": 0, "resumed": 0, "recovered": 0, "skipped": 0, "failed": 0}
+    started = time.perf_counter()
+
+    async with AsyncSqliteSaver.from_conn_string(str(checkpoint_path)) as checkpointer:
+        workflow = lesson.build_graph(
+            lesson.aevaluate_language, lesson.aevaluate_analysis,
+            lesson.aevaluate_thought, lesson.afinal_evaluation,
+        ).compile(checkpointer=checkpointer, cache=lesson.node_cache())  # resubmitted essays reuse node results
+
+        queue = asyncio.Queue(maxsize=parallel * 2)  # bounded: the reader never runs far ahead
+        out = open(out_path, "a", encoding="utf-8")
+
+        def report(final=False):
+            done = stats["graded"] + stats["resumed"] + stats["recovered"]
+            minutes = (time.perf_counter() - started) / 60
+            rate = done / minutes if minutes else 0.0
+            label = "done" if final else "progress"
+            print(f"[{label}] {done} graded ({stats['resumed']} resumed, {stats['recovered']} recovered), "
+                  f"{stats['skipped']} skipped, {stats['failed']} failed, {rate:.1f} essays/min", flush=True)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                essay_id, essay = item
+                t0 = time.perf_counter()
+                try:
+                    state, source = await grade_one(workflow, essay_id, essay)
+                except Exception as e:  # leave it out of --out so the next run retries it
+                    stats["failed"] += 1
+                    print(f"✗ {essay_id}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                    continue
+                record = {"id": essay_id, **{k: state.get(k) for k in RESULT_FIELDS},
+                          "elapsed_s": round(time.perf_counter() - t0, 3)}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats[source] += 1
+                if sum(stats[k] for k in ("graded", "resumed", "recovered")) % report_every == 0:
+                    report()
+
+        workers = [asyncio.create_task(worker()) for _ in range(parallel)]
+        try:
+            for essay_id, essay in read_essays(in_path):
+                if essay_id in skip:
+                    stats["skipped"] += 1
+                    continue
+                skip.add(essay_id)  # duplicate ids in the input are graded once
+                await queue.put((essay_id, essay))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            out.close()
+
+    report(final=True)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade essays from a JSONL/CSV file with resumable checkpoints.")
+    parser.add_argument("input", type=Path, help="essays .jsonl or .csv")
+    parser.add_argument("--out", type=Path, default=Path("essay_results.jsonl"))
+    parser.add_argument("--checkpoint", type=Path, default=Path(".essay_checkpoints.sqlite"))
+    parser.add_argument("--parallel", type=int, default=50, help="essays graded concurrently")
+    parser.add_argument("--report-every", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(run_batch(args.input, args.out, args.checkpoint, args.parallel, args.report_every))
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# Local stand-in for ChatOpenAI so the lessons can be benchmarked without an API key.
+#
+#   model = FakeChatModel(latency=0.2, tokens_per_sec=50)
+#   model.invoke("hi")                                   # AIMessage after ~latency + tokens/tps
+#   model.with_structured_output(EvaluationSchema).invoke("...")   # deterministic schema instance
+#   FakeToolCallingModel(tool_plan=[[...]])              # scripted tool calls for agent benchmarks
+#   HashEmbeddings(size=1536).embed_query("...")         # deterministic bag-of-words vectors
+#
+# Responses are derived from a hash of the prompt, so the same input always gives
+# the same output. Sync calls block with time.sleep, async calls with asyncio.sleep.
+
+import re
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+def _prompt_text(messages) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+def fake_payload(schema, prompt: str) -> dict:
+    """Deterministic field values for a pydantic schema (str / int / float / bool fields)."""
+    seed = _digest(prompt)
+    payload = {}
+    for i, (name, field) in enumerate(schema.model_fields.items()):
+        h = (seed >> (i % 48)) + i
+        lo = hi = None
+        for c in field.metadata:  # Field(ge=..., le=...) constraints
+            lo = getattr(c, "ge", lo)
+            hi = getattr(c, "le", hi)
+        if field.annotation is int:
+            lo, hi = (lo if lo is not None else 0), (hi if hi is not None else 10)
+            payload[name] = lo + h % (hi - lo + 1)
+        elif field.annotation is float:
+            payload[name] = round((h % 1000) / 100, 2)
+        elif field.annotation is bool:
+            payload[name] = bool(h % 2)
+        else:
+            payload[name] = f"Fake {name.replace('_', ' ')} #{seed % 10_000}."
+    return payload
+
+class HashEmbeddings(Embeddings):
+    """Hashing-trick bag-of-words embeddings: no model, no network, same text -> same vector.
+
+    Texts that share words get similar vectors, so retrieval still returns related
+    chunks. Useful for exercising FAISS builds and queries at realistic dimensions.
+    """
+
+    def __init__(self, size: int = 1536, latency: float = 0.0):
+        self.size = size
+        self.latency = latency  # seconds per embed_documents / embed_query call
+
+    def _embed(self, text: str) -> list:
+        vec = np.zeros(self.size, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+            vec[h % self.size] += 1.0 if h >> 63 else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        time.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        time.sleep(self.latency)
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: list) -> list:
+        await asyncio.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> list:
+        await asyncio.sleep(self.latency)
+        return self._embed(text)
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with configurable latency and token rate and a hash-derived reply."""
+
+    latency: float = 0.0                   # seconds before the first token
+    tokens_per_sec: Optional[float] = None  # None -> whole reply arrives at once
+    reply_tokens: int = 40                  # length of free-text replies
+    model_name: str = "fake-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name, "latency": self.latency, "tokens_per_sec": self.tokens_per_sec}
+
+    # ----------------- reply construction -----------------
+    def _reply_tokens(self, prompt: str, schema=None) -> list:
+        if schema is not None:
+            return [json.dumps(fake_payload(schema, prompt))]
+        seed = _digest(prompt)
+        return [f"tok{(seed + i) % 997} " for i in range(self.reply_tokens)]
+
+    def _generation_time(self, tokens: list) -> float:
+        if not self.tokens_per_sec:
+            return self.latency
+        return self.latency + len(tokens) / self.tokens_per_sec
+
+    def _message(self, prompt: str, tokens: list) -> AIMessage:
+        n_in, n_out = len(prompt.split()), len(tokens)
+        return AIMessage(
+            content="".join(tokens),
+            usage_metadata={"input_tokens": n_in, "output_tokens": n_out, "total_tokens": n_in + n_out},
+            response_metadata={"model_name": self.model_name},
+        )
+
+    # ----------------- BaseChatModel hooks -----------------
+    def _generate(self, messages, stop=None, run_manager=None, fake_schema=None, **kwargs) -> ChatResult:
+        prompt = _prompt_text(messages)
+        tokens = self._reply_tokens(prompt, fake_schema)
+        time.sleep(self._generation_time(tokens))
+        return ChatResult(generations=[ChatGeneration(message=self._message(prompt, tokens))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, fake_schema=None, **kwargs) -> ChatResult:
+        prompt = _prompt_text(messages)
+        tokens = self._reply_tokens(prompt, fake_schema)
+        await asyncio.sleep(self._generation_time(tokens))
+        return ChatResult(generations=[ChatGeneration(message=self._message(prompt, tokens))])
+
+    def _chunk(self, prompt: str, tokens: list, i: int) -> ChatGenerationChunk:
+        if i < len(tokens) - 1:
+            return ChatGenerationChunk(message=AIMessageChunk(content=tokens[i]))
+        full = self._message(prompt, tokens)  # usage on the last chunk, like stream_usage=True
+        return ChatGenerationChunk(message=AIMessageChunk(
+            content=tokens[i], usage_metadata=full.usage_metadata, response_metadata=full.response_metadata))
+
+    def _stream(self, messages, stop=None, run_manager=None, fake_schema=None, **kwargs):
+        prompt = _prompt_text(messages)
+        tokens = self._reply_tokens(prompt, fake_schema)
+        time.sleep(self.latency)
+        for i, tok in enumerate(tokens):
+            if self.tokens_per_sec:
+                time.sleep(1 / self.tokens_per_sec)
+            chunk = self._chunk(prompt, tokens, i)
+            if run_manager:
+                run_manager.on_llm_new_token(tok, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, fake_schema=None, **kwargs):
+        prompt = _prompt_text(messages)
+        tokens = self._reply_tokens(prompt, fake_schema)
+        await asyncio.sleep(self.latency)
+        for i, tok in enumerate(tokens):
+            if self.tokens_per_sec:
+                await asyncio.sleep(1 / self.tokens_per_sec)
+            chunk = self._chunk(prompt, tokens, i)
+            if run_manager:
+                await run_manager.on_llm_new_token(tok, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        """Reply with JSON for `schema` and parse it back into an instance."""
+        def parse(msg):
+            return schema.model_validate_json(msg.content)
+
+        async def aparse(msg):  # keeps the async path off the default thread pool
+            return parse(msg)
+
+        return self.bind(fake_schema=schema) | RunnableLambda(parse, afunc=aparse)
+
+class FakeToolCallingModel(FakeChatModel):
+    """FakeChatModel for tool-calling agents: follows a scripted plan, then answers.
+
+        FakeToolCallingModel(latency=0.2, tool_plan=[
+            [{"name": "get_weather_data", "args": {"city": "Delhi"}},
+             {"name": "get_weather_data", "args": {"city": "Mumbai"}}],   # step 1: two calls at once
+        ])
+
+    Step n of the plan is returned once the conversation holds n tool-calling turns.
+    After the plan runs out, the model replies with text like FakeChatModel.
+    """
+
+    tool_plan: list = []
+
+    def bind_tools(self, tools, **kwargs: Any):
+        return self.bind(**kwargs)  # the plan already names the tools
+
+    def _planned_calls(self, messages) -> Optional[list]:
+        step = sum(1 for m in messages if getattr(m, "tool_calls", None))
+        if step >= len(self.tool_plan):
+            return None
+        return [{"name": c["name"], "args": c["args"], "id": f"call_{step}_{i}"}
+                for i, c in enumerate(self.tool_plan[step])]
+
+    def _tool_message(self, messages, calls, chunk=False):
+        n_in = len(_prompt_text(messages).split())
+        usage = {"input_tokens": n_in, "output_tokens": 10 * len(calls), "total_tokens": n_in + 10 * len(calls)}
+        meta = {"model_name": self.model_name}
+        if chunk:
+            chunks = [{"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                      for i, c in enumerate(calls)]
+            return AIMessageChunk(content="", tool_call_chunks=chunks, usage_metadata=usage, response_metadata=meta)
+        return AIMessage(content="", tool_calls=calls, usage_metadata=usage, response_metadata=meta)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        calls = self._planned_calls(messages)
+        if calls is None:
+            return super()._generate(messages, stop, run_manager, **kwargs)
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._tool_message(messages, calls))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        calls = self._planned_calls(messages)
+        if calls is None:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._tool_message(messages, calls))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls = self._planned_calls(messages)
+        if calls is None:
+            yield from super()._stream(messages, stop, run_manager, **kwargs)
+            return
+        time.sleep(self.latency)
+        yield ChatGenerationChunk(message=self._tool_message(messages, calls, chunk=True))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls = self._planned_calls(messages)
+        if calls is None:
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
+            return
+        await asyncio.sleep(self.latency)
+        yield ChatGenerationChunk(message=self._tool_message(messages, calls, chunk=True))
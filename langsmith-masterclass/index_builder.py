@@ -0,0 +1,145 @@
+# Background index builds for 3_rag_v4.py: embed in a worker process, swap in when ready.
+#
+#   indexer = BackgroundIndexer()
+#   indexer.submit(pdf_path, index_dir, opts, on_ready=lambda index_dir: ...)
+#   indexer.watch([pdf_path], on_change=lambda pdf_path: ..., interval=5.0)
+#
+# A build runs `write_index` from the lesson script in a separate process (spawned,
+# so the worker shares no threads or sockets with the server). It writes into a
+# hidden staging directory under .indices/, and index_store.publish renames that
+# into place only once it is complete. `on_ready` then runs in this process, and
+# the caller swaps the new index in (see LiveIndex in 3_rag_v4.py). Until then,
+# queries keep using whatever index they had. A build already queued for the same
+# index directory is not started twice.
+#
+#   RAG_BUILD_WORKERS    worker processes (default 1: embedding is rate limited anyway)
+#   RAG_WATCH_INTERVAL   seconds between checks of watched PDFs (default 5)
+
+import os
+import sys
+import time
+import shutil
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import index_store
+
+BUILD_WORKERS = int(os.environ.get("RAG_BUILD_WORKERS", "1"))
+WATCH_INTERVAL = float(os.environ.get("RAG_WATCH_INTERVAL", "5"))
+
+def _build_in_worker(script: str, pdf_path: str, staging: str, opts: dict) -> int:
+    from script_loader import load_script
+
+    vs = load_script(script).write_index(pdf_path, Path(staging), **opts)
+    return vs.index.ntotal
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+class BackgroundIndexer:
+    """Process pool for index builds, plus a polling watcher for source files."""
+
+    def __init__(self, script: str = "3_rag_v4.py", max_workers: int = BUILD_WORKERS):
+        self.script = script
+        self.max_workers = max_workers
+        self.pool = self._new_pool()
+        self.pending = {}   # index_dir -> Future of the build being made for it
+        self.stats = {"submitted": 0, "built": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._watched = {}  # pdf_path -> last (size, mtime_ns) acted on
+        self._settling = {}  # pdf_path -> changed (size, mtime_ns), acted on once it holds for a poll
+        self._on_change = {}
+        self._watcher = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit_build(self, *args) -> Future:
+        try:
+            return self.pool.submit(_build_in_worker, self.script, *args)
+        except BrokenProcessPool:  # a worker died (OOM, killed): start a fresh pool
+            self.pool = self._new_pool()
+            return self.pool.submit(_build_in_worker, self.script, *args)
+
+    def submit(self, pdf_path: str, index_dir: Path, opts: dict, on_ready=None) -> Future:
+        """Build the index for pdf_path into index_dir; the Future resolves after it is published."""
+        index_dir = Path(index_dir)
+        with self._lock:
+            if index_dir in self.pending:
+                return self.pending[index_dir]
+            done = self.pending[index_dir] = Future()
+            self.stats["submitted"] += 1
+        index_store.clean_staging(index_dir.parent)
+        staging = index_store.staging_dir(index_dir.parent, index_dir.name)
+        try:
+            build = self._submit_build(pdf_path, str(staging), opts)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            with self._lock:
+                self.pending.pop(index_dir, None)
+            raise
+
+        def finished(build: Future):
+            try:
+                n_vectors = build.result()
+                index_store.publish(staging, index_dir)
+                if on_ready is not None:
+                    on_ready(index_dir)
+            except BaseException as e:
+                shutil.rmtree(staging, ignore_errors=True)
+                with self._lock:
+                    self.stats["failed"] += 1
+                    self.pending.pop(index_dir, None)
+                print(f"background build of {pdf_path} failed: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                done.set_exception(e)
+                return
+            with self._lock:
+                self.stats["built"] += 1
+                self.pending.pop(index_dir, None)
+            done.set_result(n_vectors)
+
+        build.add_done_callback(finished)
+        return done
+
+    def watch(self, pdf_paths, on_change, interval: float = WATCH_INTERVAL):
+        """Call on_change(pdf_path) from a daemon thread when a file's size or mtime changes.
+
+        A change is reported once it has held for one interval, so a file that is
+        still being copied in is not built half-written.
+        """
+        with self._lock:
+            for path in pdf_paths:
+                self._watched[path] = _stat(path)
+                self._on_change[path] = on_change
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._poll, args=(interval,), name="index-watcher", daemon=True)
+                self._watcher.start()
+
+    def _poll(self, interval: float):
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                watched = list(self._watched.items())
+            for path, seen in watched:
+                now = _stat(path)
+                if now is None or now == seen:
+                    continue  # a deleted file keeps its last index
+                if self._settling.get(path) != now:
+                    self._settling[path] = now  # still being written? look again next time
+                    continue
+                with self._lock:
+                    self._watched[path] = now
+                try:
+                    self._on_change[path](path)
+                except Exception as e:  # keep watching the other files
+                    print(f"index watcher: {path}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait)
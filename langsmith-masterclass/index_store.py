@@ -0,0 +1,279 @@
+# Size accounting + LRU garbage collection for the .indices/ cache used by 3_rag_v4.py
+#
+#   python index_store.py list                      # show every index, newest access first
+#   python index_store.py prune --max-bytes 2G      # evict least-recently-used until under budget
+#   python index_store.py prune --max-bytes 0 --dry-run
+
+import os
+import sys
+import json
+import time
+import atexit
+import socket
+import argparse
+import threading
+from pathlib import Path
+
+DEFAULT_ROOT = Path(".indices")
+DEFAULT_BUDGET = os.environ.get("RAG_INDEX_BUDGET", "2G")  # e.g. 500M, 2G, or plain bytes
+LEASE_TTL = float(os.environ.get("RAG_LEASE_TTL", "900"))  # s; another host's lease without a heartbeat is stale after this
+STAGING_TTL = float(os.environ.get("RAG_STAGING_TTL", str(24 * 3600)))  # s; same for another host's build dir
+HOST = socket.gethostname().replace("/", "_")
+
+_SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+# ----------------- helpers -----------------
+def parse_size(text: str) -> int:
+    text = str(text).strip().upper().removesuffix("B")
+    if text and text[-1] in _SIZE_UNITS:
+        return int(float(text[:-1]) * _SIZE_UNITS[text[-1]])
+    return int(text)
+
+def format_size(n: int) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}T"
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+def read_meta(index_dir: Path) -> dict:
+    meta_path = Path(index_dir) / "meta.json"
+    if not meta_path.exists():
+        return {}
+    try:
+        return json.loads(meta_path.read_text())
+    except json.JSONDecodeError:
+        return {}
+
+def write_meta(index_dir: Path, meta: dict):
+    meta_path = Path(index_dir) / "meta.json"
+    tmp = meta_path.with_suffix(f".json.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp, meta_path)
+
+# ----------------- accounting -----------------
+def record_build(index_dir: Path):
+    """Stamp size + access time into meta.json right after an index has been written."""
+    meta = read_meta(index_dir)
+    now = time.time()
+    meta.setdefault("created_at", now)
+    meta["last_access"] = now
+    meta["size_bytes"] = dir_size(index_dir)
+    write_meta(index_dir, meta)
+
+def touch(index_dir: Path):
+    """Record a cache hit so LRU eviction sees this index as recently used (and renew our lease on it)."""
+    lease = _lease_path(index_dir)
+    if lease in _held_leases:
+        lease.touch()
+    meta = read_meta(index_dir)
+    meta["last_access"] = time.time()
+    if "size_bytes" not in meta:  # indices written before size accounting existed
+        meta["size_bytes"] = dir_size(index_dir)
+    write_meta(index_dir, meta)
+
+# ----------------- in-use protection -----------------
+# A process that has an index loaded drops a `.lease-<host>-<pid>` file in it.
+# Pruning (from this or any other process) skips directories with a live lease.
+# Pids can only be checked on their own host: there a lease is live while its pid
+# is. The index root may be shared storage, though, so a lease from another host
+# counts as live until its mtime is LEASE_TTL old. Holders renew theirs from a
+# heartbeat thread (every LEASE_TTL / 3) and on every touch().
+_held_leases = set()
+_heartbeat = None
+
+def _lease_path(index_dir: Path) -> Path:
+    return Path(index_dir) / f".lease-{HOST}-{os.getpid()}"
+
+def _renew_leases():
+    while True:
+        time.sleep(LEASE_TTL / 3)
+        for lease in list(_held_leases):
+            try:
+                lease.touch(exist_ok=True)
+            except OSError:  # index replaced or evicted under us
+                pass
+
+def acquire(index_dir: Path):
+    global _heartbeat
+    lease = _lease_path(index_dir)
+    lease.touch()
+    _held_leases.add(lease)
+    if _heartbeat is None:
+        _heartbeat = threading.Thread(target=_renew_leases, name="index-lease-heartbeat", daemon=True)
+        _heartbeat.start()
+
+def release(index_dir: Path):
+    lease = _lease_path(index_dir)
+    lease.unlink(missing_ok=True)
+    _held_leases.discard(lease)
+
+@atexit.register
+def _release_all():
+    for lease in list(_held_leases):
+        lease.unlink(missing_ok=True)
+    _held_leases.clear()
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _owner(name: str, prefix: str):
+    """(host, pid) from `<prefix><host>-<pid>`; names without a host are from this host."""
+    host, _, pid = name[len(prefix):].rpartition("-")
+    return host or HOST, int(pid)
+
+def _owner_alive(host: str, pid: int, mtime: float, ttl: float) -> bool:
+    if host == HOST:
+        return _pid_alive(pid)
+    return time.time() - mtime < ttl  # can't see that host's pids: trust the heartbeat
+
+def is_in_use(index_dir: Path) -> bool:
+    for lease in Path(index_dir).glob(".lease-*"):
+        try:
+            host, pid = _owner(lease.name, ".lease-")
+            mtime = lease.stat().st_mtime
+        except (ValueError, OSError):
+            continue
+        if _owner_alive(host, pid, mtime, LEASE_TTL):
+            return True
+        lease.unlink(missing_ok=True)  # stale lease from a crashed process
+    return False
+
+# ----------------- staging / atomic publish -----------------
+# Indices are written into a hidden `.build-*` directory next to their final place
+# and renamed into it once complete, so readers never see a half-written index.
+# Hidden directories are skipped by listing and eviction.
+def staging_dir(root: Path, key: str) -> Path:
+    import tempfile
+    Path(root).mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f".build-{key[:16]}-{HOST}-{os.getpid()}-", dir=root))
+
+def publish(staging: Path, index_dir: Path):
+    """Move a finished build into place; an index already there (forced rebuild) is replaced."""
+    import shutil
+
+    try:
+        os.rename(staging, index_dir)
+        return
+    except OSError:
+        if not index_dir.exists():
+            raise
+    # processes that have the old files open or mapped keep reading them after the swap
+    old = index_dir.with_name(f".old-{index_dir.name[:16]}-{os.getpid()}-{time.monotonic_ns()}")
+    os.rename(index_dir, old)
+    os.rename(staging, index_dir)
+    shutil.rmtree(old, ignore_errors=True)
+
+def clean_staging(root: Path = DEFAULT_ROOT) -> int:
+    """Remove build directories left behind by processes that died mid-build.
+
+    Another host's build directory is only removed once it is STAGING_TTL old.
+    """
+    import shutil
+
+    removed = 0
+    for path in Path(root).glob(".build-*"):
+        try:
+            # .build-<key16>-<host>-<pid>-<random>; the key is hex and the random suffix has no "-"
+            owner = path.name.split("-", 2)[2].rsplit("-", 1)[0]
+            host, pid = _owner(owner, "")
+            mtime = path.stat().st_mtime
+        except (IndexError, ValueError, OSError):
+            continue
+        if not _owner_alive(host, pid, mtime, STAGING_TTL):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+# ----------------- listing / eviction -----------------
+def list_indices(root: Path = DEFAULT_ROOT) -> list:
+    """One record per index directory, most recently accessed first."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    out = []
+    for index_dir in root.iterdir():
+        if not index_dir.is_dir() or index_dir.name.startswith("."):
+            continue
+        meta = read_meta(index_dir)
+        out.append({
+            "key": index_dir.name,
+            "path": index_dir,
+            "size_bytes": meta.get("size_bytes", dir_size(index_dir)),
+            "last_access": meta.get("last_access", index_dir.stat().st_mtime),
+            "pdf_path": meta.get("pdf_path"),
+            "embedding_model": meta.get("embedding_model"),
+            "in_use": is_in_use(index_dir),
+        })
+    out.sort(key=lambda r: r["last_access"], reverse=True)
+    return out
+
+def enforce_budget(root: Path = DEFAULT_ROOT, max_bytes: int = None, protect=(), dry_run: bool = False) -> list:
+    """Evict least-recently-used indices until the store fits in `max_bytes`.
+
+    Indices named in `protect` or leased by a live process are never evicted,
+    so the store may stay over budget if everything left is in use.
+    Returns the evicted records.
+    """
+    import shutil
+
+    if max_bytes is None:
+        max_bytes = parse_size(DEFAULT_BUDGET)
+    protected = {Path(p).name for p in protect}
+    records = list_indices(root)
+    total = sum(r["size_bytes"] for r in records)
+
+    evicted = []
+    for rec in reversed(records):  # oldest access first
+        if total <= max_bytes:
+            break
+        if rec["key"] in protected or rec["in_use"]:
+            continue
+        if not dry_run:
+            shutil.rmtree(rec["path"], ignore_errors=True)
+        total -= rec["size_bytes"]
+        evicted.append(rec)
+    return evicted
+
+# ----------------- CLI -----------------
+def _cmd_list(args):
+    records = list_indices(args.root)
+    total = sum(r["size_bytes"] for r in records)
+    for r in records:
+        accessed = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["last_access"]))
+        flag = "*" if r["in_use"] else " "
+        print(f"{flag} {r['key'][:16]}  {format_size(r['size_bytes']):>8}  {accessed}  {r['pdf_path'] or '-'}")
+    print(f"\n{len(records)} indices, {format_size(total)} total (* = in use)")
+
+def _cmd_prune(args):
+    evicted = enforce_budget(args.root, parse_size(args.max_bytes), dry_run=args.dry_run)
+    verb = "would evict" if args.dry_run else "evicted"
+    for r in evicted:
+        print(f"{verb} {r['key'][:16]}  {format_size(r['size_bytes'])}  {r['pdf_path'] or '-'}")
+    freed = sum(r["size_bytes"] for r in evicted)
+    print(f"{verb} {len(evicted)} indices, {format_size(freed)} freed")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and prune the RAG index store.")
+    parser.add_argument("--root", type=Path, default=DEFAULT_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="list indices with size and last access").set_defaults(func=_cmd_list)
+    prune = sub.add_parser("prune", help="LRU-evict indices until under a byte budget")
+    prune.add_argument("--max-bytes", default=DEFAULT_BUDGET)
+    prune.add_argument("--dry-run", action="store_true")
+    prune.set_defaults(func=_cmd_prune)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# Persistent response cache for deterministic chat model calls.
+#
+#   from llm_clients import get_chat_model
+#   model = get_chat_model("gpt-4o-mini", temperature=0)   # cached automatically
+#
+#   from llm_cache import skip_cache
+#   with skip_cache():                                      # this call goes to the API
+#       chain.invoke({...})
+#
+# get_chat_model() attaches the cache to temperature-0 models only. A sampled call
+# returns a different answer each time, so replaying one would change what the
+# lesson does. Entries are keyed by the model's LangChain llm_string (model name and
+# every request parameter) plus the rendered messages. Streaming calls are never
+# served from the cache; that is how LangChain's cache works.
+#
+# Storage is one SQLite file in WAL mode, so processes and threads read
+# concurrently while one writes. Each thread has its own connection.
+#   LLM_CACHE_PATH      cache file (default .llm_cache.sqlite, "" turns caching off)
+#   LLM_CACHE_TTL       seconds an entry stays valid (default 7 days, 0 = forever)
+#   LLM_CACHE_MAX_MB    size cap; least recently used entries go first (default 256)
+#
+#   python llm_cache.py stats | evict | clear
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+from langchain_core._api import suppress_langchain_beta_warning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+CACHE_PATH = os.environ.get("LLM_CACHE_PATH", ".llm_cache.sqlite")
+TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+MAX_BYTES = int(float(os.environ.get("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+EVICT_EVERY = 100        # writes between size/TTL sweeps
+TOUCH_AFTER_S = 60.0     # hits refresh the LRU timestamp at most this often (a hit stays a read)
+
+_skip = contextvars.ContextVar("llm_cache_skip", default=False)
+
+@contextmanager
+def skip_cache():
+    """Neither read nor write the response cache for calls made inside this block."""
+    token = _skip.set(True)
+    try:
+        yield
+    finally:
+        _skip.reset(token)
+
+def _key(prompt: str, llm_string: str) -> str:
+    return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+def _serializable(generation):
+    # with_structured_output(method="json_schema") leaves a pydantic object in
+    # additional_kwargs["parsed"]; store it as the dict the parser also accepts
+    message = getattr(generation, "message", None)
+    parsed = message.additional_kwargs.get("parsed") if message is not None else None
+    if hasattr(parsed, "model_dump"):
+        message = message.model_copy(update={"additional_kwargs": {**message.additional_kwargs, "parsed": parsed.model_dump()}})
+        generation = generation.model_copy(update={"message": message})
+    return generation
+
+class SQLiteResponseCache(BaseCache):
+    """LangChain BaseCache in a WAL-mode SQLite file, with TTL and LRU size eviction."""
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = TTL_SECONDS, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "expired": 0, "evicted": 0}
+        with self._conn() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,
+                created REAL NOT NULL, accessed REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # WAL: durable enough for a cache
+        return conn
+
+    def _count(self, field: str, n: int = 1):
+        with self._lock:
+            self.stats[field] += n
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl > 0 and now - created > self.ttl
+
+    # ----------------- BaseCache -----------------
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if _skip.get():
+            return None
+        key = _key(prompt, llm_string)
+        conn = self._conn()
+        row = conn.execute("SELECT value, created, accessed FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or self._expired(row[1], now):
+            self._count("misses")
+            if row is not None:
+                self._count("expired")
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        if now - row[2] > TOUCH_AFTER_S:
+            with conn:
+                conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        with suppress_langchain_beta_warning():
+            return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if _skip.get():
+            return
+        value = dumps([_serializable(g) for g in return_val])
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                         (_key(prompt, llm_string), value, len(value), now, now))
+        self._count("writes")
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % EVICT_EVERY == 0
+        if sweep:
+            self.evict()
+
+    def clear(self, **kwargs) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM responses")
+
+    # ----------------- maintenance -----------------
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        conn = self._conn()
+        removed = 0
+        with conn:
+            if self.ttl > 0:
+                removed += conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)).rowcount
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                doomed = []
+                for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((key,))
+                    total -= size
+                conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+                removed += len(doomed)
+        self._count("evicted", removed)
+        return removed
+
+    def info(self) -> dict:
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {**stats, "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": entries, "mb": round(size / 1024 / 1024, 2)}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def response_cache() -> Optional[SQLiteResponseCache]:
+    """The shared response cache, or None when LLM_CACHE_PATH is empty."""
+    global _cache
+    if not CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteResponseCache()
+        return _cache
+
+def cache_stats() -> dict:
+    cache = response_cache()
+    return cache.info() if cache is not None else {}
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = response_cache()
+    if cache is None:
+        sys.exit("LLM_CACHE_PATH is empty: caching is off")
+    if cmd == "clear":
+        cache.clear()
+    elif cmd == "evict":
+        print(f"{cache.evict()} entries removed")
+    print(cache.info())
@@ -0,0 +1,299 @@
+# One place to create chat models, so every script shares connections and limits.
+#
+#   from llm_clients import get_chat_model
+#   model = get_chat_model("gpt-4o-mini", temperature=0)     # instead of ChatOpenAI(...)
+#
+# What a long-running process gets over a ChatOpenAI per script:
+#   - one pooled httpx client (sync + async) per model name, shared by every
+#     instance of that model, with keep-alive and a bounded connection pool
+#   - a process-wide request rate limit (InMemoryRateLimiter, LLM_MAX_RPS) and a
+#     process-wide cap on requests in flight (LLM_MAX_CONCURRENCY), across threads
+#     and event loops
+#   - single-flight coalescing: identical requests (same model, parameters and
+#     messages) made while one is already in flight wait for it and share its
+#     result instead of calling the API again
+#   - the same instance back for the same arguments, so chains built in different
+#     modules share one model object
+#   - temperature-0 models answer repeated prompts from the on-disk response cache
+#     (llm_cache.py; LLM_CACHE_PATH="" turns it off, skip_cache() per call)
+#
+#   LLM_MAX_CONCURRENCY   requests in flight per process (default 64)
+#   LLM_MAX_RPS           requests per second per process (default 0 = no limit)
+#   LLM_POOL_SIZE         pooled connections per model (default 100)
+#   LLM_COALESCE          deterministic (default): only temperature-0 calls are merged,
+#                         since merging sampled calls would hand several callers one sample
+#                         always | off
+#
+# client_stats() -> {"requests", "coalesced", "in_flight", "peak_in_flight", "waited_for_slot"}
+#
+# LLM_BACKEND=fake swaps in the local models from fake_llm.py, so every script runs
+# offline and deterministically (load tests, CI benchmarks: bench_suite.py):
+#   get_chat_model  -> FakeChatModel   FAKE_LLM_LATENCY (default 0.2 s), FAKE_LLM_TPS (default 0 = instant)
+#   get_embeddings  -> HashEmbeddings  FAKE_EMBED_LATENCY (default 0 s per call)
+
+import os
+import json
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import httpx
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_openai import ChatOpenAI
+
+from llm_cache import response_cache
+
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "64"))
+MAX_RPS = float(os.environ.get("LLM_MAX_RPS", "0"))
+POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "100"))
+COALESCE = os.environ.get("LLM_COALESCE", "deterministic")
+BACKEND = os.environ.get("LLM_BACKEND", "openai")
+
+_stats = {"requests": 0, "coalesced": 0, "in_flight": 0, "peak_in_flight": 0, "waited_for_slot": 0}
+_lock = threading.Lock()
+
+# ----------------- shared resources -----------------
+_http_clients = {}  # model name -> (httpx.Client, httpx.AsyncClient)
+_models = {}        # (model, sorted kwargs) -> PooledChatOpenAI
+_rate_limiter = InMemoryRateLimiter(requests_per_second=MAX_RPS, max_bucket_size=max(MAX_RPS, 1)) if MAX_RPS > 0 else None
+
+def _clients_for(model: str):
+    with _lock:
+        if model not in _http_clients:
+            limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+            _http_clients[model] = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+        return _http_clients[model]
+
+class Slots:
+    """Counting semaphore shared by threads and every event loop: one budget per process.
+
+    A release hands its slot straight to the oldest waiter, a thread (Event) or a
+    coroutine ((loop, future), woken thread-safely on its own loop). Also usable as
+    `async with slots:` for budgets of your own (5_langgraph.py).
+    """
+
+    def __init__(self, n: int):
+        self.free = n
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    def _take(self) -> bool:
+        if self.free > 0 and not self.waiters:
+            self.free -= 1
+            return True
+        return False
+
+    def acquire(self) -> bool:
+        """Take a slot, blocking the thread -> whether it had to wait."""
+        with self.lock:
+            if self._take():
+                return False
+            event = threading.Event()
+            self.waiters.append(event)
+        event.wait()
+        return True
+
+    async def aacquire(self) -> bool:
+        """Take a slot without blocking the loop -> whether it had to wait."""
+        with self.lock:
+            if self._take():
+                return False
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self.waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self.lock:
+                if waiter in self.waiters:  # never granted
+                    self.waiters.remove(waiter)
+                    raise
+            self.release()  # granted as we were cancelled: pass the slot on
+            raise
+        return True
+
+    def release(self):
+        with self.lock:
+            while self.waiters:
+                waiter = self.waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(_grant, future)
+                    return
+                except RuntimeError:  # its loop is closed: nobody left to wake
+                    continue
+            self.free += 1
+
+    async def __aenter__(self):
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+def _grant(future: asyncio.Future):
+    if not future.done():  # a cancelled waiter hands the slot on itself
+        future.set_result(None)
+
+_slots = Slots(MAX_CONCURRENCY)
+
+def _count_start(waited: bool):
+    with _lock:
+        _stats["requests"] += 1
+        _stats["waited_for_slot"] += waited
+        _stats["in_flight"] += 1
+        _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+
+def _count_end():
+    with _lock:
+        _stats["in_flight"] -= 1
+
+class _SyncSlot:
+    def __enter__(self):
+        _count_start(_slots.acquire())
+
+    def __exit__(self, *exc):
+        _count_end()
+        _slots.release()
+
+class _AsyncSlot:
+    async def __aenter__(self):
+        _count_start(await _slots.aacquire())
+
+    async def __aexit__(self, *exc):
+        _count_end()
+        _slots.release()
+
+# ----------------- single-flight -----------------
+_inflight = {}  # request key -> Future shared by every identical caller
+
+class _LeaderGone(Exception):
+    """The leader's caller was cancelled or interrupted; the request itself didn't fail."""
+
+def _join_or_lead(key: str):
+    """-> (future, leader?). The leader makes the call; the others wait on its future."""
+    with _lock:
+        if key in _inflight:
+            _stats["coalesced"] += 1
+            return _inflight[key], False
+        future = _inflight[key] = Future()
+        future.set_running_or_notify_cancel()  # a cancelled follower can't cancel it for the rest
+        return future, True
+
+def _settle(key: str, future: Future, result=None, error=None):
+    with _lock:
+        _inflight.pop(key, None)
+    if error is None:
+        future.set_result(result)
+    elif isinstance(error, Exception):
+        future.set_exception(error)
+    else:  # CancelledError, KeyboardInterrupt: a follower retries as the new leader
+        future.set_exception(_LeaderGone())
+
+class PooledChatOpenAI(ChatOpenAI):
+    """ChatOpenAI behind the process-wide concurrency cap, with identical in-flight calls merged."""
+
+    def _coalesce_key(self, messages, stop, kwargs):
+        if COALESCE == "off" or (COALESCE == "deterministic" and self.temperature not in (0, 0.0)):
+            return None
+        payload = {"params": self._default_params, "stop": stop, "kwargs": kwargs,
+                   "messages": [m.model_dump(exclude={"id"}) for m in messages]}
+        return json.dumps(payload, sort_keys=True, default=str)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._coalesce_key(messages, stop, kwargs)
+        if key is None:
+            with _SyncSlot():
+                return super()._generate(messages, stop, run_manager, **kwargs)
+        while True:
+            future, leader = _join_or_lead(key)
+            if leader:
+                break
+            try:
+                return future.result().model_copy(deep=True)  # each caller gets its own result
+            except _LeaderGone:
+                continue
+        try:
+            with _SyncSlot():
+                result = super()._generate(messages, stop, run_manager, **kwargs)
+        except BaseException as e:
+            _settle(key, future, error=e)
+            raise
+        _settle(key, future, result)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._coalesce_key(messages, stop, kwargs)
+        if key is None:
+            async with _AsyncSlot():
+                return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        while True:
+            future, leader = _join_or_lead(key)
+            if leader:
+                break
+            try:
+                return (await asyncio.wrap_future(future)).model_copy(deep=True)
+            except _LeaderGone:
+                continue
+        try:
+            async with _AsyncSlot():
+                result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        except BaseException as e:
+            _settle(key, future, error=e)
+            raise
+        _settle(key, future, result)
+        return result
+
+    def _stream(self, *args, **kwargs):
+        with _SyncSlot():  # streams hold their slot until the last chunk
+            yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        async with _AsyncSlot():
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
+# ----------------- factory -----------------
+def _fake_chat_model(model: str, cache=None):
+    from fake_llm import FakeChatModel
+
+    tps = float(os.environ.get("FAKE_LLM_TPS", "0"))
+    return FakeChatModel(model_name=model, latency=float(os.environ.get("FAKE_LLM_LATENCY", "0.2")),
+                         tokens_per_sec=tps or None, cache=cache)
+
+def get_chat_model(model: str = ChatOpenAI.model_fields["model_name"].default, **kwargs):
+    """Shared chat model for `model` + kwargs (ChatOpenAI arguments)."""
+    key = (model, json.dumps(kwargs, sort_keys=True, default=str))
+    with _lock:
+        if key in _models:
+            return _models[key]
+    if kwargs.get("temperature") == 0 and "cache" not in kwargs:
+        kwargs["cache"] = response_cache()  # None when LLM_CACHE_PATH is empty
+    if BACKEND == "fake":
+        instance = _fake_chat_model(model, kwargs.get("cache"))  # ChatOpenAI-only kwargs don't apply
+    else:
+        http_client, http_async_client = _clients_for(model)
+        instance = PooledChatOpenAI(model=model, http_client=http_client, http_async_client=http_async_client,
+                                    rate_limiter=_rate_limiter, **kwargs)
+    with _lock:
+        return _models.setdefault(key, instance)
+
+def get_embeddings(model: str = "text-embedding-3-small"):
+    """Embeddings for `model` from the selected backend."""
+    if BACKEND == "fake":
+        from fake_llm import HashEmbeddings
+        return HashEmbeddings(latency=float(os.environ.get("FAKE_EMBED_LATENCY", "0")))
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=model)
+
+def embedding_id(model: str) -> str:
+    """Name to key stored vectors by; fake vectors must never be mistaken for real ones."""
+    return model if BACKEND == "openai" else f"{BACKEND}:{model}"
+
+def client_stats() -> dict:
+    with _lock:
+        return dict(_stats)
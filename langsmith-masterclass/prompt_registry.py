@@ -0,0 +1,212 @@
+# Local registry for LangChain Hub prompts, so agents start without a network call.
+#
+#   from prompt_registry import get_prompt
+#   prompt = get_prompt("hwchase17/react")      # instead of hub.pull("hwchase17/react")
+#
+# Prompts are stored as serialized LangChain objects (langchain_core.load.dumpd).
+# A copy ships in prompts/ next to this file, listed in prompts/manifest.json with
+# the hub ref it is pinned to ("latest" or a commit hash), the commit it came from
+# when known, and the sha256 of its canonical JSON. That sha256 is the pin: any copy
+# whose content doesn't match it is ignored, wherever it came from. get_prompt()
+# checks two places, in order, and uses the first valid copy:
+#   1. the user cache (PROMPT_CACHE_DIR, default ~/.cache/langsmith-masterclass/prompts)
+#   2. the bundled copy
+# Only when neither is usable does it fall back to hub.pull, and a pull whose content
+# doesn't match the manifest is refused. So a hub edit never changes a prompt on its
+# own: moving a pin is an explicit `pull`. At most once per PROMPT_REFRESH_SECONDS
+# (default one day; 0 turns it off) a daemon thread checks the hub's latest version of
+# each pinned prompt: if it differs from the pin it is reported (stderr, `status`,
+# refresh_status) but never used, and if the cached copy is missing or corrupt it is
+# rewritten with content that matches the pin. The check never blocks, and offline it
+# leaves everything as it was.
+#
+#   python prompt_registry.py status                               # pins, checksums, cache ages, upstream
+#   python prompt_registry.py pull hwchase17/react [--ref <commit>]  # update the bundle, pin its commit
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+
+from langchain_core.load import dumpd, load
+
+HERE = Path(__file__).resolve().parent
+BUNDLE_DIR = HERE / "prompts"
+MANIFEST = BUNDLE_DIR / "manifest.json"
+CACHE_DIR = Path(os.environ.get("PROMPT_CACHE_DIR", Path.home() / ".cache" / "langsmith-masterclass" / "prompts"))
+REFRESH_SECONDS = float(os.environ.get("PROMPT_REFRESH_SECONDS", str(24 * 3600)))
+
+CHECKS = CACHE_DIR / "upstream-checks.json"  # name -> commit/sha256 of hub latest at the last check
+
+refresh_status = {}  # name -> "up to date", "newer upstream: ..." or "error: ..." for the last check
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+# ----------------- storage -----------------
+def _file_name(name: str) -> str:
+    return name.replace("/", "__") + ".json"
+
+def checksum(serialized: dict) -> str:
+    return hashlib.sha256(json.dumps(serialized, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _read_json(path: Path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _write_json(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)  # readers never see a half-written file
+
+def read_manifest() -> dict:
+    return _read_json(MANIFEST) or {}
+
+def _matches_pin(record: dict, entry: dict) -> bool:
+    return entry.get("sha256") in (None, record["sha256"])
+
+def _load_verified(path: Path, entry: dict):
+    """The stored {"prompt", "commit", "sha256"} record at `path` if its checksum matches, else None."""
+    record = _read_json(path)
+    if not record or checksum(record.get("prompt")) != record.get("sha256"):
+        return None
+    if not _matches_pin(record, entry):
+        return None  # a different version than the manifest pins (hub edit, or a hand-edited bundle)
+    ref, commit = entry.get("ref", "latest"), record.get("commit")
+    if ref != "latest" and commit is not None and not commit.startswith(ref):
+        return None  # cached from a different pin
+    return record
+
+def _record(prompt) -> dict:
+    serialized = dumpd(prompt)
+    meta = getattr(prompt, "metadata", None) or {}
+    return {"prompt": serialized, "commit": meta.get("lc_hub_commit_hash"), "sha256": checksum(serialized),
+            "fetched_at": time.time()}
+
+def _pull(name: str, ref: str):
+    from langchain import hub
+    return hub.pull(name if ref == "latest" else f"{name}:{ref}")
+
+# ----------------- background refresh -----------------
+def _read_checks() -> dict:
+    return _read_json(CHECKS) or {}
+
+def _refresh(name: str, entry: dict):
+    """Check hub latest against the pin; repair a missing/corrupt cached copy with the pinned content."""
+    try:
+        ref = entry.get("ref", "latest")
+        upstream = _record(_pull(name, "latest"))
+        with _refresh_lock:
+            checks = _read_checks()
+            checks[name] = {"checked_at": upstream["fetched_at"], "commit": upstream["commit"],
+                            "sha256": upstream["sha256"]}
+            _write_json(CHECKS, checks)
+        newer = not _matches_pin(upstream, entry)
+        if newer:
+            refresh_status[name] = f"newer upstream: commit {upstream['commit'] or 'unknown'}"
+            print(f"prompt_registry: hub has a newer {name} (commit {upstream['commit'] or 'unknown'}); "
+                  f"run `python prompt_registry.py pull {name}` to move the pin", file=sys.stderr)
+        else:
+            refresh_status[name] = "up to date"
+        if _load_verified(CACHE_DIR / _file_name(name), entry) is None:
+            record = upstream if not newer or ref == "latest" else _record(_pull(name, ref))
+            if _matches_pin(record, entry) and (ref == "latest" or not record["commit"]
+                                                or record["commit"].startswith(ref)):
+                _write_json(CACHE_DIR / _file_name(name), record)
+                refresh_status[name] += ", cache repaired"
+    except Exception as e:  # offline, hub down, ...: keep serving what we have
+        refresh_status[name] = f"error: {type(e).__name__}: {e}"
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(name)
+
+def refresh_in_background(name: str, entry: dict, force: bool = False):
+    """Run the upstream check for pinned prompt `name` on a daemon thread if it is due (or `force`)."""
+    if not entry.get("sha256"):
+        return None  # nothing pinned to compare against
+    if REFRESH_SECONDS <= 0 and not force:
+        return None
+    checked = _read_checks().get(name, {})
+    if not force and time.time() - checked.get("checked_at", 0) < REFRESH_SECONDS:
+        return None
+    with _refresh_lock:
+        if name in _refreshing:
+            return None
+        _refreshing.add(name)
+    thread = threading.Thread(target=_refresh, args=(name, entry), name=f"prompt-refresh-{name}", daemon=True)
+    thread.start()
+    return thread
+
+# ----------------- lookup -----------------
+def get_prompt(name: str, refresh: bool = True):
+    """Prompt `name` from the local cache or bundle; hub.pull only if neither is usable."""
+    entry = read_manifest().get(name, {})
+    ref = entry.get("ref", "latest")
+    candidates = (CACHE_DIR / _file_name(name), BUNDLE_DIR / entry.get("file", _file_name(name)))
+    for path in candidates:
+        record = _load_verified(path, entry)
+        if record is not None:
+            if refresh:
+                refresh_in_background(name, entry)
+            return load(record["prompt"])
+    # nothing local: this first start pays the round trip once
+    prompt = _pull(name, ref)
+    record = _record(prompt)
+    if not _matches_pin(record, entry):
+        raise ValueError(f"{name}: hub returned content that doesn't match the pinned sha256 "
+                         f"in {MANIFEST.name}; run `python prompt_registry.py pull {name}` to move the pin")
+    _write_json(CACHE_DIR / _file_name(name), record)
+    return prompt
+
+# ----------------- CLI -----------------
+def _status():
+    checks = _read_checks()
+    for name, entry in sorted(read_manifest().items()):
+        bundled = _load_verified(BUNDLE_DIR / entry["file"], entry)
+        cached = _read_json(CACHE_DIR / _file_name(name))
+        age = f"{(time.time() - cached['fetched_at']) / 3600:.1f} h old" if cached else "none"
+        valid = "" if not cached or _load_verified(CACHE_DIR / _file_name(name), entry) else " (invalid)"
+        check = checks.get(name)
+        if check is None:
+            upstream = "not checked"
+        elif _matches_pin(check, entry):
+            upstream = "same as pin"
+        else:
+            upstream = f"NEWER commit {check['commit'] or 'unknown'} ({check['sha256'][:12]})"
+        print(f"{name}: ref {entry.get('ref', 'latest')}, commit {entry.get('commit') or 'unknown'}, "
+              f"sha256 {(entry.get('sha256') or 'none')[:12]}, "
+              f"bundle {'ok' if bundled else 'INVALID'}, cache {age}{valid}, upstream {upstream}")
+
+def _pull_into_bundle(name: str, ref: str):
+    record = _record(_pull(name, ref))
+    record.pop("fetched_at")  # the bundle has no age; only cached copies get refreshed
+    file = _file_name(name)
+    _write_json(BUNDLE_DIR / file, record)
+    manifest = read_manifest()
+    pin = record["commit"] or ref  # pin the commit we actually got, not "latest"
+    manifest[name] = {"file": file, "ref": pin, "commit": record["commit"], "sha256": record["sha256"]}
+    _write_json(MANIFEST, manifest)
+    print(f"bundled {name} at {record['commit'] or ref} ({record['sha256'][:12]})")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bundled / cached LangChain Hub prompts.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status", help="show pins, checksums and cache ages")
+    pull = sub.add_parser("pull", help="pull a prompt into the bundle and pin it")
+    pull.add_argument("name")
+    pull.add_argument("--ref", default="latest", help="commit hash to pin (default: latest)")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "status":
+        _status()
+    else:
+        _pull_into_bundle(args.name, args.ref)
+
+if __name__ == "__main__":
+    sys.exit(main())
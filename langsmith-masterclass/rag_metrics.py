@@ -0,0 +1,228 @@
+# Local, LangSmith-independent instrumentation for the RAG pipeline.
+#
+# Records wall time, CPU time, peak-RSS delta and item counts per stage and
+# exports them as Prometheus text or a JSONL profile:
+#
+#   @traceable(name="load_pdf")
+#   @rag_metrics.instrument("load_pdf", count=lambda docs: {"pages": len(docs)})
+#   def load_pdf(path): ...
+#
+#   chain.invoke(q, config={"callbacks": [rag_metrics.callback_handler()]})  # retrieval + LLM
+#
+# Env knobs:
+#   RAG_METRICS_SAMPLE=0.05        measure 5% of calls (every call is still counted)
+#   RAG_PROFILE_JSONL=profile.jsonl   written by dump_from_env()
+#   RAG_METRICS_PROM=metrics.prom     written by dump_from_env()
+#
+# CPU time is that of the thread that ran the stage (time.thread_time), so stages
+# running concurrently on other threads aren't charged to it; work a stage hands to
+# a thread pool isn't counted either, and a stage that ends on a different thread
+# than it started on (some async callbacks) gets no CPU sample.
+#
+# Peak RSS comes from getrusage's high-water mark, so the delta is "how much
+# this stage raised the process peak" and is only meaningful for stages that
+# don't overlap with other memory-heavy work.
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+import functools
+from collections import defaultdict, deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+SAMPLE_RATE = float(os.environ.get("RAG_METRICS_SAMPLE", "1.0"))
+MAX_RECORDS = 10_000  # JSONL profile keeps the most recent N sampled records
+
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+
+def _peak_rss() -> int:
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_UNIT
+
+class StageMetrics:
+    """Thread-safe per-stage aggregates plus a bounded log of sampled records."""
+
+    def __init__(self, sample_rate: float = SAMPLE_RATE, max_records: int = MAX_RECORDS):
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.sampled = defaultdict(int)
+        self.wall_s = defaultdict(float)
+        self.cpu_s = defaultdict(float)
+        self.cpu_sampled = defaultdict(int)
+        self.rss_delta_max = defaultdict(int)
+        self.items = defaultdict(lambda: defaultdict(int))
+        self.records = deque(maxlen=max_records)
+
+    def should_sample(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def start(self):
+        return time.perf_counter(), threading.get_ident(), time.thread_time(), _peak_rss()
+
+    def count_call(self, stage: str):
+        with self._lock:
+            self.calls[stage] += 1
+
+    def finish(self, stage: str, started, items: dict = None):
+        wall0, thread0, cpu0, rss0 = started
+        wall = time.perf_counter() - wall0
+        cpu = time.thread_time() - cpu0 if threading.get_ident() == thread0 else None
+        rss_delta = max(0, _peak_rss() - rss0)
+        items = items or {}
+        with self._lock:
+            self.sampled[stage] += 1
+            self.wall_s[stage] += wall
+            if cpu is not None:
+                self.cpu_s[stage] += cpu
+                self.cpu_sampled[stage] += 1
+            self.rss_delta_max[stage] = max(self.rss_delta_max[stage], rss_delta)
+            for kind, n in items.items():
+                self.items[stage][kind] += n
+            self.records.append({
+                "ts": time.time(),
+                "stage": stage,
+                "wall_s": round(wall, 6),
+                "cpu_s": None if cpu is None else round(cpu, 6),
+                "rss_delta_bytes": rss_delta,
+                "items": items,
+            })
+
+    def reset(self):
+        with self._lock:
+            for d in (self.calls, self.sampled, self.wall_s, self.cpu_s, self.cpu_sampled,
+                      self.rss_delta_max, self.items):
+                d.clear()
+            self.records.clear()
+
+    # ----------------- export -----------------
+    def to_prometheus(self) -> str:
+        lines = []
+
+        def block(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        with self._lock:
+            stages = sorted(self.calls)
+            block("rag_stage_calls_total", "counter", "Calls per stage (sampled or not).",
+                  [f'rag_stage_calls_total{{stage="{s}"}} {self.calls[s]}' for s in stages])
+            block("rag_stage_sampled_total", "counter", "Calls that were measured.",
+                  [f'rag_stage_sampled_total{{stage="{s}"}} {self.sampled[s]}' for s in stages])
+            block("rag_stage_wall_seconds_sum", "counter", "Wall time over sampled calls.",
+                  [f'rag_stage_wall_seconds_sum{{stage="{s}"}} {self.wall_s[s]:.6f}' for s in stages])
+            block("rag_stage_cpu_seconds_sum", "counter", "CPU time of the calling thread over CPU-sampled calls.",
+                  [f'rag_stage_cpu_seconds_sum{{stage="{s}"}} {self.cpu_s[s]:.6f}' for s in stages])
+            block("rag_stage_cpu_sampled_total", "counter", "Sampled calls that started and ended on one thread.",
+                  [f'rag_stage_cpu_sampled_total{{stage="{s}"}} {self.cpu_sampled[s]}' for s in stages])
+            block("rag_stage_peak_rss_delta_bytes", "gauge", "Largest rise in process peak RSS during one call.",
+                  [f'rag_stage_peak_rss_delta_bytes{{stage="{s}"}} {self.rss_delta_max[s]}' for s in stages])
+            block("rag_stage_items_total", "counter", "Items processed over sampled calls (pages, chunks, vectors, tokens).",
+                  [f'rag_stage_items_total{{stage="{s}",kind="{k}"}} {n}'
+                   for s in stages for k, n in sorted(self.items[s].items())])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.to_prometheus())
+
+    def write_jsonl(self, path: str):
+        with self._lock:
+            records = list(self.records)
+        with open(path, "a") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+
+# process-wide default registry
+metrics = StageMetrics()
+
+def instrument(stage: str, count=None, registry: StageMetrics = None):
+    """Decorator: measure a sampled fraction of calls; `count(result)` returns item counts."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            reg = registry or metrics
+            reg.count_call(stage)
+            if not reg.should_sample():
+                return fn(*args, **kwargs)
+            started = reg.start()
+            result = fn(*args, **kwargs)
+            reg.finish(stage, started, count(result) if count else None)
+            return result
+        return wrapper
+    return decorator
+
+class StageCallbackHandler(BaseCallbackHandler):
+    """Records the retrieval and LLM stages of a LangChain run into a StageMetrics."""
+
+    def __init__(self, registry: StageMetrics = None, retrieval_stage="retrieval", llm_stage="llm_call"):
+        self.registry = registry or metrics
+        self.retrieval_stage = retrieval_stage
+        self.llm_stage = llm_stage
+        self._open = {}  # run_id -> start snapshot (only for sampled runs)
+
+    def _begin(self, stage, run_id):
+        self.registry.count_call(stage)
+        if self.registry.should_sample():
+            self._open[run_id] = self.registry.start()
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._begin(self.retrieval_stage, run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        started = self._open.pop(run_id, None)
+        if started:
+            self.registry.finish(self.retrieval_stage, started, {"documents": len(documents)})
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._begin(self.llm_stage, run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._begin(self.llm_stage, run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._open.pop(run_id, None)
+        if started:
+            self.registry.finish(self.llm_stage, started, _token_counts(response))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._open.pop(run_id, None)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._open.pop(run_id, None)
+
+def _token_counts(response) -> dict:
+    counts = defaultdict(int)
+    for generations in response.generations:
+        for gen in generations:
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                counts["input_tokens"] += usage.get("input_tokens", 0)
+                counts["output_tokens"] += usage.get("output_tokens", 0)
+    if not counts:  # older integrations only report usage in llm_output
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        counts["input_tokens"] += usage.get("prompt_tokens", 0)
+        counts["output_tokens"] += usage.get("completion_tokens", 0)
+    return dict(counts)
+
+def callback_handler(registry: StageMetrics = None) -> StageCallbackHandler:
+    return StageCallbackHandler(registry)
+
+def dump_from_env(registry: StageMetrics = None):
+    """Write the JSONL profile / Prometheus file if RAG_PROFILE_JSONL / RAG_METRICS_PROM are set."""
+    reg = registry or metrics
+    if os.environ.get("RAG_PROFILE_JSONL"):
+        reg.write_jsonl(os.environ["RAG_PROFILE_JSONL"])
+    if os.environ.get("RAG_METRICS_PROM"):
+        reg.write_prometheus(os.environ["RAG_METRICS_PROM"])
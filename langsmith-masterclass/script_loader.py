@@ -0,0 +1,25 @@
+# The lesson scripts are named 1_simple_llm_call.py, 3_rag_v4.py, ... which are
+# not valid module names. load_script() imports one by filename (without running
+# its __main__ block) so benchmarks and runners can reuse its functions.
+
+import sys
+import importlib.util
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+def load_script(filename: str):
+    name = "lesson_" + Path(filename).stem  # e.g. lesson_5_langgraph
+    if name in sys.modules:
+        return sys.modules[name]
+    if str(HERE) not in sys.path:
+        sys.path.insert(0, str(HERE))  # scripts import their sibling helper modules
+    spec = importlib.util.spec_from_file_location(name, HERE / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
@@ -0,0 +1,166 @@
+# TTL + LRU result cache for LangChain tools, shared across agent steps and users.
+#
+#   @cached_tool(ttl=600)
+#   @tool
+#   def get_weather_data(city: str) -> dict: ...
+#
+#   search_tool = cached_tool(ttl=3600, maxsize=2048)(DuckDuckGoSearchRun())
+#
+# The wrapped tool keeps its name, description and args schema, so agents see no
+# difference. Results are keyed on the tool name plus its arguments (strings are
+# stripped and case-folded, so "Gurgaon" and "gurgaon " share an entry). They
+# expire after `ttl` seconds, and the least recently used entry is evicted past
+# `maxsize`. Concurrent misses on the same key are coalesced: the first caller
+# runs the tool and the others wait for its result, sync or async, so a burst of
+# identical questions costs one upstream call. Errors are never cached.
+#
+# tool_cache_stats() -> {tool: {"hits", "coalesced", "misses", "avoided", ...}}
+
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+_MISSING = object()
+
+def default_key(name: str, args: dict) -> str:
+    def norm(v):
+        return v.strip().casefold() if isinstance(v, str) else v
+    return name + ":" + json.dumps({k: norm(v) for k, v in args.items()}, sort_keys=True, default=str)
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and single-flight loading."""
+
+    def __init__(self, ttl: float, maxsize: int = 1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._inflight = {}          # key -> Future of the call loading it
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "coalesced": 0, "misses": 0, "errors": 0, "expired": 0, "evicted": 0}
+
+    def _lookup(self, key):
+        """-> (value, None) on a hit, (_MISSING, future to wait on) or (_MISSING, None) if we must load."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._data.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1], None
+                del self._data[key]
+                self.stats["expired"] += 1
+            if key in self._inflight:
+                self.stats["coalesced"] += 1
+                return _MISSING, self._inflight[key]
+            self._inflight[key] = Future()
+            self.stats["misses"] += 1
+            return _MISSING, None
+
+    def _finish(self, key, value=_MISSING, error=None):
+        with self._lock:
+            future = self._inflight.pop(key)
+            if error is None:
+                self._data[key] = (self.clock() + self.ttl, value)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.stats["evicted"] += 1
+            else:
+                self.stats["errors"] += 1
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def get_or_call(self, key, fn):
+        value, waiting = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        if waiting is not None:
+            return waiting.result()
+        try:
+            value = fn()
+        except BaseException as e:
+            self._finish(key, error=e)
+            raise
+        self._finish(key, value)
+        return value
+
+    async def aget_or_call(self, key, afn):
+        value, waiting = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        if waiting is not None:
+            return await asyncio.wrap_future(waiting)
+        try:
+            value = await afn()
+        except BaseException as e:
+            self._finish(key, error=e)
+            raise
+        self._finish(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+# ----------------- tool decorator -----------------
+_caches = {}  # tool name -> TTLCache, for tool_cache_stats()
+
+def cached_tool(ttl: float, maxsize: int = 1024, key=default_key):
+    """Decorator for a LangChain tool (e.g. the result of @tool) that caches its results.
+
+    ttl <= 0 returns the tool unchanged.
+    """
+    def wrap(inner: BaseTool) -> BaseTool:
+        if ttl <= 0:
+            return inner
+        cache = _caches[inner.name] = TTLCache(ttl, maxsize)
+        fields = list(inner.args)
+
+        def as_kwargs(args, kwargs):
+            # ReAct agents pass a bare string for single-argument tools
+            return {fields[0]: args[0]} if args and len(fields) == 1 else {**kwargs}
+
+        def run(*args, **kwargs):
+            kwargs = as_kwargs(args, kwargs)
+            return cache.get_or_call(key(inner.name, kwargs), lambda: inner.invoke(kwargs))
+
+        async def arun(*args, **kwargs):
+            kwargs = as_kwargs(args, kwargs)
+            return await cache.aget_or_call(key(inner.name, kwargs), lambda: inner.ainvoke(kwargs))
+
+        return StructuredTool.from_function(
+            func=run,
+            coroutine=arun,
+            name=inner.name,
+            description=inner.description,
+            args_schema=inner.args_schema,
+            return_direct=inner.return_direct,
+        )
+    return wrap
+
+def clear_tool_caches():
+    for cache in _caches.values():
+        cache.clear()
+
+def tool_cache_stats() -> dict:
+    """Per-tool counters; `avoided` is upstream calls saved (hits + coalesced waits)."""
+    out = {}
+    for name, cache in _caches.items():
+        s = dict(cache.stats)
+        lookups = s["hits"] + s["coalesced"] + s["misses"]
+        s["avoided"] = s["hits"] + s["coalesced"]
+        s["hit_rate"] = s["avoided"] / lookups if lookups else 0.0
+        s["size"] = len(cache)
+        out[name] = s
+    return out
@@ -0,0 +1,193 @@
+# Bulk report + summary generation for the two-stage chain in 2_sequential_chain.py.
+#
+#   python topic_batch.py topics.txt --out summaries.jsonl
+#   python topic_batch.py topics.jsonl --report-concurrency 64 --summary-concurrency 8
+#   python topic_batch.py topics.txt --fake                     # plumbing check, no API key
+#
+# Input: one topic per line (.txt) or JSONL with a `topic` field.
+#
+# The stages are pipelined instead of run as two big batches. Each stage has its
+# own pool of workers: report_chain (gpt-4o-mini) with --report-concurrency, and
+# summary_chain (gpt-4o, slower and rate limited) with --summary-concurrency. The
+# stages are joined by bounded queues, so a topic's summary starts as soon as its
+# report is ready. A slow summary stage pushes back on the report stage instead
+# of piling up reports in memory. Every finished topic is appended to --out right
+# away. A rerun skips topics already there. Failed topics are left out, so they
+# are retried next time.
+#
+# Every --report-every seconds a line per stage shows queue depth, busy workers,
+# completions and throughput. A summary queue that stays full means stage 2 is the
+# bottleneck; an empty one with idle summary workers means stage 1 is.
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from script_loader import load_script
+
+# ----------------- input / output -----------------
+def read_topics(path: Path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield json.loads(line)["topic"] if path.suffix.lower() == ".jsonl" else line
+
+def finished_topics(out_path: Path) -> set:
+    if not out_path.exists():
+        return set()
+    done = set()
+    with open(out_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["topic"])
+            except (json.JSONDecodeError, KeyError):
+                continue  # torn last line from a crash
+    return done
+
+# ----------------- pipeline -----------------
+class Stage:
+    """A chain, its input queue and a fixed pool of workers."""
+
+    def __init__(self, name: str, chain, concurrency: int, input_key: str):
+        self.name = name
+        self.chain = chain
+        self.concurrency = concurrency
+        self.input_key = input_key
+        self.queue = asyncio.Queue(maxsize=concurrency * 2)  # bounded: backpressure on the stage before
+        self.busy = 0
+        self.done = 0
+        self.failed = 0
+        self.busy_s = 0.0
+
+    async def run(self, item: dict, config: dict) -> str:
+        self.busy += 1
+        t0 = time.perf_counter()
+        try:
+            return await self.chain.ainvoke({self.input_key: item[self.input_key]}, config=config)
+        finally:
+            self.busy -= 1
+            self.busy_s += time.perf_counter() - t0
+
+    def status(self, minutes: float) -> str:
+        rate = self.done / minutes if minutes else 0.0
+        mean = self.busy_s / max(self.done + self.failed, 1)
+        return (f"{self.name:8} queue {self.queue.qsize():4d}/{self.queue.maxsize:<4d} "
+                f"busy {self.busy:3d}/{self.concurrency:<3d} done {self.done:6d} failed {self.failed:4d} "
+                f"{rate:7.1f}/min  {mean:5.2f} s/call")
+
+async def run_pipeline(
+    topics_path: Path,
+    out_path: Path,
+    report_chain,
+    summary_chain,
+    report_concurrency: int = 32,
+    summary_concurrency: int = 8,
+    report_every: float = 10.0,
+    config: dict = None,
+) -> dict:
+    skip = finished_topics(out_path)
+    report = Stage("report", report_chain, report_concurrency, "topic")
+    summary = Stage("summary", summary_chain, summary_concurrency, "text")
+    skipped = 0
+    started = time.perf_counter()
+    out = open(out_path, "a", encoding="utf-8")
+
+    def print_status(final=False):
+        minutes = (time.perf_counter() - started) / 60
+        label = "done" if final else f"{minutes * 60:6.0f}s"
+        for stage in (report, summary):
+            print(f"[{label}] {stage.status(minutes)}", flush=True)
+
+    async def report_worker():
+        while (item := await report.queue.get()) is not None:
+            try:
+                item["text"] = await report.run(item, config)
+                item["report_s"] = round(time.perf_counter() - item.pop("t0"), 3)
+            except Exception as e:  # left out of --out, retried next run
+                report.failed += 1
+                print(f"✗ report {item['topic']!r}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                continue
+            report.done += 1
+            item["t0"] = time.perf_counter()
+            await summary.queue.put(item)
+
+    async def summary_worker():
+        while (item := await summary.queue.get()) is not None:
+            try:
+                text = await summary.run(item, config)
+            except Exception as e:
+                summary.failed += 1
+                print(f"✗ summary {item['topic']!r}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+                continue
+            summary.done += 1
+            record = {"topic": item["topic"], "report": item["text"], "summary": text,
+                      "report_s": item["report_s"], "summary_s": round(time.perf_counter() - item["t0"], 3)}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(report_every)
+            print_status()
+
+    report_workers = [asyncio.create_task(report_worker()) for _ in range(report_concurrency)]
+    summary_workers = [asyncio.create_task(summary_worker()) for _ in range(summary_concurrency)]
+    status_task = asyncio.create_task(reporter())
+    try:
+        for topic in read_topics(topics_path):
+            if topic in skip:
+                skipped += 1
+                continue
+            skip.add(topic)  # duplicate topics in the input run once
+            await report.queue.put({"topic": topic, "t0": time.perf_counter()})
+        for _ in report_workers:
+            await report.queue.put(None)
+        await asyncio.gather(*report_workers)
+        for _ in summary_workers:
+            await summary.queue.put(None)
+        await asyncio.gather(*summary_workers)
+    finally:
+        status_task.cancel()
+        out.close()
+
+    print_status(final=True)
+    print(f"{skipped} topics skipped (already in {out_path})")
+    return {"done": summary.done, "failed": report.failed + summary.failed, "skipped": skipped}
+
+def use_fake_models(lesson, report_latency: float, summary_latency: float):
+    from fake_llm import FakeChatModel
+
+    lesson.report_chain = lesson.prompt1 | FakeChatModel(latency=report_latency) | lesson.parser
+    lesson.summary_chain = lesson.prompt2 | FakeChatModel(latency=summary_latency) | lesson.parser
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reports and summaries for many topics, pipelined.")
+    parser.add_argument("topics", type=Path, help="topics .txt (one per line) or .jsonl")
+    parser.add_argument("--out", type=Path, default=Path("topic_summaries.jsonl"))
+    parser.add_argument("--report-concurrency", type=int, default=32, help="gpt-4o-mini calls in flight")
+    parser.add_argument("--summary-concurrency", type=int, default=8, help="gpt-4o calls in flight")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds between status lines")
+    parser.add_argument("--fake", action="store_true", help="use FakeChatModel (report 0.5 s, summary 1.5 s)")
+    args = parser.parse_args(argv)
+
+    if args.fake:
+        os.environ.setdefault("OPENAI_API_KEY", "sk-fake")  # the lesson builds ChatOpenAI at import
+    lesson = load_script("2_sequential_chain.py")
+    if args.fake:
+        use_fake_models(lesson, 0.5, 1.5)
+
+    stats = asyncio.run(run_pipeline(
+        args.topics, args.out, lesson.report_chain, lesson.summary_chain,
+        args.report_concurrency, args.summary_concurrency, args.report_every,
+        config={"run_name": "topic_batch", "tags": ["report", "summary", "batch"]},
+    ))
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
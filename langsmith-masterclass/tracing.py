@@ -0,0 +1,184 @@
+# Drop-in replacement for `langsmith.traceable` with knobs for hot paths:
+#
+#   from tracing import traceable          # instead of: from langsmith import traceable
+#
+#   TRACE_SAMPLE_RATE=0.01   head-based sampling: the decision is made once at the root
+#                            span and inherited by every child (including LangChain runs)
+#   TRACE_PAYLOAD=full|truncate|hash
+#                            what to send for inputs/outputs; `truncate` cuts strings to
+#                            TRACE_MAX_CHARS and long lists to TRACE_MAX_ITEMS, `hash`
+#                            replaces strings with a sha256 prefix + length
+#   TRACE_QUEUE_SIZE=10000   bound on LangSmith's background export backlog; a trace
+#                            that starts while that many runs are waiting is dropped
+#                            whole (never half a trace) instead of piling up
+#
+# Unsampled calls skip langsmith entirely (no RunTree, no serialization) and switch
+# tracing off for everything underneath so nested chain.invoke calls stay silent too.
+# `python bench_tracing.py` measures the per-call overhead at 0%, 1% and 100%.
+
+import os
+import random
+import hashlib
+import inspect
+import contextlib
+import functools
+import threading
+
+from langsmith import Client
+from langsmith import traceable as ls_traceable
+from langsmith.run_helpers import get_current_run_tree, tracing_context
+from langsmith.utils import tracing_is_enabled
+
+SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1.0"))
+PAYLOAD_MODE = os.environ.get("TRACE_PAYLOAD", "full")
+MAX_CHARS = int(os.environ.get("TRACE_MAX_CHARS", "500"))
+MAX_ITEMS = int(os.environ.get("TRACE_MAX_ITEMS", "10"))
+QUEUE_SIZE = int(os.environ.get("TRACE_QUEUE_SIZE", "10000"))
+
+stats = {"sampled": 0, "unsampled": 0, "dropped": 0}
+_stats_lock = threading.Lock()
+
+def _count(field: str):
+    with _stats_lock:
+        stats[field] += 1
+
+# ----------------- payload shrinking -----------------
+def shrink(value, mode: str = None, max_chars: int = None, max_items: int = None):
+    """Make a cheap, bounded stand-in for a traced input/output value."""
+    mode = mode or PAYLOAD_MODE
+    max_chars = max_chars or MAX_CHARS
+    max_items = max_items or MAX_ITEMS
+    if mode == "full":
+        return value
+
+    def _shrink(v):
+        if isinstance(v, str):
+            if mode == "hash":
+                return f"sha256:{hashlib.sha256(v.encode('utf-8')).hexdigest()[:16]} len={len(v)}"
+            if len(v) > max_chars:
+                return v[:max_chars] + f"... [+{len(v) - max_chars} chars]"
+            return v
+        if isinstance(v, dict):
+            return {k: _shrink(x) for k, x in v.items()}
+        if isinstance(v, (list, tuple)):
+            head = [_shrink(x) for x in v[:max_items]]
+            if len(v) > max_items:
+                head.append(f"... [+{len(v) - max_items} items]")
+            return head
+        if hasattr(v, "page_content"):  # langchain Document
+            return {"page_content": _shrink(v.page_content), "metadata": _shrink(getattr(v, "metadata", {}))}
+        if hasattr(v, "model_dump"):  # pydantic models, messages
+            return _shrink(v.model_dump())
+        if v is None or isinstance(v, (bool, int, float)):
+            return v
+        return _shrink(repr(v))
+
+    return _shrink(value)
+
+def _process_inputs(inputs: dict) -> dict:
+    return shrink(inputs)
+
+def _process_outputs(outputs):
+    out = shrink(outputs)
+    return out if isinstance(out, dict) else {"output": out}
+
+# ----------------- bounded export client -----------------
+_client = None
+_client_lock = threading.Lock()
+
+class BoundedClient(Client):
+    """Client that drops whole traces, at their root run, while the export backlog is full.
+
+    Works through the public create_run/update_run calls every RunTree makes, so
+    langsmith's own queue and batching thread are left as they are.
+    """
+
+    def __init__(self, *args, max_pending: int = QUEUE_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_pending = max_pending
+        self._dropped_traces = set()
+        self._drop_lock = threading.Lock()
+
+    def backlog(self) -> int:
+        """Runs waiting for the background exporter (0 without auto-batching)."""
+        pending = getattr(self, "tracing_queue", None)
+        return pending.qsize() if pending is not None else 0
+
+    def create_run(self, name, inputs, run_type, **kwargs):
+        run_id, trace_id = str(kwargs.get("id")), str(kwargs.get("trace_id"))
+        with self._drop_lock:
+            if trace_id in self._dropped_traces:
+                return None
+            if run_id == trace_id and self.backlog() >= self.max_pending:
+                self._dropped_traces.add(trace_id)
+                _count("dropped")
+                return None
+        return super().create_run(name, inputs, run_type, **kwargs)
+
+    def update_run(self, run_id, **kwargs):
+        run_id, trace_id = str(run_id), str(kwargs.get("trace_id"))
+        with self._drop_lock:
+            if trace_id in self._dropped_traces:
+                if run_id == trace_id:  # the root finishes last: forget the trace
+                    self._dropped_traces.discard(trace_id)
+                return None
+        return super().update_run(run_id, **kwargs)
+
+def get_client() -> Client:
+    """Shared LangSmith client: background batched export with a bounded backlog."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BoundedClient(auto_batch_tracing=True)
+        return _client
+
+# ----------------- decorator -----------------
+def _sampled(rate: float) -> bool:
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+def _span(rate: float):
+    """Decide how to run one call -> (traced?, context manager to run it in)."""
+    if get_current_run_tree() is not None:
+        return True, contextlib.nullcontext()   # child of a sampled trace
+    if not tracing_is_enabled():
+        return False, contextlib.nullcontext()  # tracing off, or inside an unsampled root
+    if _sampled(rate):
+        _count("sampled")
+        return True, tracing_context(client=get_client())
+    _count("unsampled")
+    # switch tracing off for the whole subtree, nested LangChain runs included
+    return False, tracing_context(enabled=False)
+
+def traceable(*args, sample_rate: float = None, **kwargs):
+    """`langsmith.traceable` with head sampling and payload shrinking.
+
+    Accepts the same arguments as `langsmith.traceable`; `sample_rate` overrides
+    TRACE_SAMPLE_RATE for root spans created by this function.
+    """
+    if args and callable(args[0]):  # bare @traceable
+        return traceable(**kwargs)(args[0])
+
+    if PAYLOAD_MODE != "full":
+        kwargs.setdefault("process_inputs", _process_inputs)
+        kwargs.setdefault("process_outputs", _process_outputs)
+
+    def decorator(fn):
+        traced = ls_traceable(*args, **kwargs)(fn)
+        rate = SAMPLE_RATE if sample_rate is None else sample_rate
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*a, **kw):
+                use_trace, ctx = _span(rate)
+                with ctx:
+                    return await (traced if use_trace else fn)(*a, **kw)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            use_trace, ctx = _span(rate)
+            with ctx:
+                return (traced if use_trace else fn)(*a, **kw)
+        return wrapper
+
+    return decorator